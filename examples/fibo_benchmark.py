@@ -3,6 +3,7 @@ from __future__ import annotations
 from flux import task
 from flux import workflow
 from flux import WorkflowExecutionContext
+from flux.tasks import parallel
 
 
 def fibo(n: int):
@@ -11,7 +12,7 @@ def fibo(n: int):
     return fibo(n - 1) + fibo(n - 2)
 
 
-@task.with_options(name="sum_fibo_{iteration}")
+@task.with_options(name="sum_fibo_{iteration}", executor="process")
 async def sum_fibo(iteration: int, n: int):
     print(f"Running iteration {iteration}")
     return fibo(n)
@@ -21,11 +22,9 @@ async def sum_fibo(iteration: int, n: int):
 async def fibo_benchmark(ctx: WorkflowExecutionContext[tuple[int, int]]):
     iterations = ctx.input[0]
     n = ctx.input[1]
-    results = {}
-    for i in range(iterations):
-        result = await sum_fibo(i, n)
-        results.update({f"Iteration #{i}": result})
-    return results
+    # Started together, so the process executor runs the iterations in parallel
+    results = await parallel(*(sum_fibo(i, n) for i in range(iterations)))
+    return {f"Iteration #{i}": result for i, result in enumerate(results)}
 
 
 if __name__ == "__main__":  # pragma: no cover
@@ -22,4 +22,5 @@ __all__ = [
     "FileCacheBackend",
     "RedisCacheBackend",
     "MemcachedCacheBackend",
+    "SQLiteCacheBackend",
 ]
@@ -1,72 +1,979 @@
-from typing import Any, Optional, Set
-from cachetools import LRUCache
-from flux.cache_backends import CacheBackend, RedisCacheBackend, FileCacheBackend
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import math
+import sys
+import time
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from threading import Lock, Thread
+from typing import Any, Callable, Iterable, Optional, Set
+
+from flux.cache_backends import (CacheBackend, CacheEntry, RedisCacheBackend, FileCacheBackend,
+                                 MemcachedCacheBackend, SQLiteCacheBackend, InvalidationChannel,
+                                 RedisInvalidationChannel, SQLiteInvalidationChannel, SharedMemoryCache,
+                                 key_digest)
 from flux.config import Configuration
 
+logger = logging.getLogger("flux.cache")
+
+
+def estimate_size(value: Any, depth: int = 3) -> int:
+    """Estimate the memory footprint of a value, following containers up to a limited depth."""
+    size = sys.getsizeof(value)
+    if depth <= 0:
+        return size
+    if isinstance(value, dict):
+        size += sum(estimate_size(k, depth - 1) + estimate_size(v, depth - 1) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, depth - 1) for item in value)
+    elif hasattr(value, "__dict__"):
+        size += estimate_size(vars(value), depth - 1)
+    return size
+
+
+class MemoryCache:
+    """
+    Thread-safe LRU cache of entries bounded by number of entries and by size in bytes.
+
+    Entries carry their own version and TTL, so hits are validated locally; expired entries are
+    dropped when read and swept in expiry order on every write. An entry is accounted for its
+    serialized size when known, its estimated size otherwise, and entries larger than
+    ``max_entry_bytes`` are not admitted, so one large value cannot flush the whole tier.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: Optional[int] = None, max_entry_bytes: Optional[int] = None,
+                 on_evict: Optional[Callable[[str], None]] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.on_evict = on_evict
+        self.current_bytes = 0
+        self._entries: OrderedDict[str, tuple[CacheEntry, int]] = OrderedDict()
+        self._expiry: list[tuple[float, str]] = []
+        self._lock = Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            if item[0].is_expired():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return item[0]
+
+    def set(self, key: str, entry: CacheEntry, size: Optional[int] = None) -> bool:
+        if size is None:
+            size = entry.size if entry.size is not None else estimate_size(entry.value)
+        limit = min((b for b in (self.max_bytes, self.max_entry_bytes) if b is not None), default=None)
+        with self._lock:
+            self._remove(key)
+            self._expire()
+            if limit is not None and size > limit:
+                return False
+            self._entries[key] = (entry, size)
+            self.current_bytes += size
+            if entry.expires_at is not None:
+                heapq.heappush(self._expiry, (entry.expires_at, key))
+            while len(self._entries) > self.max_entries or (
+                    self.max_bytes is not None and self.current_bytes > self.max_bytes):
+                evicted_key, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                if self.on_evict:
+                    self.on_evict(evicted_key)
+            return True
+
+    def pop(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            return self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._expiry.clear()
+            self.current_bytes = 0
+
+    def _expire(self) -> None:
+        now = time.time()
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, key = heapq.heappop(self._expiry)
+            item = self._entries.get(key)
+            # The heap may hold stale records for keys that were overwritten or evicted since.
+            if item is not None and item[0].expires_at == expires_at:
+                self._remove(key)
+        if len(self._expiry) > 2 * max(len(self._entries), 64):
+            self._expiry = [(e.expires_at, k) for k, (e, _) in self._entries.items() if e.expires_at is not None]
+            heapq.heapify(self._expiry)
+
+    def _remove(self, key: str) -> Optional[CacheEntry]:
+        item = self._entries.pop(key, None)
+        if item is None:
+            return None
+        self.current_bytes -= item[1]
+        return item[0]
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+MEMORY_TIER = "memory"
+HOST_TIER = "host"
+PERSISTENT_TIER = "persistent"
+
+
+def key_namespace(key: str) -> str:
+    """The namespace a cache key belongs to, used to label cache statistics."""
+    for prefix in ("context_", "checkpoint_", "result_"):
+        if key.startswith(prefix):
+            return prefix[:-1]
+    if key.startswith("workflow:"):
+        return "workflow"
+    return "task"
+
+
+class CacheStats:
+    """
+    Thread-safe counters of cache operations and their latency.
+
+    Operations are counted by tier, key namespace, operation and result (e.g. a memory "get" that
+    was a "hit"); latency is accumulated by tier, namespace and operation.
+    """
+
+    def __init__(self, backends: dict[str, str]):
+        self.backends = backends  # backend type of each tier
+        self._counts: dict[tuple[str, str, str, str], int] = {}
+        self._latency: dict[tuple[str, str, str], list[float]] = {}
+        self._lock = Lock()
+
+    def record(self, tier: str, namespace: str, operation: str, result: str, count: int = 1) -> None:
+        key = (tier, namespace, operation, result)
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + count
+
+    def observe(self, tier: str, namespace: str, operation: str, seconds: float) -> None:
+        with self._lock:
+            latency = self._latency.setdefault((tier, namespace, operation), [0, 0.0])
+            latency[0] += 1
+            latency[1] += seconds
+
+    def snapshot(self) -> dict[str, list[dict[str, Any]]]:
+        """The counters as rows of labels and values, e.g. to export or print them."""
+        with self._lock:
+            counts = list(self._counts.items())
+            latency = [(key, tuple(value)) for key, value in self._latency.items()]
+        return {
+            "operations": [
+                {"tier": tier, "backend": self.backends.get(tier, tier), "namespace": namespace,
+                 "operation": operation, "result": result, "count": count}
+                for (tier, namespace, operation, result), count in counts
+            ],
+            "latency": [
+                {"tier": tier, "backend": self.backends.get(tier, tier), "namespace": namespace,
+                 "operation": operation, "count": count, "seconds": seconds}
+                for (tier, namespace, operation), (count, seconds) in latency
+            ],
+        }
+
+    @staticmethod
+    def summarize(snapshot: dict[str, list[dict[str, Any]]]) -> list[dict[str, Any]]:
+        """Aggregate a snapshot into one row per tier and namespace, with hit rate and mean read latency."""
+        rows: dict[tuple[str, str, str], dict[str, Any]] = {}
+
+        def row(item: dict[str, Any]) -> dict[str, Any]:
+            key = (item["tier"], item["backend"], item["namespace"])
+            if key not in rows:
+                rows[key] = {"tier": key[0], "backend": key[1], "namespace": key[2], "hits": 0, "misses": 0,
+                             "sets": 0, "rejected": 0, "evictions": 0, "errors": 0, "read_count": 0,
+                             "read_seconds": 0.0}
+            return rows[key]
+
+        for item in snapshot["operations"]:
+            target, operation, result, count = row(item), item["operation"], item["result"], item["count"]
+            if result == "error":
+                target["errors"] += count
+            elif operation == "get":
+                target["hits" if result == "hit" else "misses"] += count
+            elif operation == "set":
+                target["sets" if result == "ok" else "rejected"] += count
+            elif operation == "evict":
+                target["evictions"] += count
+        for item in snapshot["latency"]:
+            if item["operation"] in ("get", "get_many"):
+                target = row(item)
+                target["read_count"] += item["count"]
+                target["read_seconds"] += item["seconds"]
+        summary = []
+        for target in rows.values():
+            lookups = target["hits"] + target["misses"]
+            read_count, read_seconds = target.pop("read_count"), target.pop("read_seconds")
+            target["hit_rate"] = target["hits"] / lookups if lookups else None
+            target["read_latency_ms"] = read_seconds / read_count * 1000 if read_count else None
+            summary.append(target)
+        return sorted(summary, key=lambda r: (r["tier"] != MEMORY_TIER, r["tier"], r["namespace"]))
+
+
+class BloomFilter:
+    """
+    Compact probabilistic set of key digests.
+
+    Membership tests never return false negatives, and return false positives at about
+    ``error_rate`` once ``capacity`` keys were added. Keys cannot be removed.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self._lock = Lock()
+
+    def _positions(self, digest: bytes) -> list[int]:
+        # Double hashing: k positions derived from the two halves of a 16-byte digest
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, digest: bytes) -> None:
+        positions = self._positions(digest)
+        with self._lock:
+            for position in positions:
+                self.bits[position >> 3] |= 1 << (position & 7)
+
+    def merge(self, data: bytes) -> bool:
+        """Add every key of a filter of the same size, as produced by to_bytes()."""
+        if len(data) != len(self.bits):
+            return False
+        with self._lock:
+            merged = int.from_bytes(self.bits, "little") | int.from_bytes(data, "little")
+            self.bits[:] = merged.to_bytes(len(self.bits), "little")
+        return True
+
+    def to_bytes(self) -> bytes:
+        with self._lock:
+            return bytes(self.bits)
+
+    def __contains__(self, digest: bytes) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(digest))
+
+
+def _maintain_bloom_filter(manager_ref: weakref.ref, share_interval: Optional[float]) -> None:
+    # Holds the manager weakly, so the thread ends once the manager is discarded
+    manager = manager_ref()
+    if manager is None or not manager.rebuild_bloom_filter():
+        return
+    del manager
+    while share_interval:
+        time.sleep(share_interval)
+        manager = manager_ref()
+        if manager is None:
+            return
+        manager.share_bloom_filter()
+        del manager
+
+
+class HotKeys:
+    """
+    Access counts of cache keys, ranking the keys worth preloading into a fresh memory tier.
+
+    Only the `limit` most accessed keys are kept. Counts halve every time the ranking is taken, so it
+    follows recent traffic rather than everything since the process started.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._counts: dict[str, float] = {}
+        self._lock = Lock()
+
+    def touch(self, key: str) -> None:
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + 1
+            if len(self._counts) > 2 * self.limit:
+                self._trim()
+
+    def decay(self) -> dict[str, float]:
+        """Get the access counts of the hottest keys, hottest first, and halve them."""
+        with self._lock:
+            self._trim()
+            ranked = dict(sorted(self._counts.items(), key=lambda item: item[1], reverse=True))
+            self._counts = {key: count / 2 for key, count in ranked.items() if count >= 1}
+        return ranked
+
+    def _trim(self) -> None:
+        if len(self._counts) > self.limit:
+            self._counts = dict(heapq.nlargest(self.limit, self._counts.items(), key=lambda item: item[1]))
+
+
+def _maintain_hot_keys(manager_ref: weakref.ref, interval: float) -> None:
+    # Holds the manager weakly, so the thread ends once the manager is discarded
+    while True:
+        time.sleep(interval)
+        manager = manager_ref()
+        if manager is None:
+            return
+        manager.save_hot_keys()
+        del manager
+
+
 class CacheInvalidator:
-    def __init__(self, cache_manager: 'CacheManager'):
+    """
+    Invalidates cached keys by tag and keeps the memory tiers of other processes consistent.
+
+    Tags are persisted by backends that support them; keys tagged by this process are also tracked
+    locally for the other backends. Every key written or deleted is broadcast on the invalidation
+    channel, if any, and keys broadcast by other processes are dropped from the memory tier, and
+    from the host tier unless the other process writes through the same one.
+    """
+
+    def __init__(self, cache_manager: 'CacheManager', channel: Optional[InvalidationChannel] = None):
         self.cache_manager = cache_manager
         self.tags: dict[str, Set[str]] = {}  # Map tags to cache keys
+        self._lock = Lock()
+        self.channel = channel
+        if channel is not None:
+            channel.subscribe(self._on_invalidated)
 
     def tag_key(self, key: str, tags: Set[str]):
-        for tag in tags:
-            self.tags.setdefault(tag, set()).add(key)
+        with self._lock:
+            for tag in tags:
+                self.tags.setdefault(tag, set()).add(key)
 
     def invalidate_by_tag(self, tag: str):
-        keys = self.tags.get(tag, set())
+        with self._lock:
+            keys = self.tags.pop(tag, set())
+        keys |= self.cache_manager.persistent_backend.get_keys_by_tag(tag) or set()
+        if keys:
+            self.cache_manager.delete_many(sorted(keys))
+
+    def broadcast(self, keys: Iterable[str]):
+        if self.channel is not None:
+            self.channel.publish(keys)
+
+    def close(self):
+        if self.channel is not None:
+            self.channel.close()
+
+    def _on_invalidated(self, keys: list[str], host: Optional[str] = None):
+        # A writer sharing our host tier already updated it; popping would drop its fresh entries
+        host_cache = self.cache_manager.host_cache
+        shared = host is not None and host_cache is not None and host == host_cache.id
         for key in keys:
-            self.cache_manager.delete(key)
-        self.tags.pop(tag, None)
+            self.cache_manager._local_pop(key, host_tier=not shared)
+            self.cache_manager._remember(key)
 
     def invalidate_by_event(self, event_type: str, workflow_name: str):
         if event_type in ['WORKFLOW_UPDATED', 'WORKFLOW_DELETED']:
             self.invalidate_by_tag(f"workflow:{workflow_name}")
 
+
+class _CachedNone:
+    """Cached in place of a None value, which would otherwise read as a miss."""
+
+    _instance: Optional['_CachedNone'] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __reduce__(self):
+        # Unpickles to the same instance, so it can be compared by identity
+        return _CachedNone, ()
+
+    def __repr__(self):
+        return "CACHED_NONE"
+
+
+CACHED_NONE = _CachedNone()
+
+
+class CacheFlight:
+    """
+    The claim on computing a missing cache key.
+
+    Identical calls in this process wait on the flight's future; calls in other processes wait
+    for the backend lease to be released. The owner must complete the flight with the computed
+    value (None on failure, CACHED_NONE for a computed None) and release the lease once the value
+    is written to the cache.
+    """
+
+    def __init__(self, cache_manager: 'CacheManager', key: str, version: Optional[str], future: Future):
+        self.cache_manager = cache_manager
+        self.key = key
+        self.version = version
+        self.future = future
+        self.token: Optional[str] = None
+
+    def complete(self, value: Any = None) -> None:
+        with self.cache_manager._flights_lock:
+            if self.cache_manager._flights.get((self.key, self.version)) is self.future:
+                del self.cache_manager._flights[(self.key, self.version)]
+        if not self.future.done():
+            self.future.set_result(value)
+
+    def release(self) -> None:
+        token, self.token = self.token, None
+        if token is not None:
+            try:
+                self.cache_manager.persistent_backend.release_lease(self.key, token)
+            except Exception as e:
+                logger.warning(f"Failed to release the cache lease on {self.key}: {str(e)}")
+
+    async def arelease(self) -> None:
+        token, self.token = self.token, None
+        if token is not None:
+            try:
+                await self.cache_manager.persistent_backend.arelease_lease(self.key, token)
+            except Exception as e:
+                logger.warning(f"Failed to release the cache lease on {self.key}: {str(e)}")
+
+
 class CacheManager:
+    BLOOM_FILTER_KEY = "flux:bloom"
+    HOT_KEYS_KEY = "flux:hot-keys"
+
+    _instance: CacheManager | None = None
+    _lock: Lock = Lock()
+
     def __init__(self):
-        self.memory_cache = LRUCache(maxsize=Configuration.get().settings.cache.get('memory_maxsize', 1000))
+        cache_config = Configuration.get().settings.cache
+        self.stats = CacheStats({MEMORY_TIER: "memory", HOST_TIER: "shared-memory", PERSISTENT_TIER: cache_config.backend})
+        self.memory_cache = MemoryCache(max_entries=cache_config.memory_maxsize,
+                                        max_bytes=cache_config.memory_max_bytes,
+                                        max_entry_bytes=cache_config.memory_max_entry_bytes,
+                                        on_evict=self._evicted)
+        self.host_cache = self._get_host_cache()
         self.persistent_backend = self._get_persistent_backend()
-        self.invalidator = CacheInvalidator(self)
+        channel = self._get_invalidation_channel()
+        if channel is not None and self.host_cache is not None:
+            channel.host = self.host_cache.id
+        self.invalidator = CacheInvalidator(self, channel)
+        self._flights: dict[tuple[str, Optional[str]], Future] = {}
+        self._flights_lock = Lock()
+        # Until the filter holds every key of the backend (rebuilt in the background), it is not consulted
+        self.bloom_filter: Optional[BloomFilter] = None
+        self._bloom_filter_ready = False
+        if cache_config.bloom_filter:
+            self.bloom_filter = BloomFilter(cache_config.bloom_capacity, cache_config.bloom_error_rate)
+            Thread(target=_maintain_bloom_filter, args=(weakref.ref(self), cache_config.bloom_share_interval),
+                   name="flux-cache-bloom-filter", daemon=True).start()
+        self.hot_keys: Optional[HotKeys] = None
+        if cache_config.hot_keys:
+            self.hot_keys = HotKeys(cache_config.hot_keys)
+            Thread(target=_maintain_hot_keys, args=(weakref.ref(self), cache_config.hot_keys_interval),
+                   name="flux-cache-hot-keys", daemon=True).start()
 
     def _get_persistent_backend(self) -> CacheBackend:
         cache_config = Configuration.get().settings.cache
-        backend_type = cache_config.get("backend", "file")
+        backend_type = cache_config.backend
         if backend_type == "redis":
             return RedisCacheBackend()
         elif backend_type == "memcached":
             return MemcachedCacheBackend()
+        elif backend_type == "sqlite":
+            return SQLiteCacheBackend()
         return FileCacheBackend()
 
+    def _get_host_cache(self) -> Optional[SharedMemoryCache]:
+        settings = Configuration.get().settings
+        cache_config = settings.cache
+        if not cache_config.host_cache:
+            return None
+        if cache_config.host_cache_path:
+            path = Path(cache_config.host_cache_path)
+        else:
+            # One file per Flux home, so unrelated deployments on a host do not share entries
+            home = key_digest(str(Path(settings.home).resolve())).hex()[:16]
+            shm = Path("/dev/shm")
+            path = shm / f"flux-cache-{home}" if shm.is_dir() else Path(settings.home) / settings.cache_path / "host-cache"
+        try:
+            return SharedMemoryCache(path, cache_config.host_cache_bytes, cache_config.host_cache_slots)
+        except Exception as e:
+            logger.warning(f"Failed to open the host cache tier at {path}; it is disabled: {str(e)}")
+            return None
+
+    def _get_invalidation_channel(self) -> Optional[InvalidationChannel]:
+        settings = Configuration.get().settings
+        channel = settings.cache.invalidation_channel
+        if channel == "auto":
+            channel = {"redis": "redis", "file": "sqlite", "sqlite": "sqlite"}.get(settings.cache.backend, "none")
+        if channel == "redis":
+            return RedisInvalidationChannel()
+        if channel == "sqlite":
+            path = Path(settings.home) / settings.cache_path / "invalidations.db"
+            return SQLiteInvalidationChannel(path, settings.cache.invalidation_poll_interval)
+        return None
+
+    def close(self) -> None:
+        """Stop the background work of this manager, such as listening for invalidations."""
+        self.invalidator.close()
+        host_cache, self.host_cache = self.host_cache, None
+        if host_cache is not None:
+            host_cache.close()
+        if self.persistent_backend is not None:
+            self.persistent_backend.close()
+
+    async def aclose(self) -> None:
+        """Close the backend connections opened on the running event loop, before the loop closes."""
+        await self.persistent_backend.aclose()
+
     @staticmethod
     def default() -> 'CacheManager':
-        return CacheManager()
+        """Get the process-wide cache manager, creating it on first use."""
+        if CacheManager._instance is None:
+            with CacheManager._lock:
+                if CacheManager._instance is None:
+                    CacheManager._instance = CacheManager()
+        return CacheManager._instance
+
+    @staticmethod
+    def reset() -> None:
+        """Discard the process-wide cache manager, e.g. after changing the cache configuration in tests."""
+        with CacheManager._lock:
+            manager, CacheManager._instance = CacheManager._instance, None
+        if manager:
+            manager.close()
+
+    def rebuild_bloom_filter(self) -> bool:
+        """
+        Add every key of the persistent backend to the Bloom filter and start consulting it.
+
+        The filter learns the keys other processes write from the invalidation channel, or from the
+        copy shared through the backend. With neither it would report their keys as definite
+        misses, so it is not consulted.
+        """
+        if self.bloom_filter is None:
+            return False
+        if self.invalidator.channel is None and not Configuration.get().settings.cache.bloom_share_interval:
+            logger.info("The cache Bloom filter is disabled: it needs an invalidation channel or "
+                        "bloom_share_interval to learn the keys written by other processes")
+            return False
+        try:
+            digests = self.persistent_backend.key_digests()
+            if digests is None:
+                logger.info("The cache backend cannot enumerate its keys; the Bloom filter is disabled")
+                return False
+            for digest in digests:
+                self.bloom_filter.add(digest)
+        except Exception as e:
+            logger.warning(f"Failed to rebuild the cache Bloom filter; it is disabled: {str(e)}")
+            return False
+        self._bloom_filter_ready = True
+        return True
+
+    def share_bloom_filter(self) -> None:
+        """Merge the Bloom filter with the copy stored in the backend, then store the union."""
+        if self.bloom_filter is None:
+            return
+        try:
+            entry = self.persistent_backend.get_entry(self.BLOOM_FILTER_KEY)
+            if entry is not None and not self.bloom_filter.merge(entry.value):
+                logger.warning("Ignoring a shared cache Bloom filter sized with a different configuration")
+            self.persistent_backend.set(self.BLOOM_FILTER_KEY, self.bloom_filter.to_bytes())
+        except Exception as e:
+            logger.warning(f"Failed to share the cache Bloom filter: {str(e)}")
+
+    def save_hot_keys(self) -> None:
+        """
+        Store the most accessed keys in the backend for warm_up to preload.
+
+        Processes sharing the backend each keep the higher of their own count and the stored one,
+        which halves on every save, so keys no process touches anymore fall out of the list.
+        """
+        if self.hot_keys is None:
+            return
+        try:
+            counts = self.hot_keys.decay()
+            entry = self.persistent_backend.get_entry(self.HOT_KEYS_KEY)
+            if entry is not None:
+                for key, count in entry.value.items():
+                    counts[key] = max(counts.get(key, 0), count / 2)
+            hottest = heapq.nlargest(self.hot_keys.limit, counts.items(), key=lambda item: item[1])
+            self.persistent_backend.set(self.HOT_KEYS_KEY, {key: count for key, count in hottest if count >= 1})
+        except Exception as e:
+            logger.warning(f"Failed to save the most accessed cache keys: {str(e)}")
+
+    def load_hot_keys(self) -> list[str]:
+        """Get the most accessed keys recorded in the backend, hottest first."""
+        try:
+            entry = self.persistent_backend.get_entry(self.HOT_KEYS_KEY)
+        except Exception as e:
+            logger.warning(f"Failed to load the most accessed cache keys: {str(e)}")
+            return []
+        return list(entry.value) if entry is not None else []
+
+    def _touch(self, key: str) -> None:
+        if self.hot_keys is not None:
+            self.hot_keys.touch(key)
+
+    def _evicted(self, key: str) -> None:
+        self.stats.record(MEMORY_TIER, key_namespace(key), "evict", "ok")
+
+    @contextmanager
+    def _measure(self, namespace: str, operation: str):
+        # Times a persistent backend call and counts its failures
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.stats.record(PERSISTENT_TIER, namespace, operation, "error")
+            raise
+        finally:
+            self.stats.observe(PERSISTENT_TIER, namespace, operation, time.perf_counter() - start)
+
+    def _local_get(self, key: str, version: Optional[str], namespace: str) -> Optional[CacheEntry]:
+        # The in-memory tier, then the host tier shared with the other processes of this host
+        start = time.perf_counter()
+        entry = self.memory_cache.get(key)
+        if entry is not None and not entry.matches(version):
+            entry = None
+        self.stats.observe(MEMORY_TIER, namespace, "get", time.perf_counter() - start)
+        self.stats.record(MEMORY_TIER, namespace, "get", "miss" if entry is None else "hit")
+        if entry is not None or self.host_cache is None:
+            return entry
+        start = time.perf_counter()
+        entry = self.host_cache.get(key, version)
+        self.stats.observe(HOST_TIER, namespace, "get", time.perf_counter() - start)
+        self.stats.record(HOST_TIER, namespace, "get", "miss" if entry is None else "hit")
+        if entry is not None:
+            self._memory_set(key, entry, namespace)
+        return entry
+
+    def _memory_set(self, key: str, entry: CacheEntry, namespace: str) -> None:
+        admitted = self.memory_cache.set(key, entry)
+        self.stats.record(MEMORY_TIER, namespace, "set", "ok" if admitted else "rejected")
+
+    def _local_set(self, key: str, entry: CacheEntry, namespace: str) -> None:
+        self._memory_set(key, entry, namespace)
+        if self.host_cache is not None:
+            try:
+                admitted = self.host_cache.set(key, entry)
+            except Exception as e:
+                logger.warning(f"Failed to store {key} in the host cache tier: {str(e)}")
+                admitted = False
+            self.stats.record(HOST_TIER, namespace, "set", "ok" if admitted else "rejected")
+
+    def _local_pop(self, key: str, host_tier: bool = True) -> None:
+        self.memory_cache.pop(key)
+        if host_tier and self.host_cache is not None:
+            self.host_cache.pop(key)
+
+    def _may_contain(self, key: str) -> bool:
+        return not self._bloom_filter_ready or key_digest(key) in self.bloom_filter
+
+    def _remember(self, key: str) -> None:
+        if self.bloom_filter is not None:
+            self.bloom_filter.add(key_digest(key))
 
     def get(self, key: str, version: Optional[str] = None) -> Optional[Any]:
-        # Check memory cache first
-        if key in self.memory_cache and self.validate(key, version):
-            return self.memory_cache[key]
-        # Fall back to persistent cache
-        value = self.persistent_backend.get(key)
-        if value is not None and self.validate(key, version):
-            self.memory_cache[key] = value  # Populate memory cache
-            return value
+        # Memory hits are validated locally; the backend is only consulted on a miss
+        namespace = key_namespace(key)
+        entry = self._local_get(key, version, namespace)
+        if entry is not None:
+            self._touch(key)
+            return entry.value
+        if not self._may_contain(key):
+            self.stats.record(PERSISTENT_TIER, namespace, "get", "filtered")
+            return None
+        with self._measure(namespace, "get"):
+            entry = self.persistent_backend.get_entry(key, version)
+        self.stats.record(PERSISTENT_TIER, namespace, "get", "miss" if entry is None else "hit")
+        if entry is not None:
+            self._local_set(key, entry, namespace)  # Populate the memory and host tiers
+            self._touch(key)
+            return entry.value
         return None
 
     def set(self, key: str, value: Any, ttl: Optional[int] = None, version: Optional[str] = None, tags: Optional[Set[str]] = None) -> None:
-        self.memory_cache[key] = value
-        self.persistent_backend.set(key, value, ttl, version)
+        namespace = key_namespace(key)
+        self._local_set(key, CacheEntry(value, version=version, ttl=ttl), namespace)
+        with self._measure(namespace, "set"):
+            self.persistent_backend.set(key, value, ttl, version, tags)
+        self.stats.record(PERSISTENT_TIER, namespace, "set", "ok")
+        self._remember(key)
+        self.invalidator.broadcast([key])
         if tags:
             self.invalidator.tag_key(key, tags)
 
+    def get_many(self, keys: list[str], version: Optional[str] = None) -> dict[str, Any]:
+        """Get the cached values of several keys, fetching memory misses from the backend in one batch."""
+        values: dict[str, Any] = {}
+        missing = []
+        for key in keys:
+            entry = self._local_get(key, version, key_namespace(key))
+            if entry is not None:
+                values[key] = entry.value
+                self._touch(key)
+            elif self._may_contain(key):
+                missing.append(key)
+            else:
+                self.stats.record(PERSISTENT_TIER, key_namespace(key), "get", "filtered")
+        if missing:
+            with self._measure(key_namespace(missing[0]), "get_many"):
+                entries = self.persistent_backend.get_many(missing, version)
+            for key in missing:
+                namespace = key_namespace(key)
+                entry = entries.get(key)
+                self.stats.record(PERSISTENT_TIER, namespace, "get", "miss" if entry is None else "hit")
+                if entry is not None:
+                    self._local_set(key, entry, namespace)
+                    values[key] = entry.value
+                    self._touch(key)
+        return values
+
+    def set_many(self, items: dict[str, Any], ttl: Optional[int] = None, version: Optional[str] = None, tags: Optional[Set[str]] = None) -> None:
+        """Cache several values sharing the same TTL, version and tags with one backend write."""
+        if not items:
+            return
+        for key, value in items.items():
+            self._local_set(key, CacheEntry(value, version=version, ttl=ttl), key_namespace(key))
+        with self._measure(key_namespace(next(iter(items))), "set_many"):
+            self.persistent_backend.set_many(items, ttl, version, tags)
+        for key in items:
+            self.stats.record(PERSISTENT_TIER, key_namespace(key), "set", "ok")
+            self._remember(key)
+        self.invalidator.broadcast(items)
+        if tags:
+            for key in items:
+                self.invalidator.tag_key(key, tags)
+
     def delete(self, key: str) -> None:
-        self.memory_cache.pop(key, None)
-        self.persistent_backend.delete(key)
+        self._local_pop(key)
+        with self._measure(key_namespace(key), "delete"):
+            self.persistent_backend.delete(key)
+        self.stats.record(PERSISTENT_TIER, key_namespace(key), "delete", "ok")
+        self.invalidator.broadcast([key])
+
+    def delete_many(self, keys: list[str]) -> None:
+        if not keys:
+            return
+        for key in keys:
+            self._local_pop(key)
+        with self._measure(key_namespace(keys[0]), "delete_many"):
+            self.persistent_backend.delete_many(keys)
+        for key in keys:
+            self.stats.record(PERSISTENT_TIER, key_namespace(key), "delete", "ok")
+        self.invalidator.broadcast(keys)
 
     def validate(self, key: str, version: Optional[str] = None) -> bool:
-        return self.persistent_backend.validate(key, version)
+        entry = self.memory_cache.get(key)
+        if entry is not None and entry.matches(version):
+            return True
+        if not self._may_contain(key):
+            return False
+        with self._measure(key_namespace(key), "validate"):
+            return self.persistent_backend.validate(key, version)
+
+    # Async variants of the operations above for callers on an event loop: the memory tier is
+    # consulted inline and only the persistent backend is awaited.
+
+    async def aget(self, key: str, version: Optional[str] = None) -> Optional[Any]:
+        namespace = key_namespace(key)
+        entry = self._local_get(key, version, namespace)
+        if entry is not None:
+            self._touch(key)
+            return entry.value
+        if not self._may_contain(key):
+            self.stats.record(PERSISTENT_TIER, namespace, "get", "filtered")
+            return None
+        with self._measure(namespace, "get"):
+            entry = await self.persistent_backend.aget_entry(key, version)
+        self.stats.record(PERSISTENT_TIER, namespace, "get", "miss" if entry is None else "hit")
+        if entry is not None:
+            self._local_set(key, entry, namespace)
+            self._touch(key)
+            return entry.value
+        return None
+
+    async def aset(self, key: str, value: Any, ttl: Optional[int] = None, version: Optional[str] = None, tags: Optional[Set[str]] = None) -> None:
+        namespace = key_namespace(key)
+        self._local_set(key, CacheEntry(value, version=version, ttl=ttl), namespace)
+        with self._measure(namespace, "set"):
+            await self.persistent_backend.aset(key, value, ttl, version, tags)
+        self.stats.record(PERSISTENT_TIER, namespace, "set", "ok")
+        self._remember(key)
+        self.invalidator.broadcast([key])
+        if tags:
+            self.invalidator.tag_key(key, tags)
+
+    async def aget_many(self, keys: list[str], version: Optional[str] = None) -> dict[str, Any]:
+        values: dict[str, Any] = {}
+        missing = []
+        for key in keys:
+            entry = self._local_get(key, version, key_namespace(key))
+            if entry is not None:
+                values[key] = entry.value
+                self._touch(key)
+            elif self._may_contain(key):
+                missing.append(key)
+            else:
+                self.stats.record(PERSISTENT_TIER, key_namespace(key), "get", "filtered")
+        if missing:
+            with self._measure(key_namespace(missing[0]), "get_many"):
+                entries = await self.persistent_backend.aget_many(missing, version)
+            for key in missing:
+                namespace = key_namespace(key)
+                entry = entries.get(key)
+                self.stats.record(PERSISTENT_TIER, namespace, "get", "miss" if entry is None else "hit")
+                if entry is not None:
+                    self._local_set(key, entry, namespace)
+                    values[key] = entry.value
+                    self._touch(key)
+        return values
+
+    async def aset_many(self, items: dict[str, Any], ttl: Optional[int] = None, version: Optional[str] = None, tags: Optional[Set[str]] = None) -> None:
+        if not items:
+            return
+        for key, value in items.items():
+            self._local_set(key, CacheEntry(value, version=version, ttl=ttl), key_namespace(key))
+        with self._measure(key_namespace(next(iter(items))), "set_many"):
+            await self.persistent_backend.aset_many(items, ttl, version, tags)
+        for key in items:
+            self.stats.record(PERSISTENT_TIER, key_namespace(key), "set", "ok")
+            self._remember(key)
+        self.invalidator.broadcast(items)
+        if tags:
+            for key in items:
+                self.invalidator.tag_key(key, tags)
+
+    async def adelete(self, key: str) -> None:
+        self._local_pop(key)
+        with self._measure(key_namespace(key), "delete"):
+            await self.persistent_backend.adelete(key)
+        self.stats.record(PERSISTENT_TIER, key_namespace(key), "delete", "ok")
+        self.invalidator.broadcast([key])
 
-    def warm_up(self, keys: list[str]):
+    async def adelete_many(self, keys: list[str]) -> None:
+        if not keys:
+            return
         for key in keys:
-            value = self.persistent_backend.get(key)
-            if value is not None:
-                self.memory_cache[key] = value
+            self._local_pop(key)
+        with self._measure(key_namespace(keys[0]), "delete_many"):
+            await self.persistent_backend.adelete_many(keys)
+        for key in keys:
+            self.stats.record(PERSISTENT_TIER, key_namespace(key), "delete", "ok")
+        self.invalidator.broadcast(keys)
+
+    async def avalidate(self, key: str, version: Optional[str] = None) -> bool:
+        entry = self.memory_cache.get(key)
+        if entry is not None and entry.matches(version):
+            return True
+        if not self._may_contain(key):
+            return False
+        with self._measure(key_namespace(key), "validate"):
+            return await self.persistent_backend.avalidate(key, version)
+
+    async def claim(self, key: str, version: Optional[str] = None) -> tuple[Any, Optional[CacheFlight]]:
+        """
+        Claim the computation of a key that missed the cache, or wait for whoever is computing it.
+
+        Returns:
+            tuple[Any, Optional[CacheFlight]]: The value (CACHED_NONE for a None) and None if
+                another caller produced it while waiting, otherwise None and the flight the caller
+                must complete.
+        """
+        while True:
+            with self._flights_lock:
+                future = self._flights.get((key, version))
+                owner = future is None
+                if owner:
+                    future = self._flights[(key, version)] = Future()
+            if not owner:
+                # Shielded so a cancelled waiter does not cancel the flight for everyone else
+                value = await asyncio.shield(asyncio.wrap_future(future))
+                if value is not None:
+                    return value, None
+                continue  # the owner failed; compete to compute it again
+            flight = CacheFlight(self, key, version, future)
+            try:
+                entry = await self._lease(flight)
+            except BaseException:
+                flight.complete()
+                raise
+            if entry is not None:
+                await flight.arelease()
+                flight.complete(entry.value)
+                return entry.value, None
+            return None, flight
+
+    async def _lease(self, flight: CacheFlight) -> Optional[CacheEntry]:
+        # Takes the backend lease on the key; while another process holds it, polls for the value it
+        # writes. Returns that entry, or None once the lease is ours (or the wait timed out).
+        cache_config = Configuration.get().settings.cache
+        deadline = time.monotonic() + cache_config.lease_timeout
+        while True:
+            flight.token = await self.persistent_backend.aacquire_lease(flight.key, cache_config.lease_timeout)
+            # Even on the first try: the previous holder may have written the value and released
+            # its lease after our cache miss
+            entry = await self.persistent_backend.aget_entry(flight.key, flight.version)
+            if entry is not None:
+                self.memory_cache.set(flight.key, entry)
+                self._remember(flight.key)
+                return entry
+            if flight.token is not None:
+                return None
+            if time.monotonic() >= deadline:
+                logger.warning(f"Timed out waiting for the cache lease on {flight.key}; computing it anyway")
+                return None
+            await asyncio.sleep(cache_config.lease_poll_interval)
+
+    def warm_up(self, keys: Optional[list[str]] = None, hot_keys: bool = True) -> int:
+        """
+        Preload the memory tier, fetching keys from the backend in concurrent batches.
+
+        Args:
+            keys (Optional[list[str]]): Keys to preload, such as workflow metadata.
+            hot_keys (bool): Also preload the most accessed keys recorded by save_hot_keys.
+
+        Returns:
+            int: The number of entries loaded into the memory tier.
+        """
+        cache_config = Configuration.get().settings.cache
+        keys = list(keys or [])
+        if hot_keys:
+            keys.extend(self.load_hot_keys())
+        keys = list(dict.fromkeys(keys))[:cache_config.memory_maxsize]
+        if not keys:
+            return 0
+        entries: dict[str, CacheEntry] = {}
+        if self.host_cache is not None:
+            # Another process of this host may have loaded them already
+            for key in keys:
+                entry = self.host_cache.get(key)
+                if entry is not None:
+                    entries[key] = entry
+        missing = [key for key in keys if key not in entries]
+        batch_size = max(1, cache_config.warm_up_batch_size)
+        batches = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+
+        def fetch(batch: list[str]) -> dict[str, CacheEntry]:
+            try:
+                with self._measure(key_namespace(batch[0]), "get_many"):
+                    return self.persistent_backend.get_many(batch)
+            except Exception as e:
+                logger.warning(f"Failed to warm up {len(batch)} cache keys: {str(e)}")
+                return {}
+
+        fetched: dict[str, CacheEntry] = {}
+        if batches:
+            with ThreadPoolExecutor(max_workers=max(1, min(cache_config.warm_up_concurrency, len(batches))),
+                                    thread_name_prefix="flux-cache-warm-up") as pool:
+                for batch_entries in pool.map(fetch, batches):
+                    fetched.update(batch_entries)
+        entries.update(fetched)
+        # Coldest first, so the hottest keys are the last the LRU would evict
+        for key in reversed(keys):
+            if key in fetched:
+                self._local_set(key, fetched[key], key_namespace(key))
+            elif key in entries:
+                self._memory_set(key, entries[key], key_namespace(key))
+        logger.info(f"Warmed up the memory cache with {len(entries)} of {len(keys)} keys")
+        return len(entries)
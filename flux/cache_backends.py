@@ -1,18 +1,193 @@
 from __future__ import annotations
+import asyncio
+import bisect
+import hashlib
+import json
+import logging
+import mmap
+import os
+import socket
+import sqlite3
+import struct
+import tempfile
+import time
+import uuid
+import weakref
+import zlib
 from abc import ABC, abstractmethod
-from datetime import datetime, timedelta
+from contextlib import closing, contextmanager, suppress
+from dataclasses import dataclass, field
+from datetime import datetime
 from pathlib import Path
-from typing import Any, Optional, Set
+from threading import Event, Lock, Thread, local
+from typing import Any, Callable, Iterable, Optional, Set
 import dill
 import redis
-import pymemcache.client
+import redis.asyncio
+from pymemcache.client.base import PooledClient
+from pymemcache.client.hash import HashClient
 from flux.config import Configuration
 
+logger = logging.getLogger("flux.cache_backends")
+
+@dataclass
+class CacheEntry:
+    """A cached value with the metadata needed to validate it without asking the backend."""
+    value: Any
+    version: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    ttl: Optional[int] = None
+    size: Optional[int] = None  # serialized size of the value in bytes, when known
+
+    @property
+    def expires_at(self) -> Optional[float]:
+        return self.created_at + self.ttl if self.ttl else None
+
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        expires_at = self.expires_at
+        return expires_at is not None and (now or time.time()) > expires_at
+
+    def matches(self, version: Optional[str] = None) -> bool:
+        return not version or self.version == version
+
+    @staticmethod
+    def from_data(data: dict) -> CacheEntry:
+        """Build an entry from the dictionary layout stored by the backends."""
+        created_at = data.get("created_at")
+        if isinstance(created_at, str):
+            created_at = datetime.fromisoformat(created_at)
+        return CacheEntry(
+            value=data["value"],
+            version=data.get("version"),
+            created_at=created_at.timestamp() if created_at else time.time(),
+            ttl=data.get("ttl"),
+        )
+
+
+ENTRY_MAGIC = b"FXC2"
+# magic, flags, created_at, expires_at (0 = never), serialized value size, version length
+_HEADER = struct.Struct(">4sBddQH")
+HEADER_READ_SIZE = _HEADER.size + 1024
+
+COMPRESSION_FLAGS = 0x03  # flag bits holding the codec of a compressed payload
+
+
+class Compressor:
+    """
+    Compresses serialized cache values of at least ``min_bytes`` bytes.
+
+    The codec is recorded in the entry flags, so entries written with any codec (or none) can be
+    read back whatever the current configuration. zlib ships with Python; zstd and lz4 require the
+    ``zstandard`` and ``lz4`` packages.
+    """
+
+    CODECS = {"none": 0, "zlib": 1, "zstd": 2, "lz4": 3}
+
+    def __init__(self, codec: str = "zlib", min_bytes: Optional[int] = None):
+        if codec not in self.CODECS:
+            raise ValueError(f"Unknown compression codec: {codec}")
+        self.flag = self.CODECS[codec]
+        self.min_bytes = min_bytes
+        if self.flag and min_bytes is not None:
+            _codec(self.flag)  # fail early if the codec's package is missing
+
+    @staticmethod
+    def default() -> Compressor:
+        cache_config = Configuration.get().settings.cache
+        return Compressor(cache_config.compression, cache_config.compress_min_bytes)
+
+    def compress(self, payload: bytes) -> tuple[int, bytes]:
+        """Returns the flags to record and the payload, compressed if it is large enough."""
+        if not self.flag or self.min_bytes is None or len(payload) < self.min_bytes:
+            return 0, payload
+        return self.flag, _codec(self.flag)[0](payload)
+
+    @staticmethod
+    def decompress(flags: int, payload: bytes) -> bytes:
+        codec = flags & COMPRESSION_FLAGS
+        return _codec(codec)[1](payload) if codec else payload
+
+
+def _codec(flag: int) -> tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]:
+    if flag == 1:
+        return zlib.compress, zlib.decompress
+    if flag == 2:
+        import zstandard
+        return zstandard.ZstdCompressor().compress, zstandard.ZstdDecompressor().decompress
+    if flag == 3:
+        import lz4.frame
+        return lz4.frame.compress, lz4.frame.decompress
+    raise ValueError(f"Unknown compression flag: {flag}")
+
+
+@dataclass
+class EntryHeader:
+    """Metadata stored in front of every serialized cache entry."""
+    version: Optional[str]
+    created_at: float
+    expires_at: Optional[float]
+    flags: int = 0
+    size: Optional[int] = None
+
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        return self.expires_at is not None and (now or time.time()) > self.expires_at
+
+    def matches(self, version: Optional[str] = None) -> bool:
+        return not version or self.version == version
+
+
+def encode_entry(entry: CacheEntry, compressor: Optional[Compressor] = None) -> bytes:
+    """Serialize an entry as a fixed header, the version and the dill-pickled (maybe compressed) value."""
+    version = entry.version.encode("utf-8") if entry.version else b""
+    payload = dill.dumps(entry.value)
+    size = len(payload)
+    flags, payload = compressor.compress(payload) if compressor else (0, payload)
+    header = _HEADER.pack(ENTRY_MAGIC, flags, entry.created_at, entry.expires_at or 0.0, size, len(version))
+    return header + version + payload
+
+
+def read_header(data: bytes) -> tuple[EntryHeader, int]:
+    """Decode the header of a serialized entry without touching its payload.
+
+    Returns:
+        The header and the offset at which the payload starts.
+    """
+    if len(data) < _HEADER.size:
+        raise ValueError("Truncated cache entry")
+    magic, flags, created_at, expires_at, size, version_length = _HEADER.unpack_from(data)
+    if magic != ENTRY_MAGIC:
+        raise ValueError("Unknown cache entry format")
+    offset = _HEADER.size + version_length
+    if len(data) < offset:
+        raise ValueError("Truncated cache entry")
+    version = bytes(data[_HEADER.size:offset]).decode("utf-8") if version_length else None
+    return EntryHeader(version, created_at, expires_at or None, flags, size), offset
+
+
+def decode_entry(data: bytes, header: Optional[EntryHeader] = None, offset: Optional[int] = None) -> CacheEntry:
+    """Deserialize an entry produced by encode_entry."""
+    if header is None or offset is None:
+        header, offset = read_header(data)
+    ttl = header.expires_at - header.created_at if header.expires_at else None
+    value = dill.loads(Compressor.decompress(header.flags, data[offset:]))
+    return CacheEntry(value, version=header.version, created_at=header.created_at, ttl=ttl, size=header.size)
+
+
+def key_digest(key: str) -> bytes:
+    """Stable 16-byte digest of a cache key, used to name file entries and by membership filters."""
+    return hashlib.blake2b(key.encode("utf-8", "surrogateescape"), digest_size=16).digest()
+
+
 class CacheBackend(ABC):
     @abstractmethod
     def get(self, key: str) -> Optional[Any]:
         raise NotImplementedError()
 
+    @abstractmethod
+    def get_entry(self, key: str, version: Optional[str] = None) -> Optional[CacheEntry]:
+        """Read a value and its metadata in a single lookup; expired or mismatching entries are not returned."""
+        raise NotImplementedError()
+
     @abstractmethod
     def set(self, key: str, value: Any, ttl: Optional[int] = None, version: Optional[str] = None, tags: Optional[Set[str]] = None) -> None:
         raise NotImplementedError()
@@ -25,164 +200,1268 @@ class CacheBackend(ABC):
     def validate(self, key: str, version: Optional[str] = None) -> bool:
         raise NotImplementedError()
 
+    def get_many(self, keys: list[str], version: Optional[str] = None) -> dict[str, CacheEntry]:
+        """Read several entries; missing, expired or mismatching keys are left out of the result."""
+        entries = {}
+        for key in keys:
+            entry = self.get_entry(key, version)
+            if entry is not None:
+                entries[key] = entry
+        return entries
+
+    def set_many(self, items: dict[str, Any], ttl: Optional[int] = None, version: Optional[str] = None, tags: Optional[Set[str]] = None) -> None:
+        """Write several entries sharing the same TTL, version and tags."""
+        for key, value in items.items():
+            self.set(key, value, ttl, version, tags)
+
+    def delete_many(self, keys: list[str]) -> None:
+        """Delete several entries."""
+        for key in keys:
+            self.delete(key)
+
+    def key_digests(self) -> Optional[Iterable[bytes]]:
+        """Iterate the key_digest() of every stored key, or return None if keys cannot be enumerated."""
+        return None
+
+    def get_keys_by_tag(self, tag: str) -> Optional[Set[str]]:
+        """Retrieve the keys stored with a tag, or None if the backend does not persist tags."""
+        return None
+
+    def acquire_lease(self, key: str, ttl: float) -> Optional[str]:
+        """
+        Try to take the lease on computing a key, held until released or ``ttl`` seconds pass.
+
+        Returns the token to release the lease with, or None if someone else holds it. Backends
+        that cannot coordinate processes grant every lease.
+        """
+        return uuid.uuid4().hex
+
+    def release_lease(self, key: str, token: str) -> None:
+        """Release a lease, unless it already expired and was taken by someone else."""
+
+    def close(self) -> None:
+        """Close the connections this backend opened, on every event loop."""
+
+    async def aclose(self) -> None:
+        """Close the connections this backend opened on the running event loop, e.g. before it closes."""
+
+    # Async variants for callers on an event loop. By default the blocking call runs in the loop's
+    # default executor; backends with a native async client override them.
+
+    async def aget_entry(self, key: str, version: Optional[str] = None) -> Optional[CacheEntry]:
+        return await asyncio.to_thread(self.get_entry, key, version)
+
+    async def aget_many(self, keys: list[str], version: Optional[str] = None) -> dict[str, CacheEntry]:
+        return await asyncio.to_thread(self.get_many, keys, version)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[int] = None, version: Optional[str] = None, tags: Optional[Set[str]] = None) -> None:
+        await asyncio.to_thread(self.set, key, value, ttl, version, tags)
+
+    async def aset_many(self, items: dict[str, Any], ttl: Optional[int] = None, version: Optional[str] = None, tags: Optional[Set[str]] = None) -> None:
+        await asyncio.to_thread(self.set_many, items, ttl, version, tags)
+
+    async def adelete(self, key: str) -> None:
+        await asyncio.to_thread(self.delete, key)
+
+    async def adelete_many(self, keys: list[str]) -> None:
+        await asyncio.to_thread(self.delete_many, keys)
+
+    async def avalidate(self, key: str, version: Optional[str] = None) -> bool:
+        return await asyncio.to_thread(self.validate, key, version)
+
+    async def aacquire_lease(self, key: str, ttl: float) -> Optional[str]:
+        return await asyncio.to_thread(self.acquire_lease, key, ttl)
+
+    async def arelease_lease(self, key: str, token: str) -> None:
+        await asyncio.to_thread(self.release_lease, key, token)
+
 class FileCacheBackend(CacheBackend):
+    """
+    Cache backend storing one file per key on the local (or network) file system.
+
+    Keys are hashed into two levels of subdirectories so no directory grows unbounded. Entries are
+    written atomically (temporary file then rename) and start with a small header, so version and
+    expiry checks do not unpickle the payload. When ``file_max_bytes`` is set, a background thread
+    evicts the least recently used entries once the cache grows past the budget. Tags are indexed
+    as ``tags/{tag digest}/{key digest}`` files holding the key, and a ``.tags`` file next to each
+    tagged entry lists its tag digests, so deleting or evicting the entry also drops it from the index.
+    """
+
+    TOUCH_INTERVAL = 60  # seconds between access-time updates of a hot entry
+
     def __init__(self):
         self.settings = Configuration.get().settings
+        cache_config = self.settings.cache
         self.cache_path = Path(self.settings.home) / self.settings.cache_path
         self.cache_path.mkdir(parents=True, exist_ok=True)
+        self.use_mmap = cache_config.file_use_mmap
+        self.compressor = Compressor.default()
+        self.max_bytes = cache_config.file_max_bytes
+        self._written_bytes = 0
+        self._evict = Event()
+        if self.max_bytes:
+            Thread(target=self._eviction_loop, args=(cache_config.file_eviction_interval,),
+                   name="flux-file-cache-eviction", daemon=True).start()
 
     def get(self, key: str) -> Optional[Any]:
+        entry = self.get_entry(key)
+        return entry.value if entry else None
+
+    def get_entry(self, key: str, version: Optional[str] = None) -> Optional[CacheEntry]:
         cache_file = self._get_file_name(key)
-        if cache_file.exists():
-            with open(cache_file, "rb") as f:
-                data = dill.load(f)
-                if self.validate(key, data.get("version")):
-                    return data["value"]
-        return None
+        try:
+            data, mtime = self._read(cache_file)
+            header, offset = read_header(data)
+        except (FileNotFoundError, ValueError):
+            return None  # missing, or written in an older format and overwritten on set
+        if header.is_expired():
+            self.delete(key)
+            return None
+        if not header.matches(version):
+            return None
+        entry = decode_entry(data, header, offset)
+        if time.time() - mtime > self.TOUCH_INTERVAL:
+            self._touch(cache_file)
+        return entry
 
-    def set(self, key: str, value: Any, ttl: Optional[int] = None, version: Optional[str] = None) -> None:
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, version: Optional[str] = None, tags: Optional[Set[str]] = None) -> None:
         cache_file = self._get_file_name(key)
-        data = {
-            "value": value,
-            "version": version,
-            "created_at": datetime.now(),
-            "ttl": ttl
-        }
-        with open(cache_file, "wb") as f:
-            dill.dump(data, f)
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        data = encode_entry(CacheEntry(value, version=version, ttl=ttl), self.compressor)
+        fd, temp_name = tempfile.mkstemp(dir=cache_file.parent, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_name, cache_file)
+        except BaseException:
+            with suppress(FileNotFoundError):
+                os.unlink(temp_name)
+            raise
+        if tags:
+            for tag in tags:
+                tag_dir = self._get_tag_dir(tag)
+                tag_dir.mkdir(parents=True, exist_ok=True)
+                (tag_dir / key_digest(key).hex()).write_text(key, encoding="utf-8", errors="surrogateescape")
+            tags_file = cache_file.with_suffix(".tags")
+            tag_digests = self._read_tag_digests(tags_file)
+            new_digests = {key_digest(tag).hex() for tag in tags}
+            if not new_digests <= tag_digests:
+                tags_file.write_text("\n".join(sorted(tag_digests | new_digests)))
+        if self.max_bytes:
+            self._written_bytes += len(data)
+            if self._written_bytes > self.max_bytes // 10:
+                self._evict.set()
 
     def delete(self, key: str) -> None:
         cache_file = self._get_file_name(key)
-        if cache_file.exists():
+        with suppress(FileNotFoundError):
             cache_file.unlink()
+        self._untag(cache_file)
+
+    def get_keys_by_tag(self, tag: str) -> Optional[Set[str]]:
+        # The index may briefly list keys deleted by another process; deleting them again is harmless.
+        keys = set()
+        with suppress(FileNotFoundError):
+            for path in self._get_tag_dir(tag).iterdir():
+                with suppress(FileNotFoundError):
+                    keys.add(path.read_text(encoding="utf-8", errors="surrogateescape"))
+        return keys
+
+    def delete_by_tag(self, tag: str) -> None:
+        """Delete all keys associated with a tag and its index."""
+        tag_dir = self._get_tag_dir(tag)
+        for key in self.get_keys_by_tag(tag):
+            self.delete(key)
+            with suppress(FileNotFoundError):
+                (tag_dir / key_digest(key).hex()).unlink()
+        with suppress(OSError):
+            tag_dir.rmdir()  # left in place if a key was tagged meanwhile
 
     def validate(self, key: str, version: Optional[str] = None) -> bool:
         cache_file = self._get_file_name(key)
-        if not cache_file.exists():
+        try:
+            with open(cache_file, "rb") as f:
+                data = f.read(HEADER_READ_SIZE)
+                try:
+                    header, _ = read_header(data)
+                except ValueError:
+                    header, _ = read_header(data + f.read())  # versions longer than the first read
+        except (FileNotFoundError, ValueError):
+            return False
+        if header.is_expired():
+            self.delete(key)
             return False
+        return header.matches(version)
+
+    def acquire_lease(self, key: str, ttl: float) -> Optional[str]:
+        lock_file = self._get_file_name(key).with_suffix(".lock")
+        lock_file.parent.mkdir(parents=True, exist_ok=True)
+        token = uuid.uuid4().hex
+        for _ in range(2):
+            try:
+                fd = os.open(lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                # The lock file holds the holder's token and expiry; an expired one was left
+                # behind by a holder that died and can be taken over.
+                with suppress(FileNotFoundError, ValueError):
+                    _, expires_at = lock_file.read_text().split()
+                    if float(expires_at) <= time.time():
+                        lock_file.unlink()
+                        continue
+                return None
+            with os.fdopen(fd, "w") as f:
+                f.write(f"{token} {time.time() + ttl}")
+            return token
+        return None
+
+    def release_lease(self, key: str, token: str) -> None:
+        lock_file = self._get_file_name(key).with_suffix(".lock")
+        with suppress(FileNotFoundError):
+            if lock_file.read_text().split()[:1] == [token]:
+                lock_file.unlink()
+
+    def _read(self, cache_file: Path) -> tuple[bytes, float]:
         with open(cache_file, "rb") as f:
-            data = dill.load(f)
-            if version and data.get("version") != version:
-                return False
-            if data.get("ttl"):
-                expiry = data["created_at"] + timedelta(seconds=data["ttl"])
-                if datetime.now() > expiry:
-                    self.delete(key)
-                    return False
-            return True
+            stat = os.fstat(f.fileno())
+            if self.use_mmap and stat.st_size > 0:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return mm[:], stat.st_mtime
+            return f.read(), stat.st_mtime
+
+    def _touch(self, cache_file: Path) -> None:
+        # The modification time doubles as the last access time used by the LRU eviction.
+        with suppress(OSError):
+            os.utime(cache_file)
+
+    def key_digests(self) -> Optional[Iterable[bytes]]:
+        # Entry file names are the hex key digests.
+        return (bytes.fromhex(path.stem) for path in self.cache_path.glob("*/*/*.entry"))
+
+    def _get_tag_dir(self, tag: str) -> Path:
+        return self.cache_path / "tags" / key_digest(tag).hex()
+
+    @staticmethod
+    def _read_tag_digests(tags_file: Path) -> Set[str]:
+        try:
+            return set(tags_file.read_text().split())
+        except FileNotFoundError:
+            return set()
+
+    def _untag(self, cache_file: Path) -> None:
+        # Drops the entry from the index of each of its tags; index files are named by key digest
+        tags_file = cache_file.with_suffix(".tags")
+        for tag_digest in self._read_tag_digests(tags_file):
+            with suppress(FileNotFoundError):
+                (self.cache_path / "tags" / tag_digest / cache_file.stem).unlink()
+        with suppress(FileNotFoundError):
+            tags_file.unlink()
 
     def _get_file_name(self, key: str) -> Path:
-        return self.cache_path / f"{key}.pkl"
+        digest = key_digest(key).hex()
+        return self.cache_path / digest[:2] / digest[2:4] / f"{digest}.entry"
+
+    def _eviction_loop(self, interval: int) -> None:
+        while True:
+            self._evict.wait(interval)
+            self._evict.clear()
+            self._written_bytes = 0
+            try:
+                self.evict()
+            except Exception as e:
+                logger.warning(f"File cache eviction failed: {str(e)}")
+
+    def evict(self) -> None:
+        """Delete the least recently used entries until the cache is back under 90% of its budget."""
+        if not self.max_bytes:
+            return
+        files = []
+        total = 0
+        for path in self.cache_path.glob("*/*/*.entry"):
+            with suppress(FileNotFoundError):
+                stat = path.stat()
+                files.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        for _, size, path in sorted(files):
+            if total <= target:
+                break
+            with suppress(FileNotFoundError):
+                path.unlink()
+                total -= size
+            self._untag(path)
+
+
+class SharedMemoryCache:
+    """
+    Cache tier shared by the processes of one host through a memory-mapped file.
+
+    The file holds a fixed index of slots followed by a circular data log. A key maps to one slot
+    (by its digest; a colliding key replaces the previous one) pointing at the encoded entry in
+    the log, which is overwritten oldest first as it wraps around. Writers serialize on a file
+    lock; readers take no lock: each slot is guarded by a sequence number (odd while a write is in
+    progress) and a CRC of its entry, and an entry the log has since wrapped over is detected from
+    the log head, so a torn or stale read is simply a miss.
+    """
+
+    MAGIC = b"FXSM"
+    _HEADER = struct.Struct("<4sIQ")  # magic, slot count, log size
+    _HEAD_OFFSET = 16  # absolute position of the next log write, on its own 8-byte word
+    _SLOT = struct.Struct("<Q16sQII")  # sequence, key digest, log position, length, crc32
+    _INDEX_OFFSET = 64
+
+    def __init__(self, path: Path, size_bytes: int, slots: int = 65536):
+        import fcntl  # POSIX only; the host tier is not available elsewhere
+        self._flock = fcntl.flock
+        self._lock_flags = (fcntl.LOCK_EX, fcntl.LOCK_UN)
+        self.path = Path(path)
+        self.slots = slots
+        self._data_offset = -(-(self._INDEX_OFFSET + slots * self._SLOT.size) // 64) * 64
+        self.data_size = size_bytes - self._data_offset
+        if self.data_size < 64 * 1024:
+            raise ValueError("The shared memory cache needs room for at least 64 KiB of entries")
+        self.max_entry_bytes = self.data_size // 16
+        self._lock = Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            with self._locked():
+                header = self._HEADER.pack(self.MAGIC, slots, self.data_size)
+                if os.fstat(self._fd).st_size == 0:
+                    os.ftruncate(self._fd, size_bytes)
+                if os.fstat(self._fd).st_size != size_bytes or \
+                        os.pread(self._fd, self._HEADER.size, 0) not in (header, bytes(self._HEADER.size)):
+                    # Never resized in place: processes mapping it would crash on the missing pages
+                    raise ValueError(f"{self.path} holds a shared memory cache of another size; "
+                                     f"configure another path or remove it once no process uses it")
+                os.pwrite(self._fd, header, 0)
+            self._map = mmap.mmap(self._fd, size_bytes)
+            stat = os.fstat(self._fd)
+            # Processes of this host mapping the same file have the same id
+            self.id = f"{socket.gethostname()}:{stat.st_dev}:{stat.st_ino}"
+        except BaseException:
+            os.close(self._fd)
+            raise
+
+    def get(self, key: str, version: Optional[str] = None) -> Optional[CacheEntry]:
+        digest = key_digest(key)
+        offset = self._slot_offset(digest)
+        sequence, slot_digest, position, length, crc = self._SLOT.unpack_from(self._map, offset)
+        if sequence & 1 or slot_digest != digest or not length:
+            return None
+        start = self._data_offset + position % self.data_size
+        data = self._map[start:start + length]
+        if self._SLOT.unpack_from(self._map, offset)[0] != sequence or \
+                self._head() - position > self.data_size or zlib.crc32(data) != crc:
+            return None  # rewritten or wrapped over while we were reading
+        try:
+            header, data_offset = read_header(data)
+        except ValueError:
+            return None
+        if header.is_expired() or not header.matches(version):
+            return None
+        return decode_entry(data, header, data_offset)
+
+    def set(self, key: str, entry: CacheEntry) -> bool:
+        """Store an entry, unless it is larger than a sixteenth of the log. Returns whether it was stored."""
+        data = encode_entry(entry)
+        if len(data) > self.max_entry_bytes:
+            return False
+        digest = key_digest(key)
+        with self._locked():
+            position = self._head()
+            if position % self.data_size + len(data) > self.data_size:
+                position += self.data_size - position % self.data_size  # wrap around to the start
+            # Moving the head first makes readers of the entries about to be overwritten miss
+            struct.pack_into("<Q", self._map, self._HEAD_OFFSET, position + len(data))
+            start = self._data_offset + position % self.data_size
+            self._map[start:start + len(data)] = data
+            self._write_slot(self._slot_offset(digest), digest, position, len(data), zlib.crc32(data))
+        return True
+
+    def pop(self, key: str) -> None:
+        digest = key_digest(key)
+        offset = self._slot_offset(digest)
+        if self._SLOT.unpack_from(self._map, offset)[1] != digest:
+            return
+        with self._locked():
+            if self._SLOT.unpack_from(self._map, offset)[1] == digest:
+                self._write_slot(offset, bytes(16), 0, 0, 0)
+
+    def clear(self) -> None:
+        with self._locked():
+            for offset in range(self._INDEX_OFFSET, self._INDEX_OFFSET + self.slots * self._SLOT.size, self._SLOT.size):
+                if self._SLOT.unpack_from(self._map, offset)[3]:
+                    self._write_slot(offset, bytes(16), 0, 0, 0)
+
+    def close(self) -> None:
+        with self._lock:
+            self._map.close()
+            os.close(self._fd)
+
+    def __len__(self) -> int:
+        return sum(1 for offset in range(self._INDEX_OFFSET, self._INDEX_OFFSET + self.slots * self._SLOT.size,
+                                         self._SLOT.size)
+                   if self._SLOT.unpack_from(self._map, offset)[3])
+
+    def _write_slot(self, offset: int, digest: bytes, position: int, length: int, crc: int) -> None:
+        # Seqlock: odd while the slot is being rewritten, then even again with the new contents
+        sequence = self._SLOT.unpack_from(self._map, offset)[0]
+        struct.pack_into("<Q", self._map, offset, sequence + 1)
+        self._SLOT.pack_into(self._map, offset, sequence + 1, digest, position, length, crc)
+        struct.pack_into("<Q", self._map, offset, sequence + 2)
+
+    def _slot_offset(self, digest: bytes) -> int:
+        return self._INDEX_OFFSET + int.from_bytes(digest[:8], "little") % self.slots * self._SLOT.size
+
+    def _head(self) -> int:
+        return struct.unpack_from("<Q", self._map, self._HEAD_OFFSET)[0]
+
+    @contextmanager
+    def _locked(self):
+        # The thread lock orders threads of this process; the file lock orders processes
+        with self._lock:
+            self._flock(self._fd, self._lock_flags[0])
+            try:
+                yield
+            finally:
+                self._flock(self._fd, self._lock_flags[1])
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Cache backend storing every entry in a single SQLite database in WAL mode.
+
+    Expiry and tags are indexed columns: expired entries are filtered in the lookup query and purged
+    in bulk periodically, and invalidating a tag is a single DELETE (tag rows cascade).
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS cache_entries (
+            key TEXT PRIMARY KEY,
+            value BLOB NOT NULL,
+            version TEXT,
+            created_at REAL NOT NULL,
+            expires_at REAL,
+            flags INTEGER NOT NULL DEFAULT 0,
+            size INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS ix_cache_entries_expires_at ON cache_entries (expires_at)
+            WHERE expires_at IS NOT NULL;
+        CREATE TABLE IF NOT EXISTS cache_tags (
+            tag TEXT NOT NULL,
+            key TEXT NOT NULL REFERENCES cache_entries (key) ON DELETE CASCADE,
+            PRIMARY KEY (tag, key)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS ix_cache_tags_key ON cache_tags (key);
+        CREATE TABLE IF NOT EXISTS cache_leases (
+            key TEXT PRIMARY KEY,
+            token TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        );
+    """
+
+    def __init__(self):
+        settings = Configuration.get().settings
+        cache_config = settings.cache
+        self.path = Path(cache_config.sqlite_path or Path(settings.home) / settings.cache_path / "cache.db")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.purge_interval = cache_config.sqlite_purge_interval
+        self._local = local()
+        self._last_purge = time.time()
+        self.compressor = Compressor.default()
+        connection = self._connection()
+        connection.executescript(self._SCHEMA)
+        columns = {row[1] for row in connection.execute("PRAGMA table_info(cache_entries)")}
+        for column, definition in (("flags", "INTEGER NOT NULL DEFAULT 0"), ("size", "INTEGER")):
+            if column not in columns:  # databases created before the column was added
+                connection.execute(f"ALTER TABLE cache_entries ADD COLUMN {column} {definition}")
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections cannot be shared across threads, so each thread opens its own.
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA foreign_keys=ON")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self.get_entry(key)
+        return entry.value if entry else None
+
+    def get_entry(self, key: str, version: Optional[str] = None) -> Optional[CacheEntry]:
+        row = self._connection().execute(
+            "SELECT value, version, created_at, expires_at, flags, size FROM cache_entries "
+            "WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time()),
+        ).fetchone()
+        return self._to_entry(row, version)
+
+    def get_many(self, keys: list[str], version: Optional[str] = None) -> dict[str, CacheEntry]:
+        # One query per 500 keys keeps below SQLite's bound parameter limit.
+        entries: dict[str, CacheEntry] = {}
+        connection = self._connection()
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            rows = connection.execute(
+                "SELECT value, version, created_at, expires_at, flags, size, key FROM cache_entries "
+                f"WHERE key IN ({','.join('?' * len(batch))}) AND (expires_at IS NULL OR expires_at > ?)",
+                (*batch, time.time()),
+            )
+            for row in rows:
+                entry = self._to_entry(row, version)
+                if entry is not None:
+                    entries[row[6]] = entry
+        return entries
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, version: Optional[str] = None, tags: Optional[Set[str]] = None) -> None:
+        self.set_many({key: value}, ttl, version, tags)
+
+    def set_many(self, items: dict[str, Any], ttl: Optional[int] = None, version: Optional[str] = None, tags: Optional[Set[str]] = None) -> None:
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        rows = []
+        for key, value in items.items():
+            data, flags, size = self._serialize(value)  # outside the transaction, which locks the database
+            rows.append((key, data, version, now, expires_at, flags, size))
+        connection = self._connection()
+        with self._transaction(connection):
+            connection.executemany(
+                "INSERT INTO cache_entries (key, value, version, created_at, expires_at, flags, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, version = excluded.version, "
+                "created_at = excluded.created_at, expires_at = excluded.expires_at, "
+                "flags = excluded.flags, size = excluded.size",
+                rows,
+            )
+            if tags:
+                connection.executemany(
+                    "INSERT OR IGNORE INTO cache_tags (tag, key) VALUES (?, ?)",
+                    [(tag, key) for key in items for tag in tags],
+                )
+        if now - self._last_purge > self.purge_interval:
+            self.purge_expired()
+
+    def delete(self, key: str) -> None:
+        self._connection().execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def delete_many(self, keys: list[str]) -> None:
+        connection = self._connection()
+        with self._transaction(connection):
+            connection.executemany("DELETE FROM cache_entries WHERE key = ?", [(key,) for key in keys])
+
+    def validate(self, key: str, version: Optional[str] = None) -> bool:
+        row = self._connection().execute(
+            "SELECT version FROM cache_entries WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time()),
+        ).fetchone()
+        return row is not None and (not version or row[0] == version)
+
+    def get_keys_by_tag(self, tag: str) -> Set[str]:
+        """Retrieve all keys associated with a given tag."""
+        rows = self._connection().execute("SELECT key FROM cache_tags WHERE tag = ?", (tag,))
+        return {row[0] for row in rows}
+
+    def delete_by_tag(self, tag: str) -> None:
+        """Delete all keys associated with a tag; their tag rows are removed by cascade."""
+        self._connection().execute(
+            "DELETE FROM cache_entries WHERE key IN (SELECT key FROM cache_tags WHERE tag = ?)", (tag,)
+        )
+
+    def key_digests(self) -> Optional[Iterable[bytes]]:
+        return (key_digest(key) for (key,) in self._connection().execute("SELECT key FROM cache_entries"))
+
+    def acquire_lease(self, key: str, ttl: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+        now = time.time()
+        cursor = self._connection().execute(
+            "INSERT INTO cache_leases (key, token, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET token = excluded.token, expires_at = excluded.expires_at "
+            "WHERE cache_leases.expires_at <= ?",
+            (key, token, now + ttl, now),
+        )
+        return token if cursor.rowcount == 1 else None
+
+    def release_lease(self, key: str, token: str) -> None:
+        self._connection().execute("DELETE FROM cache_leases WHERE key = ? AND token = ?", (key, token))
+
+    def purge_expired(self) -> int:
+        """Delete every expired entry using the expiry index."""
+        self._last_purge = time.time()
+        cursor = self._connection().execute(
+            "DELETE FROM cache_entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (self._last_purge,)
+        )
+        return cursor.rowcount
+
+    @staticmethod
+    @contextmanager
+    def _transaction(connection: sqlite3.Connection):
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def _serialize(self, value: Any) -> tuple[bytes, int, int]:
+        # Returns the value (compressed if large enough), its flags and its serialized size
+        payload = dill.dumps(value)
+        flags, data = self.compressor.compress(payload)
+        return data, flags, len(payload)
+
+    @staticmethod
+    def _to_entry(row: Optional[tuple], version: Optional[str]) -> Optional[CacheEntry]:
+        if row is None or (version and row[1] != version):
+            return None
+        value, entry_version, created_at, expires_at, flags, size = row[:6]
+        ttl = expires_at - created_at if expires_at else None
+        return CacheEntry(dill.loads(Compressor.decompress(flags, value)), version=entry_version,
+                          created_at=created_at, ttl=ttl, size=size)
+
+
+_redis_pools: dict[tuple[str, int, int], redis.ConnectionPool] = {}
+_redis_pools_lock = Lock()
+
+
+def _get_redis_pool(host: str, port: int, db: int) -> redis.ConnectionPool:
+    """Get the process-wide connection pool for a Redis server, creating it on first use."""
+    key = (host, port, db)
+    with _redis_pools_lock:
+        if key not in _redis_pools:
+            _redis_pools[key] = redis.ConnectionPool(host=host, port=port, db=db)
+        return _redis_pools[key]
+
+
+def _parse_address(address: str, default_port: int) -> tuple[str, int]:
+    host, _, port = address.rpartition(":")
+    return (host, int(port)) if host else (address, default_port)
+
+
+def _redis_nodes(cache_config) -> list[tuple[str, int]]:
+    nodes = cache_config.redis_nodes or [f"{cache_config.redis_host}:{cache_config.redis_port}"]
+    return [_parse_address(node, 6379) for node in nodes]
+
+
+def hash_tag(key: str) -> str:
+    """
+    The part of a key that decides its shard, following the Redis Cluster convention: the
+    text between the first ``{`` and the next ``}``, if not empty, otherwise the whole key.
+    """
+    start = key.find("{")
+    if start != -1:
+        end = key.find("}", start + 1)
+        if end > start + 1:
+            return key[start + 1:end]
+    return key
+
+
+class HashRing:
+    """
+    Consistent hash ring assigning keys to nodes.
+
+    Each node is placed on the ring at ``replicas`` points, and a key belongs to the first node
+    point following the hash of its hash_tag(). Adding or removing one of n nodes only moves
+    about 1/n of the keys.
+    """
+
+    def __init__(self, nodes: Iterable[str], replicas: int = 160):
+        self.nodes = list(dict.fromkeys(nodes))
+        if not self.nodes:
+            raise ValueError("A hash ring needs at least one node")
+        points = sorted((self._hash(f"{node}#{i}"), node) for node in self.nodes for i in range(replicas))
+        self._hashes = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def node(self, key: str) -> str:
+        if len(self.nodes) == 1:
+            return self.nodes[0]
+        index = bisect.bisect(self._hashes, self._hash(hash_tag(key)))
+        return self._owners[index % len(self._owners)]
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
 
 class RedisCacheBackend(CacheBackend):
+    """
+    Cache backend storing entries in Redis, sharded over ``redis_nodes`` by consistent hashing.
+
+    Each value is stored with the entry header in front, so a lookup is a single GET (or one MGET
+    per node) and version mismatches are detected without unpickling. Expiry relies on native
+    Redis TTLs. Tags are tracked both ways: ``tag-index:{tag}`` is a sorted set of the keys of a
+    tag scored by their expiry, trimmed of expired keys on every write, and ``tags:{key}`` holds
+    the tags of a key. Both live on the node of the key they describe (the latter through its hash
+    tag, so it also follows the key on Redis Cluster), so writing or deleting a key is one pipeline
+    to one node; keys of a tag are gathered from every node.
+    """
+
+    # Deletes the lease only while it still holds our token, so a lease that expired and was
+    # taken by another process is left alone.
+    _RELEASE_LEASE = """
+        if redis.call('GET', KEYS[1]) == ARGV[1] then
+            return redis.call('DEL', KEYS[1])
+        end
+        return 0
+    """
+
+    # Plain sets of tagged keys written by earlier versions, still read and removed on invalidation
+    _LEGACY_TAG_KEY = "tag:{tag}"
+
     def __init__(self):
         cache_config = Configuration.get().settings.cache
-        self.client = redis.Redis(
-            host=cache_config.get("redis_host", "localhost"),
-            port=cache_config.get("redis_port", 6379),
-            db=cache_config.get("redis_db", 0),
-            decode_responses=True  # Ensure string responses for easier handling
-        )
+        self.clients: dict[str, redis.Redis] = {
+            f"{host}:{port}": redis.Redis(connection_pool=_get_redis_pool(host, port, cache_config.redis_db))
+            for host, port in _redis_nodes(cache_config)
+        }
+        self.ring = HashRing(self.clients)
+        self.compressor = Compressor.default()
+        self._async_clients: dict[asyncio.AbstractEventLoop, dict[str, redis.asyncio.Redis]] = {}
+        self._async_clients_lock = Lock()
+
+    @property
+    def client(self) -> redis.Redis:
+        """The client of the first node, for callers that are not sharded."""
+        return self.clients[self.ring.nodes[0]]
+
+    def client_for(self, key: str) -> redis.Redis:
+        return self.clients[self.ring.node(key)]
 
     def get(self, key: str) -> Optional[Any]:
-        if self.validate(key):
-            data = self.client.get(key)
-            if data:
-                return dill.loads(data)["value"]
-        return None
+        entry = self.get_entry(key)
+        return entry.value if entry else None
+
+    def get_entry(self, key: str, version: Optional[str] = None) -> Optional[CacheEntry]:
+        return self._decode(self.client_for(key).get(key), version)
+
+    def get_many(self, keys: list[str], version: Optional[str] = None) -> dict[str, CacheEntry]:
+        entries = {}
+        for node, node_keys in self._by_node(keys).items():
+            for key, data in zip(node_keys, self.clients[node].mget(node_keys)):
+                entry = self._decode(data, version)
+                if entry is not None:
+                    entries[key] = entry
+        return entries
 
     def set(self, key: str, value: Any, ttl: Optional[int] = None, version: Optional[str] = None, tags: Optional[Set[str]] = None) -> None:
-        data = {
-            "value": value,
-            "version": version,
-            "created_at": datetime.now().isoformat(),
-            "ttl": ttl
-        }
-        serialized_data = dill.dumps(data)
-        pipeline = self.client.pipeline()
-        pipeline.set(key, serialized_data, ex=ttl)
-        # Store tags in Redis sets
-        if tags:
-            for tag in tags:
-                pipeline.sadd(f"tag:{tag}", key)
-        pipeline.execute()
+        self.set_many({key: value}, ttl, version, tags)
+
+    def set_many(self, items: dict[str, Any], ttl: Optional[int] = None, version: Optional[str] = None, tags: Optional[Set[str]] = None) -> None:
+        for node, keys in self._by_node(items).items():
+            pipeline = self.clients[node].pipeline(transaction=False)
+            self._queue_set(pipeline, {key: items[key] for key in keys}, ttl, version, tags)
+            pipeline.execute()
 
     def delete(self, key: str) -> None:
-        # Remove key and its associations from tags
-        pipeline = self.client.pipeline()
-        pipeline.delete(key)
-        # Find all tags associated with this key
-        tags = self.client.keys("tag:*")
-        for tag in tags:
-            pipeline.srem(tag, key)
-        pipeline.execute()
+        self._delete_keys([key])
+
+    def delete_many(self, keys: list[str]) -> None:
+        self._delete_keys(list(keys))
 
     def validate(self, key: str, version: Optional[str] = None) -> bool:
-        data = self.client.get(key)
+        # Only the header is transferred; expired keys are already gone thanks to the native TTL.
+        data = self.client_for(key).getrange(key, 0, HEADER_READ_SIZE - 1)
         if not data:
             return False
-        data = dill.loads(data)
-        if version and data.get("version") != version:
-            return False
-        if data.get("ttl"):
-            created_at = datetime.fromisoformat(data["created_at"])
-            expiry = created_at + timedelta(seconds=data["ttl"])
-            if datetime.now() > expiry:
-                self.delete(key)
-                return False
-        return True
+        try:
+            header, _ = read_header(data)
+        except ValueError:
+            return self.get_entry(key, version) is not None
+        return header.matches(version)
 
     def get_keys_by_tag(self, tag: str) -> Set[str]:
-        """Retrieve all keys associated with a given tag."""
-        return self.client.smembers(f"tag:{tag}")
+        """Retrieve all unexpired keys associated with a given tag."""
+        keys = set()
+        now = time.time()
+        for client in self.clients.values():
+            pipeline = client.pipeline(transaction=False)
+            pipeline.zrangebyscore(self._tag_key(tag), now, "+inf")
+            pipeline.smembers(self._LEGACY_TAG_KEY.format(tag=tag))
+            indexed, legacy = pipeline.execute()
+            keys.update(key.decode("utf-8") for key in (*indexed, *legacy))
+        return keys
 
     def delete_by_tag(self, tag: str) -> None:
-        """Delete all keys associated with a tag and remove the tag set."""
-        keys = self.get_keys_by_tag(tag)
-        if keys:
-            pipeline = self.client.pipeline()
-            for key in keys:
-                pipeline.delete(key)
-            pipeline.delete(f"tag:{tag}")
+        """Delete all keys associated with a tag and remove the tag index."""
+        self._delete_keys(list(self.get_keys_by_tag(tag)))
+        for client in self.clients.values():
+            client.unlink(self._tag_key(tag), self._LEGACY_TAG_KEY.format(tag=tag))
+
+    def _delete_keys(self, keys: list[str]) -> None:
+        for node, node_keys in self._by_node(keys).items():
+            client = self.clients[node]
+            pipeline = client.pipeline(transaction=False)
+            for key in node_keys:
+                pipeline.smembers(self._tags_of_key(key))
+            tags_of_keys = pipeline.execute()
+            pipeline = client.pipeline(transaction=False)
+            self._queue_delete(pipeline, node_keys, tags_of_keys)
             pipeline.execute()
 
+    def key_digests(self) -> Optional[Iterable[bytes]]:
+        return (key_digest(key.decode("utf-8", "surrogateescape"))
+                for client in self.clients.values() for key in client.scan_iter(count=1000))
+
+    def acquire_lease(self, key: str, ttl: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+        if self.client_for(key).set(self._lease_key(key), token, nx=True, px=max(1, int(ttl * 1000))):
+            return token
+        return None
+
+    def release_lease(self, key: str, token: str) -> None:
+        self.client_for(key).eval(self._RELEASE_LEASE, 1, self._lease_key(key), token)
+
+    def async_client_for(self, key: str) -> redis.asyncio.Redis:
+        """The redis.asyncio client of a key's node for the running event loop; connections cannot be shared across loops."""
+        loop = asyncio.get_running_loop()
+        clients = self._async_clients.get(loop)
+        if clients is None:
+            with self._async_clients_lock:
+                for closed in [other for other in self._async_clients if other.is_closed()]:
+                    del self._async_clients[closed]
+                clients = self._async_clients[loop] = {
+                    node: redis.asyncio.Redis(**client.connection_pool.connection_kwargs)
+                    for node, client in self.clients.items()
+                }
+        return clients[self.ring.node(key)]
+
+    async def aclose(self) -> None:
+        with self._async_clients_lock:
+            clients = self._async_clients.pop(asyncio.get_running_loop(), {})
+        await self._aclose_clients(clients)
+
+    def close(self) -> None:
+        with self._async_clients_lock:
+            by_loop, self._async_clients = self._async_clients, {}
+        for loop, clients in by_loop.items():
+            if loop.is_closed():
+                continue  # nothing can run on it any more; its sockets close when the clients are collected
+            if loop.is_running():
+                asyncio.run_coroutine_threadsafe(self._aclose_clients(clients), loop)
+            else:
+                loop.run_until_complete(self._aclose_clients(clients))
+
+    @staticmethod
+    async def _aclose_clients(clients: dict[str, redis.asyncio.Redis]) -> None:
+        await asyncio.gather(*(client.aclose() for client in clients.values()), return_exceptions=True)
+
+    async def aget_entry(self, key: str, version: Optional[str] = None) -> Optional[CacheEntry]:
+        return self._decode(await self.async_client_for(key).get(key), version)
+
+    async def aget_many(self, keys: list[str], version: Optional[str] = None) -> dict[str, CacheEntry]:
+        groups = list(self._by_node(keys).values())
+        results = await asyncio.gather(*(self.async_client_for(node_keys[0]).mget(node_keys) for node_keys in groups))
+        entries = {}
+        for node_keys, values in zip(groups, results):
+            for key, data in zip(node_keys, values):
+                entry = self._decode(data, version)
+                if entry is not None:
+                    entries[key] = entry
+        return entries
+
+    async def aset(self, key: str, value: Any, ttl: Optional[int] = None, version: Optional[str] = None, tags: Optional[Set[str]] = None) -> None:
+        await self.aset_many({key: value}, ttl, version, tags)
+
+    async def aset_many(self, items: dict[str, Any], ttl: Optional[int] = None, version: Optional[str] = None, tags: Optional[Set[str]] = None) -> None:
+        pipelines = []
+        for keys in self._by_node(items).values():
+            pipeline = self.async_client_for(keys[0]).pipeline(transaction=False)
+            self._queue_set(pipeline, {key: items[key] for key in keys}, ttl, version, tags)
+            pipelines.append(pipeline.execute())
+        await asyncio.gather(*pipelines)
+
+    async def adelete(self, key: str) -> None:
+        await self.adelete_many([key])
+
+    async def adelete_many(self, keys: list[str]) -> None:
+        async def delete(node_keys: list[str]) -> None:
+            client = self.async_client_for(node_keys[0])
+            pipeline = client.pipeline(transaction=False)
+            for key in node_keys:
+                pipeline.smembers(self._tags_of_key(key))
+            tags_of_keys = await pipeline.execute()
+            pipeline = client.pipeline(transaction=False)
+            self._queue_delete(pipeline, node_keys, tags_of_keys)
+            await pipeline.execute()
+
+        await asyncio.gather(*(delete(node_keys) for node_keys in self._by_node(keys).values()))
+
+    async def avalidate(self, key: str, version: Optional[str] = None) -> bool:
+        data = await self.async_client_for(key).getrange(key, 0, HEADER_READ_SIZE - 1)
+        if not data:
+            return False
+        try:
+            header, _ = read_header(data)
+        except ValueError:
+            return await self.aget_entry(key, version) is not None
+        return header.matches(version)
+
+    async def aacquire_lease(self, key: str, ttl: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+        if await self.async_client_for(key).set(self._lease_key(key), token, nx=True, px=max(1, int(ttl * 1000))):
+            return token
+        return None
+
+    async def arelease_lease(self, key: str, token: str) -> None:
+        await self.async_client_for(key).eval(self._RELEASE_LEASE, 1, self._lease_key(key), token)
+
+    def _by_node(self, keys: Iterable[str]) -> dict[str, list[str]]:
+        groups: dict[str, list[str]] = {}
+        for key in keys:
+            groups.setdefault(self.ring.node(key), []).append(key)
+        return groups
+
+    def _queue_set(self, pipeline, items: dict[str, Any], ttl: Optional[int], version: Optional[str], tags: Optional[Set[str]]) -> None:
+        now = time.time()
+        for key, value in items.items():
+            pipeline.set(key, encode_entry(CacheEntry(value, version=version, ttl=ttl), self.compressor), ex=ttl)
+            if tags:
+                pipeline.sadd(self._tags_of_key(key), *tags)
+                if ttl:
+                    pipeline.expire(self._tags_of_key(key), ttl)
+        if tags:
+            expires_at = now + ttl if ttl else float("inf")
+            for tag in tags:
+                pipeline.zadd(self._tag_key(tag), dict.fromkeys(items, expires_at))
+                pipeline.zremrangebyscore(self._tag_key(tag), "-inf", f"({now}")
+
+    def _queue_delete(self, pipeline, keys: list[str], tags_of_keys: list[set[bytes]]) -> None:
+        # Removes the keys from the tag sets of their node, then the keys and their tag lists
+        for key, tags in zip(keys, tags_of_keys):
+            for tag in tags:
+                pipeline.zrem(self._tag_key(tag.decode("utf-8")), key)
+        pipeline.unlink(*keys, *(self._tags_of_key(key) for key in keys))
+
+    @staticmethod
+    def _decode(data: Optional[bytes], version: Optional[str]) -> Optional[CacheEntry]:
+        if not data:
+            return None
+        try:
+            header, offset = read_header(data)
+        except ValueError:
+            return None  # written in an older format; treated as a miss and overwritten on set
+        if not header.matches(version):
+            return None
+        return decode_entry(data, header, offset)
+
+    @staticmethod
+    def _tag_key(tag: str) -> str:
+        return f"tag-index:{tag}"
+
+    @staticmethod
+    def _tags_of_key(key: str) -> str:
+        return f"tags:{{{hash_tag(key)}}}:{key}"
+
+    @staticmethod
+    def _lease_key(key: str) -> str:
+        return f"lease:{{{hash_tag(key)}}}:{key}"
+
+
+_memcached_clients: dict[tuple[tuple[str, int], ...], Any] = {}
+_memcached_clients_lock = Lock()
+
+
+def _get_memcached_client(servers: tuple[tuple[str, int], ...], max_pool_size: int):
+    """
+    Get the process-wide client for a set of memcached servers, creating it on first use.
+
+    A single server gets a thread-safe pooled client; several servers get a hashing client that
+    spreads keys over them by rendezvous hashing and pools connections to each one.
+    """
+    with _memcached_clients_lock:
+        if servers not in _memcached_clients:
+            if len(servers) == 1:
+                client = PooledClient(servers[0], max_pool_size=max_pool_size)
+            else:
+                client = HashClient(list(servers), use_pooling=True, max_pool_size=max_pool_size)
+            _memcached_clients[servers] = client
+        return _memcached_clients[servers]
+
+
 class MemcachedCacheBackend(CacheBackend):
+    """
+    Cache backend storing entries in one or more memcached servers.
+
+    Values are stored with the entry header in front, so a lookup is a single GET (or multi-get)
+    and version checks do not unpickle the payload. Keys memcached cannot store (longer than 250
+    bytes, or with whitespace or control characters) are replaced by their digest.
+    """
+
+    MAX_KEY_LENGTH = 250
+
     def __init__(self):
         cache_config = Configuration.get().settings.cache
-        self.client = pymemcache.client.Client(
-            (cache_config.get("memcached_host", "localhost"), cache_config.get("memcached_port", 11211))
+        servers = cache_config.memcached_servers or [f"{cache_config.memcached_host}:{cache_config.memcached_port}"]
+        self.client = _get_memcached_client(
+            tuple(self._parse_server(server) for server in servers), cache_config.memcached_pool_size
         )
+        self.compressor = Compressor.default()
 
     def get(self, key: str) -> Optional[Any]:
-        if self.validate(key):
-            data = self.client.get(key)
-            if data:
-                return dill.loads(data)["value"]
-        return None
+        entry = self.get_entry(key)
+        return entry.value if entry else None
 
-    def set(self, key: str, value: Any, ttl: Optional[int] = None, version: Optional[str] = None) -> None:
-        data = {
-            "value": value,
-            "version": version,
-            "created_at": datetime.now().isoformat(),
-            "ttl": ttl
-        }
-        self.client.set(key, dill.dumps(data), expire=ttl or 0)
+    def get_entry(self, key: str, version: Optional[str] = None) -> Optional[CacheEntry]:
+        return self._decode(self.client.get(self._key(key)), version)
+
+    def get_many(self, keys: list[str], version: Optional[str] = None) -> dict[str, CacheEntry]:
+        if not keys:
+            return {}
+        stored_keys = {self._key(key): key for key in keys}
+        entries = {}
+        for stored_key, data in self.client.get_many(list(stored_keys)).items():
+            entry = self._decode(data, version)
+            if entry is not None:
+                entries[stored_keys[stored_key]] = entry
+        return entries
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, version: Optional[str] = None, tags: Optional[Set[str]] = None) -> None:
+        self.set_many({key: value}, ttl, version, tags)
+
+    def set_many(self, items: dict[str, Any], ttl: Optional[int] = None, version: Optional[str] = None, tags: Optional[Set[str]] = None) -> None:
+        failed = self.client.set_many({
+            self._key(key): encode_entry(CacheEntry(value, version=version, ttl=ttl), self.compressor)
+            for key, value in items.items()
+        }, expire=ttl or 0, noreply=False)
+        if failed:
+            logger.warning(f"Failed to store {len(failed)} cache entries in memcached")
 
     def delete(self, key: str) -> None:
-        self.client.delete(key)
+        self.client.delete(self._key(key))
+
+    def delete_many(self, keys: list[str]) -> None:
+        if keys:
+            self.client.delete_many([self._key(key) for key in keys])
 
     def validate(self, key: str, version: Optional[str] = None) -> bool:
-        data = self.client.get(key)
+        data = self.client.get(self._key(key))
         if not data:
             return False
-        data = dill.loads(data)
-        if version and data.get("version") != version:
+        try:
+            header, _ = read_header(data)
+        except ValueError:
             return False
-        if data.get("ttl"):
-            created_at = datetime.fromisoformat(data["created_at"])
-            expiry = created_at + timedelta(seconds=data["ttl"])
-            if datetime.now() > expiry:
-                self.delete(key)
-                return False
+        return not header.is_expired() and header.matches(version)
+
+    def acquire_lease(self, key: str, ttl: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+        lease_key = self._key(f"lease:{key}")
+        expire = max(1, int(ttl + 0.999))
+        # add only stores the key if it does not exist yet
+        if self.client.add(lease_key, token, expire=expire, noreply=False):
+            return token
+        # A released lease is left empty until it expires; whoever swaps it first takes it
+        lease, cas = self.client.gets(lease_key)
+        if lease == b"" and cas is not None and self.client.cas(lease_key, token, cas, expire=expire, noreply=False):
+            return token
+        return None
+
+    def release_lease(self, key: str, token: str) -> None:
+        # Memcached cannot delete conditionally, so the lease is emptied with a cas instead: it
+        # fails if the lease expired and was taken over since we read it
+        lease_key = self._key(f"lease:{key}")
+        lease, cas = self.client.gets(lease_key)
+        if lease is not None and lease.decode("utf-8") == token:
+            self.client.cas(lease_key, b"", cas, expire=1, noreply=False)
+
+    @classmethod
+    def _key(cls, key: str) -> str:
+        # Memcached keys are printable ASCII without spaces, at most 250 bytes
+        if len(key) <= cls.MAX_KEY_LENGTH and all("!" <= c <= "~" for c in key):
+            return key
+        return f"flux:{key_digest(key).hex()}"
+
+    @staticmethod
+    def _parse_server(server: str) -> tuple[str, int]:
+        return _parse_address(server, 11211)
+
+    @staticmethod
+    def _decode(data: Optional[bytes], version: Optional[str]) -> Optional[CacheEntry]:
+        if not data:
+            return None
+        try:
+            header, offset = read_header(data)
+        except ValueError:
+            return None  # written in an older format; treated as a miss and overwritten on set
+        if header.is_expired() or not header.matches(version):
+            return None
+        return decode_entry(data, header, offset)
+
+
+class InvalidationChannel(ABC):
+    """
+    Broadcasts the keys written or deleted by one process, so every other process sharing the
+    cache drops its own copies from its memory tier.
+
+    Published keys are sent in batches by a background thread, so callers never wait on the
+    channel. Messages from the publishing process itself are ignored by its subscriber. Messages
+    carry the id of the host tier the publisher writes through, if any, so subscribers sharing
+    that tier know it is already up to date.
+    """
+
+    MAX_KEYS_PER_MESSAGE = 1000
+
+    def __init__(self):
+        self.origin = uuid.uuid4().hex
+        self.host: Optional[str] = None
+        self._pending: set[str] = set()
+        self._pending_lock = Lock()
+        self._wake = Event()
+        self._closed = Event()
+        self._callback: Optional[weakref.WeakMethod] = None
+        Thread(target=self._publish_loop, name="flux-cache-invalidation-publisher", daemon=True).start()
+
+    def publish(self, keys: Iterable[str]) -> None:
+        with self._pending_lock:
+            self._pending.update(keys)
+        self._wake.set()
+
+    def subscribe(self, callback: Callable[[list[str], Optional[str]], None]) -> None:
+        """
+        Call ``callback`` with the keys invalidated by other processes and the id of the host tier
+        of the process that invalidated them. The callback must be a bound method; it is held
+        weakly, and the subscription ends once its object is collected.
+        """
+        self._callback = weakref.WeakMethod(callback)
+        self._listen()
+
+    def close(self) -> None:
+        self._closed.set()
+        self._wake.set()
+
+    def _publish_loop(self) -> None:
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            if self._closed.is_set():
+                return
+            with self._pending_lock:
+                keys, self._pending = sorted(self._pending), set()
+            for start in range(0, len(keys), self.MAX_KEYS_PER_MESSAGE):
+                message = {"origin": self.origin, "host": self.host,
+                           "keys": keys[start:start + self.MAX_KEYS_PER_MESSAGE]}
+                try:
+                    self._send(json.dumps(message).encode("utf-8"))
+                except Exception as e:
+                    logger.warning(f"Failed to broadcast cache invalidations: {str(e)}")
+
+    def _receive(self, payload: bytes) -> bool:
+        # Returns False once the subscriber is gone, so listeners can stop
+        callback = self._callback() if self._callback else None
+        if callback is None:
+            return False
+        try:
+            message = json.loads(payload)
+            if message["origin"] != self.origin:
+                callback(message["keys"], message.get("host"))
+        except Exception as e:
+            logger.warning(f"Failed to apply cache invalidations: {str(e)}")
         return True
+
+    @abstractmethod
+    def _send(self, payload: bytes) -> None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def _listen(self) -> None:
+        """Start delivering messages published by other processes to _receive."""
+        raise NotImplementedError()
+
+
+class RedisInvalidationChannel(InvalidationChannel):
+    """Invalidation channel over Redis pub/sub."""
+
+    CHANNEL = "flux:cache:invalidations"
+
+    def __init__(self):
+        # Every process must publish and subscribe on the same server: the first of the nodes
+        cache_config = Configuration.get().settings.cache
+        host, port = _redis_nodes(cache_config)[0]
+        self.client = redis.Redis(connection_pool=_get_redis_pool(host, port, cache_config.redis_db))
+        self._listener = None
+        super().__init__()
+
+    def _send(self, payload: bytes) -> None:
+        self.client.publish(self.CHANNEL, payload)
+
+    def _listen(self) -> None:
+        def handle(message):
+            if not self._receive(message["data"]):
+                self.close()
+
+        def handle_error(e, pubsub, thread):
+            logger.warning(f"Cache invalidation subscription failed: {str(e)}")
+            thread.stop()
+
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{self.CHANNEL: handle})
+        self._listener = pubsub.run_in_thread(sleep_time=1, daemon=True, exception_handler=handle_error)
+
+    def close(self) -> None:
+        super().close()
+        if self._listener is not None:
+            self._listener.stop()
+
+
+class SQLiteInvalidationChannel(InvalidationChannel):
+    """
+    Invalidation channel for processes on one host, appending messages to a table in a SQLite
+    database that every subscriber polls. Messages are kept for RETENTION seconds.
+    """
+
+    RETENTION = 60
+
+    def __init__(self, path: Path, poll_interval: float):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.poll_interval = poll_interval
+        self._last_purge = time.time()
+        with closing(self._connect()) as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache_invalidations ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, payload BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+        super().__init__()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    def _send(self, payload: bytes) -> None:
+        # Only the publisher thread sends, so it keeps a connection of its own.
+        connection = getattr(self, "_publisher_connection", None)
+        if connection is None:
+            connection = self._publisher_connection = self._connect()
+        now = time.time()
+        connection.execute("INSERT INTO cache_invalidations (payload, created_at) VALUES (?, ?)", (payload, now))
+        if now - self._last_purge > self.RETENTION:
+            self._last_purge = now
+            connection.execute("DELETE FROM cache_invalidations WHERE created_at < ?", (now - self.RETENTION,))
+
+    def _listen(self) -> None:
+        Thread(target=self._poll_loop, name="flux-cache-invalidation-listener", daemon=True).start()
+
+    def _poll_loop(self) -> None:
+        with closing(self._connect()) as connection:
+            last_id = connection.execute("SELECT coalesce(max(id), 0) FROM cache_invalidations").fetchone()[0]
+            while not self._closed.wait(self.poll_interval):
+                if self._callback is None or self._callback() is None:
+                    self.close()  # the subscriber is gone
+                    return
+                try:
+                    rows = connection.execute(
+                        "SELECT id, payload FROM cache_invalidations WHERE id > ? ORDER BY id", (last_id,)
+                    ).fetchall()
+                except sqlite3.Error as e:
+                    logger.warning(f"Failed to read cache invalidations: {str(e)}")
+                    continue
+                for last_id, payload in rows:
+                    if not self._receive(payload):
+                        self.close()
+                        return
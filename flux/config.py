@@ -17,11 +17,13 @@ class CatalogConfig(BaseConfig):
 class ExecutorConfig(BaseConfig):
     """Configuration for workflow executor."""
     max_workers: int = Field(default=None, description="Maximum number of worker threads")
+    max_tasks_per_child: Optional[int] = Field(default=None, description="Number of tasks a worker process runs before it is replaced (process mode)")
+    max_concurrency: Optional[int] = Field(default=None, description="Maximum number of async tasks awaited concurrently on the event loop")
     default_timeout: int = Field(default=0, description="Default task timeout in seconds")
     retry_attempts: int = Field(default=3, description="Default number of retry attempts")
     retry_delay: int = Field(default=1, description="Default delay between retries in seconds")
     retry_backoff: int = Field(default=2, description="Default backoff multiplier for retries")
-    execution_mode: str = Field(default="local", description="Execution mode: 'local' or 'distributed'")
+    execution_mode: str = Field(default="local", description="Execution mode: 'local', 'process' or 'distributed'")
     distributed_config: dict[str, Any] = Field(default_factory=dict, description="Configuration for distributed execution")
     available_cpu: int = Field(default=4, description="Available CPU cores")
     available_memory: float = Field(default=8, description="Available memory in GB")
@@ -33,13 +35,69 @@ class EncryptionConfig(BaseConfig):
     encryption_key: str | None = Field(default=None, description="Encryption key for sensitive data")
 
 class CacheConfig(BaseConfig):
-    backend: str = Field(default="file", description="Cache backend: 'file', 'redis', or 'memcached'")
+    backend: str = Field(default="file", description="Cache backend: 'file', 'sqlite', 'redis', or 'memcached'")
     default_ttl: Optional[int] = Field(default=None, description="Default cache TTL in seconds")
     redis_host: str = Field(default="localhost", description="Redis host")
     redis_port: int = Field(default=6379, description="Redis port")
     redis_db: int = Field(default=0, description="Redis database")
+    redis_nodes: Optional[list[str]] = Field(default=None, description="Redis servers as 'host:port'; keys are sharded over them by consistent hashing. Overrides redis_host and redis_port")
     memcached_host: str = Field(default="localhost", description="Memcached host")
     memcached_port: int = Field(default=11211, description="Memcached port")
+    memcached_servers: Optional[list[str]] = Field(default=None, description="Memcached servers as 'host:port'; keys are spread over them by consistent hashing. Overrides memcached_host and memcached_port")
+    memcached_pool_size: int = Field(default=16, description="Maximum number of pooled connections to each memcached server")
+    file_max_bytes: Optional[int] = Field(default=None, description="Maximum total size in bytes of the file cache; unbounded if not set")
+    file_eviction_interval: int = Field(default=60, description="Seconds between background evictions of the file cache")
+    file_use_mmap: bool = Field(default=False, description="Read file cache entries through mmap")
+    sqlite_path: Optional[str] = Field(default=None, description="Path of the SQLite cache database; defaults to cache.db in the cache directory")
+    sqlite_purge_interval: int = Field(default=60, description="Seconds between purges of expired entries from the SQLite cache")
+    memory_maxsize: int = Field(default=1000, description="Maximum number of entries in the in-memory cache tier")
+    memory_max_bytes: Optional[int] = Field(default=64 * 1024 * 1024, description="Maximum estimated size in bytes of the in-memory cache tier")
+    memory_max_entry_bytes: Optional[int] = Field(default=1024 * 1024, description="Values larger than this many bytes skip the in-memory cache tier")
+    host_cache: bool = Field(default=False, description="Share a cache tier between the processes of a host through a memory-mapped file, consulted between the in-memory tier and the persistent backend")
+    host_cache_path: Optional[str] = Field(default=None, description="File backing the host cache tier; defaults to a file in /dev/shm (or the cache directory) named after the Flux home")
+    host_cache_bytes: int = Field(default=256 * 1024 * 1024, description="Size in bytes of the host cache tier")
+    host_cache_slots: int = Field(default=65536, description="Number of keys the host cache tier can index")
+    compression: str = Field(default="zlib", description="Codec compressing large cached values: 'zstd', 'lz4', 'zlib' or 'none'")
+    compress_min_bytes: Optional[int] = Field(default=64 * 1024, description="Serialized values of at least this many bytes are compressed; never if not set")
+    single_flight: bool = Field(default=True, description="Compute a missing cached task once while identical concurrent calls wait for its result")
+    lease_timeout: float = Field(default=60, description="Seconds a process holds the lease on computing a missing cache key before others may take over")
+    lease_poll_interval: float = Field(default=0.05, description="Seconds between checks while waiting on a key leased by another process")
+    bloom_filter: bool = Field(default=False, description="Answer definite misses from an in-memory Bloom filter of the keys in the persistent backend")
+    bloom_capacity: int = Field(default=1_000_000, description="Number of keys the Bloom filter is sized for")
+    bloom_error_rate: float = Field(default=0.01, description="False positive rate of the Bloom filter at capacity")
+    bloom_share_interval: Optional[float] = Field(default=None, description="Seconds between merges of the Bloom filter with the copy shared through the backend; not shared if not set")
+    invalidation_channel: str = Field(default="auto", description="Channel broadcasting writes and deletes to the memory tiers of other processes: 'auto', 'redis', 'sqlite' or 'none'")
+    invalidation_poll_interval: float = Field(default=0.05, description="Seconds between polls of the 'sqlite' invalidation channel")
+    warm_up_batch_size: int = Field(default=200, description="Number of keys fetched per backend request when warming up the in-memory cache tier")
+    warm_up_concurrency: int = Field(default=8, description="Number of warm-up batches fetched concurrently")
+    hot_keys: Optional[int] = Field(default=1000, description="Number of most accessed keys recorded in the backend and preloaded on warm-up; not recorded if not set")
+    hot_keys_interval: float = Field(default=60, description="Seconds between saves of the most accessed keys to the backend")
+
+    @field_validator("invalidation_channel")
+    def validate_invalidation_channel(cls, v: str) -> str:
+        if v not in ["auto", "redis", "sqlite", "none"]:
+            raise ValueError("Invalidation channel must be 'auto', 'redis', 'sqlite' or 'none'")
+        return v
+
+    @field_validator("compression")
+    def validate_compression(cls, v: str) -> str:
+        if v not in ["zstd", "lz4", "zlib", "none"]:
+            raise ValueError("Compression must be 'zstd', 'lz4', 'zlib' or 'none'")
+        return v
+
+class PersistenceConfig(BaseConfig):
+    """Configuration for execution context persistence."""
+    durability: str = Field(default="every_task", description="When contexts are saved: 'every_task', 'every_n_events', 'interval_ms' or 'on_pause_or_completion'")
+    flush_events: int = Field(default=100, description="Number of new events that triggers a save with 'every_n_events'")
+    flush_interval_ms: int = Field(default=1000, description="Milliseconds between saves with 'interval_ms'")
+
+    @field_validator("durability")
+    def validate_durability(cls, v: str) -> str:
+        if v not in ["every_task", "every_n_events", "interval_ms", "on_pause_or_completion"]:
+            raise ValueError(
+                "Durability must be 'every_task', 'every_n_events', 'interval_ms' or 'on_pause_or_completion'"
+            )
+        return v
 
 class FluxConfig(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="FLUX_", env_nested_delimiter="__", case_sensitive=False)
@@ -57,6 +115,8 @@ class FluxConfig(BaseSettings):
     executor: ExecutorConfig = Field(default_factory=ExecutorConfig)
     security: EncryptionConfig = Field(default_factory=EncryptionConfig)
     catalog: CatalogConfig = Field(default_factory=CatalogConfig)
+    persistence: PersistenceConfig = Field(default_factory=PersistenceConfig)
+    cache: CacheConfig = Field(default_factory=CacheConfig)
     storage: dict[str, Any] = Field(default_factory=dict, description="Storage backend configuration")
     plugins: dict[str, Any] = Field(default_factory=dict, description="Plugin configuration")
     monitoring: dict[str, Any] = Field(default_factory=dict, description="Monitoring configuration")
@@ -70,8 +130,8 @@ class FluxConfig(BaseSettings):
 
     @field_validator("executor")
     def validate_executor(cls, v: ExecutorConfig) -> ExecutorConfig:
-        if v.execution_mode not in ["local", "distributed"]:
-            raise ValueError("Execution mode must be 'local' or 'distributed'")
+        if v.execution_mode not in ["local", "process", "distributed"]:
+            raise ValueError("Execution mode must be 'local', 'process' or 'distributed'")
         return v
 
     @classmethod
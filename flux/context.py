@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import json
+import time
 from contextvars import ContextVar
 from contextvars import Token
 from typing import Any
@@ -12,6 +13,7 @@ from flux import ContextManager, Configuration
 from flux.cache import CacheManager
 from flux.errors import ExecutionError
 from flux.events import ExecutionEvent
+from flux.events import ExecutionEventList
 from flux.events import ExecutionEventType
 from flux.utils import FluxEncoder
 
@@ -20,11 +22,21 @@ CURRENT_CONTEXT: ContextVar = ContextVar("current_context", default=None)
 
 
 class WorkflowExecutionContext(Generic[WorkflowInputType]):
-    def __init__(self, name: str, input: WorkflowInputType | None = None, execution_id: str | None = None):
+    def __init__(
+        self,
+        name: str,
+        input: WorkflowInputType | None = None,
+        execution_id: str | None = None,
+        events: list[ExecutionEvent] | None = None,
+    ):
         self._name = name
         self._input = input
         self._execution_id = execution_id or uuid4().hex
-        self._events: list[ExecutionEvent] = []
+        self._events = ExecutionEventList(events or [])
+        self._fingerprints: dict[int, tuple[Any, bytes]] = {}
+        self._durability: str | None = None
+        self._flushed_events = len(self._events)
+        self._last_flush = time.monotonic()
         self._progress: float = 0.0  # Track progress (0.0 to 1.0)
 
     def update_progress(self, progress: float):
@@ -52,7 +64,7 @@ class WorkflowExecutionContext(Generic[WorkflowInputType]):
     @staticmethod
     async def resume(execution_id: str) -> WorkflowExecutionContext:
         cache_manager = CacheManager.default()
-        ctx = cache_manager.get(f"checkpoint_{execution_id}")
+        ctx = await cache_manager.aget(f"checkpoint_{execution_id}")
         if ctx:
             return ctx
         return ContextManager.default().get(execution_id)
@@ -90,6 +102,73 @@ class WorkflowExecutionContext(Generic[WorkflowInputType]):
     def events(self) -> list[ExecutionEvent]:
         return self._events
 
+    def terminal_event(self, source_id: str) -> ExecutionEvent | None:
+        """
+        Find the first completed or failed task event of a given source.
+
+        Args:
+            source_id (str): The id of the task that emitted the event.
+
+        Returns:
+            ExecutionEvent | None: The terminal event, or None if the task has not finished yet.
+        """
+        return self._events.terminal(source_id)
+
+    def latest_event(self, source_id: str) -> ExecutionEvent | None:
+        """
+        Find the most recent event of a given source.
+
+        Args:
+            source_id (str): The id of the task or workflow that emitted the event.
+
+        Returns:
+            ExecutionEvent | None: The latest event, or None if the source has no events.
+        """
+        return self._events.latest(source_id)
+
+    @property
+    def durability(self) -> str | None:
+        """The durability level of this execution; None means the configured default."""
+        return self._durability
+
+    @durability.setter
+    def durability(self, value: str | None):
+        self._durability = value
+
+    @property
+    def pending_events(self) -> int:
+        """Number of events appended since the context was last saved."""
+        return len(self._events) - self._flushed_events
+
+    @property
+    def last_flush(self) -> float:
+        """Monotonic time of the last save."""
+        return self._last_flush
+
+    def mark_flushed(self, events: int | None = None):
+        """Record that the first ``events`` events of this context (all by default) have been saved."""
+        self._flushed_events = len(self._events) if events is None else events
+        self._last_flush = time.monotonic()
+
+    @property
+    def fingerprints(self) -> dict[int, tuple[Any, bytes]]:
+        """Argument fingerprints memoized for the lifetime of this execution (never persisted)."""
+        return self._fingerprints
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        state.pop("_fingerprints", None)
+        return state
+
+    def __setstate__(self, state: dict[str, Any]):
+        self.__dict__.update(state)
+        self._fingerprints = {}
+        self._last_flush = time.monotonic()
+        self.__dict__.setdefault("_durability", None)
+        self.__dict__.setdefault("_flushed_events", len(self._events))
+        if not isinstance(self._events, ExecutionEventList):
+            self._events = ExecutionEventList(self._events)
+
     @property
     def finished(self) -> bool:
         return len(self.events) > 0 and self.events[-1].type in (
@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+import asyncio
+import time
 from abc import ABC
 from abc import abstractmethod
+from enum import Enum
+from threading import Lock
 
 from sqlalchemy.exc import IntegrityError
 
@@ -15,7 +19,17 @@ from flux.models import WorkflowExecutionContextModel
 from flux.monitoring import Monitoring
 
 
+class Durability(str, Enum):
+    EVERY_TASK = "every_task"
+    EVERY_N_EVENTS = "every_n_events"
+    INTERVAL_MS = "interval_ms"
+    ON_PAUSE_OR_COMPLETION = "on_pause_or_completion"
+
+
 class ContextManager(ABC):
+    _instance: SQLiteContextManager | None = None
+    _lock: Lock = Lock()
+
     @abstractmethod
     def save(self, ctx: WorkflowExecutionContext):  # pragma: no cover
         raise NotImplementedError()
@@ -24,23 +38,101 @@ class ContextManager(ABC):
     def get(self, execution_id: str | None) -> WorkflowExecutionContext:  # pragma: no cover
         raise NotImplementedError()
 
+    async def asave(self, ctx: WorkflowExecutionContext):
+        """Save the context without blocking the event loop; by default save() runs in a worker thread."""
+        await asyncio.to_thread(self.save, ctx)
+
+    def checkpoint(self, ctx: WorkflowExecutionContext) -> bool:
+        """
+        Save the context if its durability level requires it.
+
+        Events appended since the last save stay buffered in memory and are written in a single
+        transaction by the next save. Workflows always save when they pause or finish.
+
+        Args:
+            ctx (WorkflowExecutionContext): The execution context.
+
+        Returns:
+            bool: True if the context was saved.
+        """
+        flush = ContextManager.needs_checkpoint(ctx)
+        if flush:
+            self.save(ctx)
+        return flush
+
+    @staticmethod
+    def needs_checkpoint(ctx: WorkflowExecutionContext) -> bool:
+        """
+        Check whether the durability level of a context requires saving it now.
+
+        The decision only depends on the context and the configuration, so callers can make it
+        without getting a context manager, e.g. to skip the database entirely when saves are
+        deferred until the workflow pauses or finishes.
+
+        Args:
+            ctx (WorkflowExecutionContext): The execution context.
+
+        Returns:
+            bool: True if the context should be saved.
+        """
+        if ctx.pending_events == 0:
+            return False
+        settings = Configuration.get().settings.persistence
+        durability = Durability(ctx.durability or settings.durability)
+        if durability == Durability.EVERY_N_EVENTS:
+            return ctx.pending_events >= settings.flush_events
+        if durability == Durability.INTERVAL_MS:
+            return (time.monotonic() - ctx.last_flush) * 1000 >= settings.flush_interval_ms
+        return durability == Durability.EVERY_TASK
+
     @staticmethod
     def default() -> ContextManager:
-        return SQLiteContextManager()
+        """
+        Get the process-wide context manager, creating it on first use.
+
+        Creating one connects to the database and creates its tables, so every save and checkpoint
+        shares a single instance. A new one is created when the configured database changes.
+        """
+        database_url = Configuration.get().settings.database_url
+        manager = ContextManager._instance
+        if manager is None or manager.database_url != database_url:
+            with ContextManager._lock:
+                manager = ContextManager._instance
+                if manager is None or manager.database_url != database_url:
+                    if manager is not None:
+                        manager.close()
+                    manager = ContextManager._instance = SQLiteContextManager()
+        return manager
+
+    @staticmethod
+    def reset() -> None:
+        """Discard the process-wide context manager, e.g. after changing the configuration in tests."""
+        with ContextManager._lock:
+            manager, ContextManager._instance = ContextManager._instance, None
+        if manager:
+            manager.close()
 
 
 class SQLiteContextManager(ContextManager, SQLiteRepository):
+    def __init__(self):
+        super().__init__()
+        # Saves run in worker threads; concurrent saves of a context would insert the same events
+        self._save_lock = Lock()
+
     def save(self, ctx: WorkflowExecutionContext):
-        with self.session() as session:
+        with self._save_lock, self.session() as session:
+            # Tasks on the event loop may append events while the context is saved from a thread
+            saved_events = len(ctx.events)
             try:
                 context = session.get(WorkflowExecutionContextModel, ctx.execution_id)
                 if context:
                     context.output = ctx.output
-                    additional_events = self._get_additional_events(ctx, context)
+                    additional_events = self._get_additional_events(ctx, session)
                     session.bulk_save_objects(additional_events)  # Bulk insert events
                 else:
                     session.add(WorkflowExecutionContextModel.from_plain(ctx))
                 session.commit()
+                ctx.mark_flushed(saved_events)
                 cache_manager = CacheManager.default()
                 cache_manager.set(f"context_{ctx.execution_id}", ctx,
                                   ttl=Configuration.get().settings.cache.default_ttl, tags={f"workflow:{ctx.name}"})
@@ -61,8 +153,12 @@ class SQLiteContextManager(ContextManager, SQLiteRepository):
                 return context.to_plain()
             raise ExecutionContextNotFoundError(execution_id)
 
-    def _get_additional_events(self, ctx, context):
-        existing_events = [(e.event_id, e.type) for e in context.events]
+    def _get_additional_events(self, ctx, session):
+        existing_events = set(
+            session.query(ExecutionEventModel.event_id, ExecutionEventModel.type).filter(
+                ExecutionEventModel.execution_id == ctx.execution_id,
+            ),
+        )
         return [
             ExecutionEventModel.from_plain(ctx.execution_id, e)
             for e in ctx.events
@@ -2,19 +2,22 @@ from __future__ import annotations
 import asyncio
 import inspect
 import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import replace
 from functools import wraps
-from typing import Any, Callable, TypeVar, Optional, Dict
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, TypeVar, Optional, Dict
 from datetime import datetime
-from flux.cache import CacheManager
+from flux.cache import CACHED_NONE, CacheFlight, CacheManager
 from flux.context import WorkflowExecutionContext
-from flux.context_managers import ContextManager
+from flux.context_managers import ContextManager, Durability
 from flux.errors import ExecutionError, ExecutionTimeoutError, PauseRequested, RetryError
 from flux.events import ExecutionEvent, ExecutionEventType
 from flux.output_storage import OutputStorage
 from flux.secret_managers import SecretManager
-from flux.utils import make_hashable, maybe_awaitable
-from flux.executors import get_executor
-from flux.scheduler import Scheduler, TaskInfo
+from flux.utils import code_fingerprint, fingerprint, maybe_awaitable
+from flux.runtime import ExecutionRuntime
+from flux.scheduler import TaskInfo
 from flux.config import Configuration
 
 F = TypeVar("F", bound=Callable[..., Any])
@@ -37,27 +40,78 @@ def get_func_args(func: Callable, args: tuple) -> dict:
     return dict(zip(arg_names, arg_values))
 
 
+class CacheWriteBatch:
+    """Collects the cache writes of concurrently running tasks so they reach the backend together."""
+
+    def __init__(self):
+        self.writes: dict[tuple[Optional[int], Optional[str]], dict[str, Any]] = {}
+        self.callbacks: list[Callable[[], Awaitable[None]]] = []
+
+    def add(self, key: str, value: Any, ttl: Optional[int] = None, version: Optional[str] = None):
+        self.writes.setdefault((ttl, version), {})[key] = value
+
+    def after_flush(self, callback: Callable[[], Awaitable[None]]):
+        self.callbacks.append(callback)
+
+    async def flush(self):
+        writes, self.writes = self.writes, {}
+        callbacks, self.callbacks = self.callbacks, []
+        cache_manager = CacheManager.default()
+        try:
+            for (ttl, version), items in writes.items():
+                await cache_manager.aset_many(items, ttl=ttl, version=version)
+        finally:
+            for callback in callbacks:
+                await callback()
+
+
+_cache_write_batch: ContextVar[Optional[CacheWriteBatch]] = ContextVar("flux_cache_write_batch", default=None)
+
+
+@asynccontextmanager
+async def cache_write_batch() -> AsyncIterator[CacheWriteBatch]:
+    """
+    Defer the cache writes of tasks called within the block and write them with one set_many per
+    TTL and version when it exits. Nested blocks join the outermost batch.
+    """
+    batch = _cache_write_batch.get()
+    if batch is not None:
+        yield batch
+        return
+    batch = CacheWriteBatch()
+    token = _cache_write_batch.set(batch)
+    try:
+        yield batch
+    finally:
+        _cache_write_batch.reset(token)
+        await batch.flush()
+
+
 class workflow:
     @staticmethod
     def with_options(name: str | None = None, secret_requests: list[str] = [],
-                     output_storage: OutputStorage | None = None) -> Callable[[F], workflow]:
+                     output_storage: OutputStorage | None = None,
+                     durability: str | None = None) -> Callable[[F], workflow]:
         def wrapper(func: F) -> workflow:
-            return workflow(func=func, name=name, secret_requests=secret_requests, output_storage=output_storage)
+            return workflow(func=func, name=name, secret_requests=secret_requests, output_storage=output_storage,
+                            durability=durability)
 
         return wrapper
 
     def __init__(self, func: F, name: str | None = None, secret_requests: list[str] = [],
-                 output_storage: OutputStorage | None = None):
+                 output_storage: OutputStorage | None = None, durability: str | None = None):
         self._func = func
         self.name = name if name else func.__name__
         self.secret_requests = secret_requests
         self.output_storage = output_storage
+        self.durability = Durability(durability).value if durability else None
         wraps(func)(self)
 
     async def __call__(self, ctx: WorkflowExecutionContext, *args) -> Any:
         if ctx.finished:
             return ctx
         self.id = f"{ctx.name}_{ctx.execution_id}"
+        ctx.durability = self.durability
         if ctx.paused:
             ctx.events.append(ExecutionEvent(type=ExecutionEventType.WORKFLOW_RESUMED, source_id=self.id, name=ctx.name,
                                              value=ctx.input))
@@ -79,13 +133,21 @@ class workflow:
         except Exception as ex:
             ctx.events.append(
                 ExecutionEvent(type=ExecutionEventType.WORKFLOW_FAILED, source_id=self.id, name=ctx.name, value=ex))
-        ContextManager.default().save(ctx)
+        await ContextManager.default().asave(ctx)
         return ctx
 
     def run(self, *args, **kwargs) -> WorkflowExecutionContext:
         ctx = ContextManager.default().get(
             kwargs["execution_id"]) if "execution_id" in kwargs else WorkflowExecutionContext(self.name, *args)
-        return asyncio.run(self(ctx))
+        return asyncio.run(self._run(ctx))
+
+    async def _run(self, ctx: WorkflowExecutionContext) -> WorkflowExecutionContext:
+        try:
+            return await self(ctx)
+        finally:
+            # The event loop closes with the run, so close the cache connections opened on it
+            if CacheManager._instance is not None:
+                await CacheManager._instance.aclose()
 
 
 class TaskMetadata:
@@ -100,7 +162,7 @@ class TaskMetadata:
 class task:
     @staticmethod
     def with_options(
-            cache: bool = False,
+            cache: bool | str = False,
             cache_ttl: Optional[int] = None,
             cache_version: Optional[str] = None,
             name: Optional[str] = None,
@@ -114,7 +176,8 @@ class task:
             event_trigger: Optional[Dict[str, str]] = None,
             metadata: bool = False,
             fallback: Optional[Callable] = None,
-            rollback: Optional[Callable] = None
+            rollback: Optional[Callable] = None,
+            executor: Optional[str] = None
     ) -> Callable[[F], task]:
         def wrapper(func: F) -> task:
             return task(
@@ -133,7 +196,8 @@ class task:
                 event_trigger=event_trigger,
                 metadata=metadata,
                 fallback=fallback,
-                rollback=rollback
+                rollback=rollback,
+                executor=executor
             )
 
         return wrapper
@@ -141,7 +205,7 @@ class task:
     def __init__(
             self,
             func: F,
-            cache: bool = False,
+            cache: bool | str = False,
             cache_ttl: Optional[int] = None,
             cache_version: Optional[str] = None,
             name: Optional[str] = None,
@@ -155,7 +219,8 @@ class task:
             event_trigger: Optional[Dict[str, str]] = None,
             metadata: bool = False,
             fallback: Optional[Callable] = None,
-            rollback: Optional[Callable] = None
+            rollback: Optional[Callable] = None,
+            executor: Optional[str] = None
     ):
         self._func = func
         self.name = name if name else func.__name__
@@ -168,33 +233,122 @@ class task:
         self.schedule = schedule
         self.event_trigger = event_trigger
         self.metadata = metadata
+        if cache not in (True, False, "auto"):
+            raise ValueError("cache must be True, False or 'auto'")
         self.cache = cache
         self.cache_ttl = cache_ttl
         self.cache_version = cache_version
+        self._code_version: Optional[str] = None
         self.fallback = fallback
         self.rollback = rollback
+        self.executor = executor
         wraps(func)(self)
 
-    async def __call__(self, *args, **kwargs) -> Any:
+    async def map(self, iterable: Iterable[Any], *, concurrency: Optional[int] = None,
+                  chunk_size: int = 1) -> list[Any]:
+        """
+        Call the task once per item, fanning out with bounded concurrency.
+
+        Identical items are executed once and share their output; on resume, items whose task
+        already completed are replayed from the execution events instead of running again.
+
+        Args:
+            iterable (Iterable[Any]): The items; each one is passed as the task's single argument.
+            concurrency (Optional[int]): Maximum number of items running at once. Defaults to the
+                executor's max_concurrency, or unbounded if not set.
+            chunk_size (int): Number of consecutive items a worker takes at a time.
+
+        Returns:
+            list[Any]: The outputs, in the same order as the items.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        items = list(iterable)
+        ctx = await WorkflowExecutionContext.get()
+        keys = [fingerprint(item, memo=ctx.fingerprints) for item in items]
+        unique: dict[str, int] = {}
+        for index, key in enumerate(keys):
+            unique.setdefault(key, index)
+        pending = list(unique.items())
+        if self.cache:
+            # Fetch the outputs cached for every item in one round trip; hits land in the memory tier.
+            task_ids = [self._task_id(ctx, (items[index],), {})[2] for _, index in pending]
+            await CacheManager.default().aget_many(task_ids, version=self._cache_key_version())
+        chunks = iter(range(0, len(pending), chunk_size))
+        outputs: dict[str, Any] = {}
+
+        async def worker():
+            for start in chunks:
+                for key, index in pending[start:start + chunk_size]:
+                    outputs[key] = await self(items[index])
+
+        concurrency = concurrency or Configuration.get().settings.executor.max_concurrency or len(pending)
+        async with cache_write_batch():
+            # Workers copy the current context, so they are created inside the batch to join it
+            workers = [asyncio.ensure_future(worker())
+                       for _ in range(min(concurrency, -(-len(pending) // chunk_size)))]
+            try:
+                await asyncio.gather(*workers)
+            except BaseException:
+                for w in workers:
+                    w.cancel()
+                raise
+        return [outputs[key] for key in keys]
+
+    def _cache_key_version(self) -> Optional[str]:
+        """
+        The version outputs are cached under. With cache="auto" it includes a digest of the task's
+        code, so cached outputs are invalidated exactly when the code changes.
+        """
+        if self.cache != "auto":
+            return self.cache_version
+        if self._code_version is None:
+            self._code_version = code_fingerprint(self._func)
+        return f"{self.cache_version}:{self._code_version}" if self.cache_version else self._code_version
+
+    @staticmethod
+    async def _land(flight: CacheFlight, value: Any):
+        # Waiters in this process get the value right away (None if the task failed); other
+        # processes wait on the lease until it is actually written, which a write batch defers
+        # until it flushes.
+        flight.complete(value)
+        batch = _cache_write_batch.get()
+        if batch is not None and value is not None:
+            batch.after_flush(flight.arelease)
+        else:
+            await flight.arelease()
+
+    def _task_id(self, ctx: WorkflowExecutionContext, args: tuple, kwargs: dict) -> tuple[dict, str, str]:
         task_args = get_func_args(self._func, args)
         full_name = self.name.format(**task_args)
-        task_id = f"{full_name}_{abs(hash((full_name, make_hashable(task_args), make_hashable(kwargs))))}"
+        return task_args, full_name, f"{full_name}_{fingerprint(full_name, *args, kwargs, memo=ctx.fingerprints)}"
+
+    async def __call__(self, *args, **kwargs) -> Any:
         ctx = await WorkflowExecutionContext.get()
-        finished = [e for e in ctx.events if e.source_id == task_id and e.type in (ExecutionEventType.TASK_COMPLETED,
-                                                                                   ExecutionEventType.TASK_FAILED)]
-        if len(finished) > 0:
-            return finished[0].value
+        task_args, full_name, task_id = self._task_id(ctx, args, kwargs)
+        finished = ctx.terminal_event(task_id)
+        if finished:
+            return finished.value
         if not ctx.resumed:
             ctx.events.append(ExecutionEvent(type=ExecutionEventType.TASK_STARTED, source_id=task_id, name=full_name,
                                              value=task_args))
 
+        flight = None
+        cached = None  # the value cached for this call, if any
         try:
             output = None
             if self.cache:
+                cache_version = self._cache_key_version()
                 cache_manager = CacheManager.default()
-                output = cache_manager.get(task_id, version=self.cache_version)
-            if not output:
-                scheduler = Scheduler()
+                cached = await cache_manager.aget(task_id, version=cache_version)
+                if cached is None and not self.schedule and not self.event_trigger and \
+                        Configuration.get().settings.cache.single_flight:
+                    cached, flight = await cache_manager.claim(task_id, version=cache_version)
+                if cached is not CACHED_NONE:
+                    output = cached
+            if cached is None:
+                runtime = ExecutionRuntime.default()
+                scheduler = runtime.scheduler
                 task_info = TaskInfo(
                     task_id=task_id,
                     task=self._func,
@@ -210,85 +364,85 @@ class task:
                     scheduler.register_kubernetes_trigger(task_info, self.event_trigger) if self.event_trigger[
                                                                                                 "type"] == "kubernetes" else scheduler.register_airflow_trigger(
                         task_info, self.event_trigger)
-                else:
+                elif self.schedule or self.event_trigger:
                     await scheduler.schedule_task(task_info)
                 if not self.schedule and not (
                         self.event_trigger and self.event_trigger.get("type") in ["http", "kubernetes", "airflow"]):
-                    task_info = await scheduler.get_next_task()
-                    if not task_info:
-                        raise ExecutionError("No task available for execution")
-                    executor = get_executor()
-                    try:
-                        if self.secret_requests:
-                            secrets = SecretManager.current().get(self.secret_requests)
-                            kwargs = {**kwargs, "secrets": secrets}
-                        if self.metadata:
-                            kwargs = {**kwargs, "metadata": TaskMetadata(task_id, full_name)}
-
-                        # Retry logic
-                        config = Configuration.get().settings.executor
-                        retry_attempts = config.retry_attempts
-                        retry_delay = config.retry_delay
-                        retry_backoff = config.retry_backoff
-
-                        for attempt in range(retry_attempts):
-                            try:
-                                if self.timeout > 0:
-                                    output = await asyncio.wait_for(
-                                        executor.execute(self._func, *args, **kwargs),
-                                        timeout=self.timeout
+                    # Admitted by the executor, which honours the priority, deadline and resources
+                    executor = runtime.executor(self.executor)
+                    if self.secret_requests:
+                        secrets = SecretManager.current().get(self.secret_requests)
+                        kwargs = {**kwargs, "secrets": secrets}
+                    if self.metadata:
+                        kwargs = {**kwargs, "metadata": TaskMetadata(task_id, full_name)}
+
+                    # Retry logic
+                    config = Configuration.get().settings.executor
+                    retry_attempts = config.retry_attempts
+                    retry_delay = config.retry_delay
+                    retry_backoff = config.retry_backoff
+
+                    for attempt in range(retry_attempts):
+                        try:
+                            if self.timeout > 0:
+                                output = await asyncio.wait_for(
+                                    executor.submit(replace(task_info, kwargs=kwargs)),
+                                    timeout=self.timeout
+                                )
+                            else:
+                                output = await executor.submit(replace(task_info, kwargs=kwargs))
+                            break  # Success, exit the loop
+                        except Exception as ex:
+                            if attempt < retry_attempts - 1:
+                                wait_time = retry_delay * (retry_backoff ** attempt)
+                                ctx.events.append(
+                                    ExecutionEvent(
+                                        type=ExecutionEventType.TASK_RETRY_STARTED,
+                                        source_id=task_id,
+                                        name=full_name,
+                                        value={"attempt": attempt + 1, "wait_time": wait_time}
                                     )
-                                else:
-                                    output = await executor.execute(self._func, *args, **kwargs)
-                                break  # Success, exit the loop
-                            except Exception as ex:
-                                if attempt < retry_attempts - 1:
-                                    wait_time = retry_delay * (retry_backoff ** attempt)
+                                )
+                                await asyncio.sleep(wait_time)
+                            else:
+                                # All retries failed, attempt rollback and fallback
+                                if self.rollback:
+                                    await maybe_awaitable(self.rollback)(*args, **kwargs)
+                                if self.fallback:
+                                    output = await maybe_awaitable(self.fallback)(*args, **kwargs)
                                     ctx.events.append(
                                         ExecutionEvent(
-                                            type=ExecutionEventType.TASK_RETRY_STARTED,
+                                            type=ExecutionEventType.TASK_FALLBACK_COMPLETED,
                                             source_id=task_id,
                                             name=full_name,
-                                            value={"attempt": attempt + 1, "wait_time": wait_time}
+                                            value=output
                                         )
                                     )
-                                    await asyncio.sleep(wait_time)
-                                else:
-                                    # All retries failed, attempt rollback and fallback
-                                    if self.rollback:
-                                        await maybe_awaitable(self.rollback)(*args, **kwargs)
-                                    if self.fallback:
-                                        output = await maybe_awaitable(self.fallback)(*args, **kwargs)
-                                        ctx.events.append(
-                                            ExecutionEvent(
-                                                type=ExecutionEventType.TASK_FALLBACK_COMPLETED,
-                                                source_id=task_id,
-                                                name=full_name,
-                                                value=output
-                                            )
-                                        )
-                                        break
-                                    # Log detailed error
-                                    error_details = {
-                                        "exception": str(ex),
-                                        "task_args": task_args,
-                                        "kwargs": kwargs
-                                    }
-                                    ctx.events.append(
-                                        ExecutionEvent(
-                                            type=ExecutionEventType.TASK_FAILED,
-                                            source_id=task_id,
-                                            name=full_name,
-                                            value=error_details
-                                        )
+                                    break
+                                # Log detailed error
+                                error_details = {
+                                    "exception": str(ex),
+                                    "task_args": task_args,
+                                    "kwargs": kwargs
+                                }
+                                ctx.events.append(
+                                    ExecutionEvent(
+                                        type=ExecutionEventType.TASK_FAILED,
+                                        source_id=task_id,
+                                        name=full_name,
+                                        value=error_details
                                     )
-                                    raise  # No fallback, raise the exception
-                        if self.cache and output is not None:
-                            cache_manager = CacheManager.default()
-                            cache_manager.set(task_id, output, ttl=self.cache_ttl, version=self.cache_version)
-                    finally:
-                        executor.shutdown()
-                        scheduler.release_resources(self.resource_requirements or {})
+                                )
+                                raise  # No fallback, raise the exception
+                    if self.cache:
+                        # A None output is cached too, so identical calls do not compute it again
+                        cached = CACHED_NONE if output is None else output
+                        batch = _cache_write_batch.get()
+                        if batch is not None:
+                            batch.add(task_id, cached, ttl=self.cache_ttl, version=cache_version)
+                        else:
+                            await CacheManager.default().aset(task_id, cached, ttl=self.cache_ttl,
+                                                              version=cache_version)
                 else:
                     output = None
         except Exception as ex:
@@ -306,6 +460,9 @@ class task:
                 )
             )
             raise
+        finally:
+            if flight:
+                await self._land(flight, cached)
 
         if output is not None:
             ctx.events.append(
@@ -316,5 +473,6 @@ class task:
                     value=self.output_storage.store(task_id, output) if self.output_storage else output,
                 )
             )
-        ContextManager.default().save(ctx)
+        if ContextManager.needs_checkpoint(ctx):
+            await ContextManager.default().asave(ctx)
         return output
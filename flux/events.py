@@ -3,8 +3,9 @@ from __future__ import annotations
 from datetime import datetime
 from enum import Enum
 from typing import Any
+from typing import Iterable
 
-from flux.utils import make_hashable
+from flux.utils import fingerprint
 
 
 class ExecutionEventType(str, Enum):
@@ -63,4 +64,81 @@ class ExecutionEvent:
             "value": self.value,
             "time": self.time,
         }
-        return f"{abs(hash(tuple(sorted(make_hashable(args)))))}"
+        return fingerprint(args)
+
+
+TERMINAL_TASK_EVENTS = (ExecutionEventType.TASK_COMPLETED, ExecutionEventType.TASK_FAILED)
+
+
+class ExecutionEventList(list):
+    """
+    List of execution events that keeps a per-source index up to date.
+
+    The index maps each ``source_id`` to its first terminal task event (completed or failed)
+    and to its latest event, so replay lookups do not need to scan the whole event history.
+    """
+
+    def __init__(self, events: Iterable[ExecutionEvent] = ()):
+        super().__init__()
+        self._terminal: dict[str, ExecutionEvent] = {}
+        self._latest: dict[str, ExecutionEvent] = {}
+        self.extend(events)
+
+    def append(self, event: ExecutionEvent) -> None:
+        super().append(event)
+        self._index(event)
+
+    def extend(self, events: Iterable[ExecutionEvent]) -> None:
+        for event in events:
+            self.append(event)
+
+    def __iadd__(self, events: Iterable[ExecutionEvent]) -> ExecutionEventList:
+        self.extend(events)
+        return self
+
+    def insert(self, index, event: ExecutionEvent) -> None:
+        super().insert(index, event)
+        self._reindex()
+
+    def remove(self, event: ExecutionEvent) -> None:
+        super().remove(event)
+        self._reindex()
+
+    def pop(self, index=-1) -> ExecutionEvent:
+        event = super().pop(index)
+        self._reindex()
+        return event
+
+    def clear(self) -> None:
+        super().clear()
+        self._reindex()
+
+    def __setitem__(self, index, value) -> None:
+        super().__setitem__(index, value)
+        self._reindex()
+
+    def __delitem__(self, index) -> None:
+        super().__delitem__(index)
+        self._reindex()
+
+    def __reduce__(self):
+        return self.__class__, (list(self),)
+
+    def terminal(self, source_id: str) -> ExecutionEvent | None:
+        """Return the first TASK_COMPLETED/TASK_FAILED event of ``source_id``, if any."""
+        return self._terminal.get(source_id)
+
+    def latest(self, source_id: str) -> ExecutionEvent | None:
+        """Return the most recent event of ``source_id``, if any."""
+        return self._latest.get(source_id)
+
+    def _index(self, event: ExecutionEvent) -> None:
+        self._latest[event.source_id] = event
+        if event.type in TERMINAL_TASK_EVENTS and event.source_id not in self._terminal:
+            self._terminal[event.source_id] = event
+
+    def _reindex(self) -> None:
+        self._terminal = {}
+        self._latest = {}
+        for event in self:
+            self._index(event)
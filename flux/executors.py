@@ -2,8 +2,13 @@ from __future__ import annotations
 from abc import ABC, abstractmethod
 from typing import Any, Callable, Coroutine, List
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import inspect
+import itertools
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextvars import ContextVar
 from multiprocessing import Process
+from weakref import WeakKeyDictionary
 
 import dill
 import orjson
@@ -11,6 +16,7 @@ import pika
 
 from flux import CacheManager
 from flux.config import Configuration
+from flux.errors import ExecutionError
 from flux.plugins import PluginManager
 from flux.scheduler import Scheduler, TaskInfo
 import boto3
@@ -36,58 +42,171 @@ class AbstractExecutor(ABC):
         """Clean up executor resources."""
         pass
 
+    async def submit(self, task_info: TaskInfo) -> Any:
+        """
+        Execute a task described by a TaskInfo, honouring its priority, deadline and resource
+        requirements where the executor schedules tasks. Executors without a scheduler just run it.
+        """
+        return await self.execute(task_info.task, *task_info.args, **task_info.kwargs)
+
+
+def task_info_for(task_id: str, task: Callable[..., Any], args: tuple, kwargs: dict) -> TaskInfo:
+    """Build the TaskInfo of an execute() call, taking the scheduling options out of its kwargs."""
+    return TaskInfo(
+        task_id=task_id,
+        task=task,
+        args=args,
+        kwargs=kwargs,
+        priority=kwargs.pop("priority", Configuration.get().settings.executor.default_priority),
+        deadline=kwargs.pop("deadline", None),
+        resource_requirements=kwargs.pop("resource_requirements", None),
+        schedule=kwargs.pop("schedule", None)
+    )
+
+
+async def admit(scheduler: Scheduler, task_info: TaskInfo) -> None:
+    """Wait until the scheduler admits a task; the one place tasks are admitted."""
+    if not await scheduler.admit(task_info):
+        raise ExecutionError(message=f"Task {task_info.task_id} was not admitted: it missed its deadline "
+                                     f"or the scheduler stopped")
+
+
+def is_async_callable(task: Callable[..., Any]) -> bool:
+    """Check whether calling a task returns a coroutine (async functions, partials and callables)."""
+    return inspect.iscoroutinefunction(task) or inspect.iscoroutinefunction(getattr(task, "__call__", None))
+
+
+# The LocalExecutor whose concurrency slot the current task holds, inherited by the tasks it starts
+_slot_holder: ContextVar[LocalExecutor | None] = ContextVar("flux_executor_slot_holder", default=None)
+
 
 class LocalExecutor(AbstractExecutor):
-    """Executor for local task execution using threads."""
+    """
+    Executor for local task execution.
+
+    Async tasks are awaited directly on the running event loop, bounded by max_concurrency.
+    Only tasks started outside of a running task count towards the bound: a task waiting on
+    the tasks it starts keeps its slot, so bounding those too would deadlock nested fan-outs.
+    Threads from the pool are reserved for sync callables.
+    """
 
-    def __init__(self, max_workers: int = None):
+    def __init__(self, max_workers: int = None, scheduler: Scheduler | None = None,
+                 max_concurrency: int | None = None):
         self.executor = ThreadPoolExecutor(max_workers=max_workers)
-        self.scheduler = Scheduler()
+        self.max_concurrency = max_concurrency
+        self._semaphores: WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = WeakKeyDictionary()
+        self._owns_scheduler = scheduler is None
+        self.scheduler = scheduler or Scheduler()
         self.scheduler.start()
+        self._ids = itertools.count()
 
     async def execute(self, task: Callable[..., Any], *args, **kwargs) -> Any:
-        task_info = TaskInfo(
-            task_id=f"task-{id(task)}-{hash(str(args))}",
-            task=task,
-            args=args,
-            kwargs=kwargs,
-            priority=kwargs.pop("priority", Configuration.get().settings.executor.default_priority),
-            deadline=kwargs.pop("deadline", None),
-            resource_requirements=kwargs.pop("resource_requirements", None),
-            schedule=kwargs.pop("schedule", None)
-        )
-        await self.scheduler.schedule_task(task_info)
-        if not task_info.schedule:
-            scheduled_task = await self.scheduler.get_next_task()
-            if scheduled_task:
-                loop = asyncio.get_running_loop()
-                result = await loop.run_in_executor(
-                    self.executor,
-                    lambda: scheduled_task.task(*scheduled_task.args, **scheduled_task.kwargs)
-                )
-                self.scheduler.release_resources(scheduled_task.resource_requirements or {})
-                return result
-        return None
+        return await self.submit(task_info_for(f"task-{id(task)}-{next(self._ids)}", task, args, kwargs))
+
+    async def submit(self, task_info: TaskInfo) -> Any:
+        if task_info.schedule:
+            await self.scheduler.schedule_task(task_info)
+            return None
+        await admit(self.scheduler, task_info)
+        try:
+            if is_async_callable(task_info.task):
+                return await self._execute_async(task_info)
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                self.executor,
+                lambda: task_info.task(*task_info.args, **task_info.kwargs)
+            )
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+        finally:
+            self.scheduler.release_resources(task_info.resource_requirements or {})
+
+    async def _execute_async(self, task_info: TaskInfo) -> Any:
+        if not self.max_concurrency or _slot_holder.get() is self:
+            return await task_info.task(*task_info.args, **task_info.kwargs)
+        async with self._get_semaphore():
+            token = _slot_holder.set(self)
+            try:
+                return await task_info.task(*task_info.args, **task_info.kwargs)
+            finally:
+                _slot_holder.reset(token)
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Semaphores bind to the loop they are first used on, and each workflow run may use its own loop.
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores.setdefault(loop, asyncio.Semaphore(self.max_concurrency))
+        return semaphore
 
     async def execute_parallel(self, tasks: List[Coroutine[Any, Any, Any]]) -> List[Any]:
-        results = []
-        for task in tasks:
-            task_func = lambda: asyncio.run(task)
-            result = await self.execute(task_func)
-            if result is not None:
-                results.append(result)
-        return results
+        return list(await asyncio.gather(*tasks))
 
     def shutdown(self):
         self.executor.shutdown()
-        self.scheduler.shutdown()
+        if self._owns_scheduler:
+            self.scheduler.shutdown()
+
+
+def _run_serialized(payload: bytes) -> bytes:
+    """Run a dill-serialized task in a worker process and return its dill-serialized result."""
+    task, args, kwargs = dill.loads(payload)
+    result = task(*args, **kwargs)
+    if inspect.isawaitable(result):
+        result = asyncio.run(result)
+    return dill.dumps(result)
+
+
+class ProcessExecutor(AbstractExecutor):
+    """
+    Executor for CPU-bound tasks using a persistent pool of worker processes.
+
+    Tasks, arguments and results are shipped with dill, so closures and decorated functions can be
+    executed outside the calling process. Async tasks run on an event loop inside the worker.
+    """
+
+    def __init__(self, max_workers: int = None, max_tasks_per_child: int | None = None,
+                 scheduler: Scheduler | None = None):
+        self.executor = ProcessPoolExecutor(max_workers=max_workers, max_tasks_per_child=max_tasks_per_child)
+        self._owns_scheduler = scheduler is None
+        self.scheduler = scheduler or Scheduler()
+        self.scheduler.start()
+        self._ids = itertools.count()
+
+    async def execute(self, task: Callable[..., Any], *args, **kwargs) -> Any:
+        return await self.submit(task_info_for(f"task-{id(task)}-{next(self._ids)}", task, args, kwargs))
+
+    async def submit(self, task_info: TaskInfo) -> Any:
+        if task_info.schedule:
+            await self.scheduler.schedule_task(task_info)
+            return None
+        await admit(self.scheduler, task_info)
+        try:
+            payload = dill.dumps((task_info.task, task_info.args, task_info.kwargs))
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self.executor, _run_serialized, payload)
+            return dill.loads(result)
+        finally:
+            self.scheduler.release_resources(task_info.resource_requirements or {})
+
+    async def execute_parallel(self, tasks: List[Coroutine[Any, Any, Any]]) -> List[Any]:
+        # Coroutines cannot cross process boundaries; the tasks they call are dispatched individually.
+        return list(await asyncio.gather(*tasks))
+
+    def shutdown(self):
+        self.executor.shutdown(cancel_futures=True)
+        if self._owns_scheduler:
+            self.scheduler.shutdown()
 
 
 class DistributedExecutor(AbstractExecutor):
-    def __init__(self, distributed_config: dict = None):
+    def __init__(self, distributed_config: dict = None, scheduler: Scheduler | None = None):
         self.distributed_config = distributed_config or {}
-        self.scheduler = Scheduler()
+        self._owns_scheduler = scheduler is None
+        self.scheduler = scheduler or Scheduler()
         self.scheduler.start()
+        self.workers: list[Process] = []
         self.connection = pika.BlockingConnection(pika.ConnectionParameters(
             host=self.distributed_config.get('rabbitmq_host', 'localhost')
         ))
@@ -123,42 +242,42 @@ class DistributedExecutor(AbstractExecutor):
         cache_manager.set(f"result_{task_id}", {'result': result, 'error': str(error) if error else None})
 
     async def execute(self, task: Callable[..., Any], *args, **kwargs) -> Any:
-        task_id = f"task-{id(task)}-{hash(str(args))}"
-        task_info = TaskInfo(
-            task_id=task_id,
-            task=task,
-            args=args,
-            kwargs=kwargs,
-            priority=kwargs.pop("priority", Configuration.get().settings.executor.default_priority),
-            deadline=kwargs.pop("deadline", None),
-            resource_requirements=kwargs.pop("resource_requirements", None),
-            schedule=kwargs.pop("schedule", None)
-        )
-        await self.scheduler.schedule_task(task_info)
-        if not task_info.schedule:
-            scheduled_task = await self.scheduler.get_next_task()
-            if scheduled_task:
-                self.channel.basic_publish(
-                    exchange='',
-                    routing_key='flux_tasks',
-                    body=dill.dumps((task_id, scheduled_task.task, scheduled_task.args, scheduled_task.kwargs)),
-                    properties=pika.BasicProperties(priority=scheduled_task.priority)
-                )
-                while True:
-                    result = CacheManager.default().get(f"result_{task_id}")
-                    if result:
-                        self.scheduler.release_resources(scheduled_task.resource_requirements or {})
-                        if result['error']:
-                            raise Exception(result['error'])
-                        return result['result']
-                    await asyncio.sleep(0.01)
-        return None
+        return await self.submit(task_info_for(f"task-{id(task)}", task, args, kwargs))
+
+    async def submit(self, task_info: TaskInfo) -> Any:
+        # Unique per submission, so a retry does not pick up the result stored by the failed attempt
+        task_id = f"{task_info.task_id}-{uuid.uuid4().hex}"
+        if task_info.schedule:
+            await self.scheduler.schedule_task(task_info)
+            return None
+        await admit(self.scheduler, task_info)
+        try:
+            self.channel.basic_publish(
+                exchange='',
+                routing_key='flux_tasks',
+                body=dill.dumps((task_id, task_info.task, task_info.args, task_info.kwargs)),
+                properties=pika.BasicProperties(priority=task_info.priority)
+            )
+            while True:
+                result = await CacheManager.default().aget(f"result_{task_id}")
+                if result:
+                    if result['error']:
+                        raise Exception(result['error'])
+                    return result['result']
+                await asyncio.sleep(0.01)
+        finally:
+            self.scheduler.release_resources(task_info.resource_requirements or {})
+
+    async def execute_parallel(self, tasks: List[Coroutine[Any, Any, Any]]) -> List[Any]:
+        # The tasks awaited by these coroutines are published to the queue individually.
+        return list(await asyncio.gather(*tasks))
 
     def shutdown(self):
         self.connection.close()
         for worker in self.workers:
             worker.terminate()
-        self.scheduler.shutdown()
+        if self._owns_scheduler:
+            self.scheduler.shutdown()
 
 class AWSLambdaExecutor(AbstractExecutor):
     def __init__(self):
@@ -213,20 +332,32 @@ class GoogleCloudFunctionsPlugin(ExecutorPlugin):
         super().__init__("gcp_functions", GoogleCloudFunctionsExecutor)
 
 
-def get_executor() -> AbstractExecutor:
+def get_executor(scheduler: Scheduler | None = None, mode: str | None = None) -> AbstractExecutor:
+    """
+    Create an executor for an execution mode.
+
+    Args:
+        scheduler (Scheduler | None): A shared scheduler for local, process and distributed executors.
+            When omitted, the executor creates and owns its own scheduler.
+        mode (str | None): The execution mode. Defaults to the configured execution mode.
+    """
     config = Configuration.get().settings.executor
-    mode = config.execution_mode
+    mode = mode or config.execution_mode
     plugin_manager = PluginManager.default()
 
     # Check for plugin-based executor
-    if mode not in ["local", "distributed"]:
+    if mode not in ["local", "process", "distributed"]:
         plugin = plugin_manager.get_plugin(mode)
         if isinstance(plugin, ExecutorPlugin):
             return plugin.executor_class()
         raise ValueError(f"Unknown execution mode or plugin: {mode}")
 
     if mode == "local":
-        return LocalExecutor(max_workers=config.max_workers)
+        return LocalExecutor(max_workers=config.max_workers, scheduler=scheduler,
+                             max_concurrency=config.max_concurrency)
+    elif mode == "process":
+        return ProcessExecutor(max_workers=config.max_workers, max_tasks_per_child=config.max_tasks_per_child,
+                               scheduler=scheduler)
     elif mode == "distributed":
-        return DistributedExecutor(distributed_config=config.distributed_config)
+        return DistributedExecutor(distributed_config=config.distributed_config, scheduler=scheduler)
     raise ValueError(f"Unknown execution mode: {mode}")
@@ -5,10 +5,13 @@ import json
 from typing import Any
 
 import click
+import requests
 import uvicorn
+from prometheus_client.parser import text_string_to_metric_families
 
 import flux.decorators as decorators
 from flux import ContextManager, CacheManager
+from flux.cache import CacheStats
 from flux.api import create_app
 from flux.catalogs import WorkflowCatalog
 from flux.config import Configuration
@@ -32,6 +35,11 @@ def workflow():
 cli.add_command(plugin)
 
 
+@cli.group()
+def cache():
+    pass
+
+
 @workflow.command("list")
 @click.option(
     "--format",
@@ -198,5 +206,57 @@ def start(path: str, host: str | None = None, port: int | None = None):
     )
 
 
+@cache.command("stats")
+@click.option("--url", "-u", default=None, help="Metrics endpoint of the Flux process to inspect (defaults to the local Prometheus port)")
+@click.option(
+    "--format",
+    "-f",
+    type=click.Choice(["simple", "json"]),
+    default="simple",
+    help="Output format (simple or json)",
+)
+def cache_stats(url: str | None, format: str):
+    """Show cache hits, misses and latency per tier and key namespace of a running Flux process."""
+    try:
+        port = Configuration.get().settings.monitoring.get("prometheus_port", 9090)
+        response = requests.get(url or f"http://localhost:{port}/metrics", timeout=10)
+        response.raise_for_status()
+        summary = CacheStats.summarize(_cache_stats_snapshot(response.text))
+
+        if not summary:
+            click.echo("No cache statistics found.")
+            return
+
+        if format == "json":
+            click.echo(json.dumps(summary, indent=2))
+            return
+
+        click.echo(f"{'TIER':<11} {'BACKEND':<10} {'NAMESPACE':<11} {'HITS':>9} {'MISSES':>9} {'HIT RATE':>9} "
+                   f"{'SETS':>9} {'REJECTED':>9} {'EVICTED':>9} {'ERRORS':>7} {'READ MS':>9}")
+        for row in summary:
+            hit_rate = f"{row['hit_rate']:.1%}" if row["hit_rate"] is not None else "-"
+            latency = f"{row['read_latency_ms']:.3f}" if row["read_latency_ms"] is not None else "-"
+            click.echo(f"{row['tier']:<11} {row['backend']:<10} {row['namespace']:<11} {row['hits']:>9} "
+                       f"{row['misses']:>9} {hit_rate:>9} {row['sets']:>9} {row['rejected']:>9} "
+                       f"{row['evictions']:>9} {row['errors']:>7} {latency:>9}")
+    except Exception as ex:
+        click.echo(f"Error reading cache stats: {str(ex)}", err=True)
+
+
+def _cache_stats_snapshot(metrics: str) -> dict[str, list[dict[str, Any]]]:
+    # Rebuilds a CacheStats snapshot from the Prometheus text exposition of a Flux process
+    snapshot: dict[str, list[dict[str, Any]]] = {"operations": [], "latency": []}
+    latency: dict[tuple, dict[str, Any]] = {}
+    for family in text_string_to_metric_families(metrics):
+        for sample in family.samples:
+            if sample.name == "flux_cache_operations_total":
+                snapshot["operations"].append({**sample.labels, "count": int(sample.value)})
+            elif sample.name in ("flux_cache_latency_seconds_count", "flux_cache_latency_seconds_sum"):
+                row = latency.setdefault(tuple(sorted(sample.labels.items())), {**sample.labels, "count": 0, "seconds": 0.0})
+                row["count" if sample.name.endswith("_count") else "seconds"] = sample.value
+    snapshot["latency"] = list(latency.values())
+    return snapshot
+
+
 if __name__ == "__main__":  # pragma: no cover
     cli()
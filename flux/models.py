@@ -36,12 +36,16 @@ class Base(DeclarativeBase):
 
 class BaseRepository:
     def __init__(self, database_url: str):
+        self.database_url = database_url
         self._engine = create_engine(database_url)
         Base.metadata.create_all(self._engine)
 
     def session(self) -> Session:
         return Session(self._engine)
 
+    def close(self) -> None:
+        self._engine.dispose()
+
 
 class SQLiteRepository(BaseRepository):
     def __init__(self):
@@ -1,37 +1,96 @@
-from prometheus_client import Counter, Gauge, Histogram, start_http_server
+from __future__ import annotations
+from threading import Lock
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY, start_http_server
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, SummaryMetricFamily
+from flux.config import Configuration
 from flux.context import WorkflowExecutionContext
 from flux.events import ExecutionEventType
 import logging
 
 logger = logging.getLogger("flux.monitoring")
 
-class Monitoring:
-    def __init__(self):
-        self.workflow_executions = Counter(
-            "flux_workflow_executions_total",
-            "Total number of workflow executions",
-            ["workflow_name", "status"]
-        )
-        self.task_executions = Counter(
-            "flux_task_executions_total",
-            "Total number of task executions",
-            ["task_name", "status"]
-        )
-        self.execution_duration = Histogram(
-            "flux_execution_duration_seconds",
-            "Execution duration of workflows and tasks",
-            ["name", "type"]
+
+class CacheMetricsCollector:
+    """Exports the statistics of the process-wide cache manager when Prometheus scrapes them."""
+
+    def collect(self):
+        from flux.cache import CacheManager, MEMORY_TIER
+
+        manager = CacheManager._instance
+        if manager is None:
+            return
+        stats = manager.stats.snapshot()
+        operations = CounterMetricFamily(
+            "flux_cache_operations",
+            "Cache operations by tier, backend, key namespace, operation and result",
+            labels=["tier", "backend", "namespace", "operation", "result"]
         )
-        self.resource_usage = Gauge(
-            "flux_resource_usage",
-            "Current resource usage",
-            ["resource_type"]
+        for row in stats["operations"]:
+            operations.add_metric(
+                [row["tier"], row["backend"], row["namespace"], row["operation"], row["result"]], row["count"]
+            )
+        yield operations
+        latency = SummaryMetricFamily(
+            "flux_cache_latency_seconds",
+            "Latency of cache operations by tier, backend, key namespace and operation",
+            labels=["tier", "backend", "namespace", "operation"]
         )
+        for row in stats["latency"]:
+            latency.add_metric(
+                [row["tier"], row["backend"], row["namespace"], row["operation"]],
+                count_value=row["count"], sum_value=row["seconds"]
+            )
+        yield latency
+        memory = manager.memory_cache
+        yield GaugeMetricFamily("flux_cache_memory_entries", "Entries held by the in-memory cache tier",
+                                value=len(memory))
+        yield GaugeMetricFamily("flux_cache_memory_bytes", "Bytes held by the in-memory cache tier",
+                                value=memory.current_bytes)
+
+
+# Metrics are registered with the Prometheus registry once per process, when this module is imported
+WORKFLOW_EXECUTIONS = Counter(
+    "flux_workflow_executions_total",
+    "Total number of workflow executions",
+    ["workflow_name", "status"]
+)
+TASK_EXECUTIONS = Counter(
+    "flux_task_executions_total",
+    "Total number of task executions",
+    ["task_name", "status"]
+)
+EXECUTION_DURATION = Histogram(
+    "flux_execution_duration_seconds",
+    "Execution duration of workflows and tasks",
+    ["name", "type"]
+)
+RESOURCE_USAGE = Gauge(
+    "flux_resource_usage",
+    "Current resource usage",
+    ["resource_type"]
+)
+REGISTRY.register(CacheMetricsCollector())
+
+
+class Monitoring:
+    _instance: Monitoring | None = None
+    _lock: Lock = Lock()
+
+    def __init__(self):
+        self.workflow_executions = WORKFLOW_EXECUTIONS
+        self.task_executions = TASK_EXECUTIONS
+        self.execution_duration = EXECUTION_DURATION
+        self.resource_usage = RESOURCE_USAGE
         self.start_prometheus_server()
 
     def start_prometheus_server(self):
         port = Configuration.get().settings.monitoring.get("prometheus_port", 9090)
-        start_http_server(port)
+        try:
+            start_http_server(port)
+        except OSError as e:
+            # Metrics are still collected, e.g. when another process already serves this port
+            logger.warning(f"Failed to start the Prometheus metrics server on port {port}: {str(e)}")
+            return
         logger.info(f"Prometheus metrics server started on port {port}")
 
     def track_execution(self, ctx: WorkflowExecutionContext):
@@ -64,4 +123,9 @@ class Monitoring:
 
     @staticmethod
     def default() -> Monitoring:
-        return Monitoring()
+        # The metrics server can only be started once per process
+        if Monitoring._instance is None:
+            with Monitoring._lock:
+                if Monitoring._instance is None:
+                    Monitoring._instance = Monitoring()
+        return Monitoring._instance
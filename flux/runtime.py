@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import atexit
+import logging
+from threading import Lock
+
+from flux.config import Configuration
+from flux.executors import AbstractExecutor, get_executor
+from flux.scheduler import Scheduler
+
+logger = logging.getLogger("flux.runtime")
+
+
+class ExecutionRuntime:
+    """
+    Process-wide execution runtime shared by every workflow and task.
+
+    The runtime owns a single scheduler (and with it the resource manager) and keeps one warm
+    executor per execution mode, so task invocations do not pay for building and tearing down
+    thread pools, schedulers and their supporting services. It is shut down at process exit.
+    """
+
+    _instance: ExecutionRuntime | None = None
+    _lock: Lock = Lock()
+
+    def __init__(self):
+        self.scheduler = Scheduler()
+        self.scheduler.start()
+        self._executors: dict[str, AbstractExecutor] = {}
+        self._executors_lock = Lock()
+
+    @property
+    def resource_manager(self):
+        return self.scheduler.resource_manager
+
+    def executor(self, mode: str | None = None) -> AbstractExecutor:
+        """
+        Get the warm executor for an execution mode, creating it on first use.
+
+        Args:
+            mode (str | None): The execution mode, e.g. "local", "process" or "distributed".
+                Defaults to the configured execution mode.
+
+        Returns:
+            AbstractExecutor: The executor shared by all tasks running in this mode.
+        """
+        mode = mode or Configuration.get().settings.executor.execution_mode
+        executor = self._executors.get(mode)
+        if executor is None:
+            with self._executors_lock:
+                executor = self._executors.get(mode)
+                if executor is None:
+                    executor = get_executor(self.scheduler, mode)
+                    self._executors[mode] = executor
+        return executor
+
+    def shutdown(self) -> None:
+        """Shut down every executor and the scheduler owned by this runtime."""
+        with self._executors_lock:
+            executors = list(self._executors.values())
+            self._executors.clear()
+        for executor in executors:
+            try:
+                executor.shutdown()
+            except Exception as e:
+                logger.warning(f"Failed to shut down executor {type(executor).__name__}: {str(e)}")
+        try:
+            self.scheduler.shutdown()
+        except Exception as e:
+            logger.warning(f"Failed to shut down scheduler: {str(e)}")
+
+    @staticmethod
+    def default() -> ExecutionRuntime:
+        if ExecutionRuntime._instance is None:
+            with ExecutionRuntime._lock:
+                if ExecutionRuntime._instance is None:
+                    ExecutionRuntime._instance = ExecutionRuntime()
+                    atexit.unregister(ExecutionRuntime.reset)
+                    atexit.register(ExecutionRuntime.reset)
+        return ExecutionRuntime._instance
+
+    @staticmethod
+    def reset() -> None:
+        """Shut down the current runtime; the next call to default() creates a new one."""
+        with ExecutionRuntime._lock:
+            runtime, ExecutionRuntime._instance = ExecutionRuntime._instance, None
+        if runtime:
+            runtime.shutdown()
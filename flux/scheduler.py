@@ -5,6 +5,7 @@ from typing import Any, Callable, Dict, List, Optional
 import asyncio
 import heapq
 import logging
+import threading
 
 import requests
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
@@ -78,14 +79,17 @@ class ResourceManager:
 
 class Scheduler:
     def __init__(self):
-        self.task_queue: List[TaskInfo] = []
+        self.task_queue: List[TaskInfo] = []  # scheduled and triggered tasks, see get_next_task
+        self._waiters: List[TaskInfo] = []  # tasks waiting in admit()
+        self._queue_lock = threading.Lock()
         self.resource_manager = ResourceManager()
-        self.scheduler = AsyncIOScheduler()
+        # AsyncIOScheduler runs its jobs on the loop it was started on, and a shared scheduler
+        # serves every loop of the process, so cron jobs get one per loop
+        self._cron_schedulers: Dict[asyncio.AbstractEventLoop, AsyncIOScheduler] = {}
         self.event_observer = Observer()
         self.running = False
         self.fastapi_app = FastAPI()
         self._setup_webhooks()
-        self.scheduler.start()
         self._setup_ci_cd_triggers()
 
     def _setup_webhooks(self):
@@ -169,7 +173,7 @@ class Scheduler:
     async def schedule_task(self, task_info: TaskInfo):
         try:
             if task_info.schedule:
-                self.scheduler.add_job(
+                self._cron_scheduler().add_job(
                     self._enqueue_task,
                     "cron",
                     args=[task_info],
@@ -207,6 +211,17 @@ class Scheduler:
             ))
             raise
 
+    def _cron_scheduler(self) -> AsyncIOScheduler:
+        loop = asyncio.get_running_loop()
+        with self._queue_lock:
+            scheduler = self._cron_schedulers.get(loop)
+            if scheduler is None:
+                for closed in [other for other in self._cron_schedulers if other.is_closed()]:
+                    self._cron_schedulers.pop(closed).shutdown(wait=False)
+                scheduler = self._cron_schedulers[loop] = AsyncIOScheduler(event_loop=loop)
+                scheduler.start()
+        return scheduler
+
     def _parse_cron(self, cron: str) -> Dict[str, Any]:
         parts = cron.split()
         if len(parts) != 5:
@@ -236,6 +251,54 @@ class Scheduler:
             await asyncio.sleep(0.1)
         return None
 
+    async def admit(self, task_info: TaskInfo) -> bool:
+        """
+        Wait until a task may run and allocate its resources.
+
+        Unlike get_next_task, the caller only ever receives its own task, which makes it safe for
+        concurrent callers sharing the same scheduler. Waiting tasks are admitted in priority order
+        as resources become available; a task whose resources are free is not held back by
+        higher-priority tasks that cannot run yet, so a task started by a running task (which may
+        hold the resources they need) cannot deadlock.
+
+        Args:
+            task_info (TaskInfo): The task to admit.
+
+        Returns:
+            bool: True if the task was admitted, False if it missed its deadline or the scheduler stopped.
+        """
+        with self._queue_lock:
+            if self._admissible(task_info):
+                return self._allocate(task_info)
+            self._waiters.append(task_info)
+        try:
+            while self.running:
+                await asyncio.sleep(0.01)
+                with self._queue_lock:
+                    if self._admissible(task_info):
+                        self._waiters = [waiter for waiter in self._waiters if waiter is not task_info]
+                        return self._allocate(task_info)
+            return False
+        finally:
+            # Also reached when the waiting caller is cancelled
+            with self._queue_lock:
+                self._waiters = [waiter for waiter in self._waiters if waiter is not task_info]
+
+    def _admissible(self, task_info: TaskInfo) -> bool:
+        # Its resources are free, and no waiter ahead of it could take them
+        can_allocate = self.resource_manager.can_allocate
+        return can_allocate(task_info.resource_requirements or {}) and not any(
+            waiter < task_info and can_allocate(waiter.resource_requirements or {})
+            for waiter in self._waiters if waiter is not task_info
+        )
+
+    def _allocate(self, task_info: TaskInfo) -> bool:
+        if task_info.deadline and task_info.deadline < datetime.now():
+            logger.warning(f"Task {task_info.task_id} missed deadline")
+            return False
+        self.resource_manager.allocate(task_info.resource_requirements or {})
+        return True
+
     def release_resources(self, requirements: Dict[str, Any]):
         self.resource_manager.release(requirements or {})
 
@@ -261,10 +324,16 @@ class Scheduler:
         logger.info("Scheduler started")
 
     def shutdown(self):
-        self.scheduler.shutdown()
-        self.event_observer.stop()
-        self.event_observer.join()
         self.running = False
+        with self._queue_lock:
+            cron_schedulers = list(self._cron_schedulers.values())
+            self._cron_schedulers.clear()
+        for scheduler in cron_schedulers:
+            if scheduler.running:
+                scheduler.shutdown(wait=False)
+        if self.event_observer.is_alive():
+            self.event_observer.stop()
+            self.event_observer.join()
         logger.info("Scheduler shutdown")
 
 class FileEventHandler(FileSystemEventHandler):
@@ -2,7 +2,7 @@ from __future__ import annotations
 import asyncio
 import random
 import uuid
-from collections.abc import Awaitable, Coroutine
+from collections.abc import Awaitable
 from datetime import datetime, timedelta
 from typing import Any, Callable, List, Literal, TypeVar
 import flux.decorators as decorators
@@ -10,7 +10,6 @@ from flux.catalogs import WorkflowCatalog
 from flux.context import WorkflowExecutionContext
 from flux.errors import PauseRequested
 from flux.events import ExecutionEvent, ExecutionEventType
-from flux.executors import get_executor
 
 T = TypeVar("T", bound=Any)
 
@@ -34,14 +33,40 @@ async def randint(a: int, b: int) -> int:
 async def randrange(start: int, stop: int | None = None, step: int = 1):
     return random.randrange(start, stop, step)
 
-@decorators.task
-async def parallel(*functions: Coroutine[Any, Any, Any]) -> list[Any]:
-    """Execute tasks in parallel using the configured executor."""
-    executor = get_executor()
-    try:
-        return await executor.execute_parallel(list(functions))
-    finally:
-        executor.shutdown()
+async def parallel(*functions: Awaitable[Any], max_concurrency: int | None = None,
+                   return_exceptions: bool = False) -> list[Any]:
+    """
+    Run tasks concurrently on the current event loop.
+
+    Unlike the helpers around it this is not a task: its arguments are coroutines, which can
+    be awaited only once, so they cannot be retried or fingerprinted for the cache. Each branch
+    is a task call with its own retries, caching and events.
+
+    Args:
+        functions: The task calls to run, e.g. ``parallel(say_hi(name), say_hello(name))``.
+        max_concurrency: Maximum number of branches running at once; unbounded if not set.
+        return_exceptions: If True, failed branches return their exception in place of a result.
+            Otherwise the first failure cancels the remaining branches and is raised.
+
+    Returns:
+        list[Any]: The results, in the same order as the functions.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+
+    async def run(function: Awaitable[Any]) -> Any:
+        if semaphore is None:
+            return await function
+        async with semaphore:
+            return await function
+
+    async with decorators.cache_write_batch():
+        branches = [asyncio.ensure_future(run(function)) for function in functions]
+        try:
+            return list(await asyncio.gather(*branches, return_exceptions=return_exceptions))
+        except BaseException:
+            for branch in branches:
+                branch.cancel()
+            raise
 
 @decorators.task
 async def sleep(duration: float | timedelta):
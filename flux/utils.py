@@ -1,15 +1,22 @@
 from __future__ import annotations
 
+import hashlib
 import inspect
 import json
+import pickle
 import traceback
 import uuid
+from datetime import date
 from datetime import datetime
+from datetime import time
 from datetime import timedelta
+from decimal import Decimal
 from enum import Enum
 from importlib import import_module as imodule
 from importlib import util
 from pathlib import Path
+from pathlib import PurePath
+from types import CodeType
 from types import GeneratorType
 from typing import Any
 from typing import Callable
@@ -46,6 +53,173 @@ def make_hashable(item):
         return str(item)
 
 
+FINGERPRINT_MEMO_MIN_SIZE = 1024
+
+
+def fingerprint(*values: Any, memo: dict[int, tuple[Any, bytes]] | None = None) -> str:
+    """Compute a stable digest of the given values.
+
+    Unlike the built-in hash(), the digest does not depend on the process it was computed in,
+    so it can be used to match tasks and events across processes and restarts.
+
+    Args:
+        values: The values to fingerprint.
+        memo: Optional cache of digests keyed by object identity. Only large hashable values
+            (tuples, frozensets, strings and bytes) are memoized, since hashable values are
+            expected to be immutable.
+
+    Returns:
+        The hexadecimal digest of the values
+
+    Raises:
+        TypeError: If a value has no stable representation, i.e. it cannot be pickled.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for value in values:
+        digest.update(_value_digest(value, memo))
+    return digest.hexdigest()
+
+
+def _value_digest(value: Any, memo: dict[int, tuple[Any, bytes]] | None) -> bytes:
+    memoize = (
+        memo is not None
+        and isinstance(value, (tuple, frozenset, str, bytes))
+        and len(value) >= FINGERPRINT_MEMO_MIN_SIZE
+        and is_hashable(value)
+    )
+    if memoize and id(value) in memo:
+        return memo[id(value)][1]
+    digest = hashlib.blake2b(digest_size=16)
+    _encode(digest, value)
+    result = digest.digest()
+    if memoize:
+        memo[id(value)] = (value, result)  # keep a reference so the id cannot be reused
+    return result
+
+
+def _encode(digest, value: Any) -> None:
+    if value is None:
+        digest.update(b"N")
+    elif isinstance(value, bool):
+        digest.update(b"T" if value else b"F")
+    elif isinstance(value, Enum):
+        digest.update(b"E" + type(value).__qualname__.encode() + b":")
+        _encode(digest, value.value)
+    elif isinstance(value, int):
+        digest.update(b"i%d;" % value)
+    elif isinstance(value, float):
+        digest.update(b"f" + value.hex().encode() + b";")
+    elif isinstance(value, str):
+        data = value.encode("utf-8", "surrogatepass")
+        digest.update(b"s%d:" % len(data))
+        digest.update(data)
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        data = bytes(value)
+        digest.update(b"b%d:" % len(data))
+        digest.update(data)
+    elif isinstance(value, (list, tuple)):
+        digest.update(b"l%d:" % len(value))
+        for item in value:
+            _encode(digest, item)
+    elif isinstance(value, dict):
+        entries = sorted(_value_digest((k, v), None) for k, v in value.items())
+        digest.update(b"d%d:" % len(entries))
+        for entry in entries:
+            digest.update(entry)
+    elif isinstance(value, (set, frozenset)):
+        entries = sorted(_value_digest(item, None) for item in value)
+        digest.update(b"S%d:" % len(entries))
+        for entry in entries:
+            digest.update(entry)
+    elif isinstance(value, (datetime, date, time)):
+        digest.update(b"t" + value.isoformat().encode() + b";")
+    elif isinstance(value, timedelta):
+        digest.update(b"D" + repr(value.total_seconds()).encode() + b";")
+    elif isinstance(value, (uuid.UUID, Decimal, PurePath)):
+        digest.update(b"u" + str(value).encode() + b";")
+    elif isinstance(value, Callable) and hasattr(value, "name") and not inspect.isclass(value):
+        digest.update(b"w" + str(value.name).encode() + b";")
+    elif inspect.isfunction(value) or inspect.ismethod(value) or inspect.isbuiltin(value) or inspect.isclass(value):
+        digest.update(b"c" + f"{value.__module__}.{value.__qualname__}".encode() + b";")
+    else:
+        type_name = f"{type(value).__module__}.{type(value).__qualname__}"
+        try:
+            data = pickle.dumps(value, protocol=5)
+        except Exception as e:
+            # Their repr usually embeds a memory address, which would make the fingerprint differ on every run
+            raise TypeError(f"Cannot fingerprint a value of type {type_name}: it cannot be pickled") from e
+        digest.update(b"o" + type_name.encode() + b":")
+        digest.update(data)
+
+
+def code_fingerprint(func: Callable) -> str:
+    """Compute a stable digest of the code a function runs.
+
+    The digest covers the function's bytecode and constants, its default arguments, the values it
+    closes over and the functions of its own module it calls, so it changes whenever any of them
+    is edited. Like fingerprint(), it is stable across processes (for a given Python version).
+
+    Args:
+        func: The function.
+
+    Returns:
+        The hexadecimal digest of the function's code
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    _encode_function(digest, func, set())
+    return digest.hexdigest()
+
+
+def _encode_function(digest, func: Callable, seen: set[int]) -> None:
+    func = inspect.unwrap(func)
+    if id(func) in seen:  # recursive and mutually recursive functions
+        digest.update(b"r;")
+        return
+    seen.add(id(func))
+    code = getattr(func, "__code__", None)
+    if not isinstance(code, CodeType):
+        _encode(digest, func)  # builtins and other callables without bytecode
+        return
+    _encode_code(digest, code)
+    _encode(digest, func.__defaults__ or ())
+    _encode(digest, func.__kwdefaults__ or {})
+    for cell in func.__closure__ or ():
+        try:
+            value = cell.cell_contents
+        except ValueError:  # not assigned yet
+            digest.update(b"e;")
+            continue
+        if inspect.isfunction(value):
+            _encode_function(digest, value, seen)
+        else:
+            _encode(digest, value)
+    for name in sorted(_code_names(code)):
+        value = func.__globals__.get(name)
+        if inspect.isfunction(value) and value.__module__ == func.__module__:
+            digest.update(b"g" + name.encode() + b":")
+            _encode_function(digest, value, seen)
+
+
+def _encode_code(digest, code: CodeType) -> None:
+    digest.update(b"C%d,%d,%d:" % (code.co_argcount, code.co_kwonlyargcount, code.co_flags))
+    digest.update(code.co_code)
+    _encode(digest, code.co_names)
+    digest.update(b"k%d:" % len(code.co_consts))
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            _encode_code(digest, const)
+        else:
+            _encode(digest, const)
+
+
+def _code_names(code: CodeType) -> set[str]:
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            names |= _code_names(const)
+    return names
+
+
 def is_hashable(obj) -> bool:
     try:
         hash(obj)
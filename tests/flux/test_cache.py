@@ -0,0 +1,363 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import time
+
+import pytest
+
+from flux.cache import CACHED_NONE
+from flux.cache import BloomFilter
+from flux.cache import CacheManager
+from flux.cache import CacheStats
+from flux.cache import HotKeys
+from flux.cache import MemoryCache
+from flux.cache_backends import CacheEntry
+from flux.cache_backends import key_digest
+from flux.config import Configuration
+
+
+def test_memory_cache_evicts_by_entry_count():
+    cache = MemoryCache(max_entries=2)
+    cache.set("a", CacheEntry(1))
+    cache.set("b", CacheEntry(2))
+    cache.get("a")
+    cache.set("c", CacheEntry(3))
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache
+
+
+def test_memory_cache_evicts_by_size():
+    cache = MemoryCache(max_entries=100, max_bytes=100)
+    cache.set("a", CacheEntry("x"), size=40)
+    cache.set("b", CacheEntry("y"), size=40)
+    cache.set("c", CacheEntry("z"), size=40)
+    assert "a" not in cache
+    assert cache.current_bytes == 80
+    assert not cache.set("d", CacheEntry("too big"), size=101)
+    assert "d" not in cache
+
+
+def test_memory_cache_skips_large_entries():
+    cache = MemoryCache(max_entries=100, max_bytes=1000, max_entry_bytes=100)
+    cache.set("small", CacheEntry("x"), size=40)
+    assert not cache.set("large", CacheEntry("y", size=200))
+    assert "small" in cache and "large" not in cache
+    assert cache.current_bytes == 40
+
+
+def test_memory_cache_drops_expired_entries():
+    cache = MemoryCache(max_entries=10)
+    cache.set("old", CacheEntry("x", created_at=time.time() - 10, ttl=5))
+    cache.set("new", CacheEntry("y", ttl=60))
+    assert cache.get("old") is None
+    assert cache.get("new").value == "y"
+    assert len(cache) == 1
+
+
+def test_cache_manager_serves_memory_hits_without_backend(tmp_path):
+    Configuration().override(home=str(tmp_path), cache={"backend": "file"})
+    CacheManager.reset()
+    manager = CacheManager.default()
+    manager.set("key", "value", version="1")
+
+    manager.persistent_backend = None  # any backend access would fail
+    assert manager.get("key", version="1") == "value"
+    CacheManager.reset()
+    Configuration().reset()
+
+
+def test_cache_manager_is_shared(tmp_path):
+    Configuration().override(home=str(tmp_path), cache={"backend": "file"})
+    CacheManager.reset()
+    manager = CacheManager.default()
+    assert CacheManager.default() is manager
+
+    manager.set("key", {"value": 1})
+    assert CacheManager.default().get("key") == {"value": 1}
+
+    CacheManager.reset()
+    assert CacheManager.default() is not manager
+    CacheManager.reset()
+    Configuration().reset()
+
+
+def test_cache_manager_batches_backend_access(tmp_path):
+    Configuration().override(home=str(tmp_path), cache={"backend": "file"})
+    CacheManager.reset()
+    manager = CacheManager.default()
+    manager.set_many({"a": 1, "b": 2, "c": 3}, version="1")
+    manager.memory_cache.clear()
+
+    assert manager.get_many(["a", "b", "missing"], version="1") == {"a": 1, "b": 2}
+    assert manager.get_many(["a", "c"], version="2") == {}
+    assert "a" in manager.memory_cache and "c" not in manager.memory_cache
+
+    manager.delete_many(["a", "b"])
+    assert manager.get_many(["a", "b", "c"], version="1") == {"c": 3}
+    CacheManager.reset()
+    Configuration().reset()
+
+
+@pytest.mark.asyncio
+async def test_cache_manager_async_api_matches_sync_api(tmp_path):
+    Configuration().override(home=str(tmp_path), cache={"backend": "file"})
+    manager = CacheManager()
+    await manager.aset_many({"a": 1, "b": 2}, version="1")
+    manager.memory_cache.clear()
+
+    assert await manager.aget("a", version="1") == 1
+    assert await manager.aget_many(["a", "b", "missing"], version="1") == {"a": 1, "b": 2}
+    assert await manager.avalidate("b", version="1")
+    await manager.adelete("a")
+    assert await manager.aget("a", version="1") is None
+    assert manager.get("b", version="1") == 2
+    manager.close()
+    Configuration().reset()
+
+
+def test_processes_share_entries_through_the_host_tier(tmp_path):
+    Configuration().override(home=str(tmp_path), cache={"backend": "file", "host_cache": True,
+                                                        "host_cache_path": str(tmp_path / "host-cache"),
+                                                        "host_cache_bytes": 1024 * 1024, "host_cache_slots": 1024})
+    writer, reader = CacheManager(), CacheManager()
+    writer.set("workflow:w", {"name": "w"}, version="1")
+
+    reader.persistent_backend = None  # any backend access would fail
+    assert reader.get("workflow:w", version="1") == {"name": "w"}
+    assert "workflow:w" in reader.memory_cache
+    writer.delete("workflow:w")
+    reader.memory_cache.clear()
+    assert reader.host_cache.get("workflow:w") is None
+    writer.close()
+    reader.close()
+    Configuration().reset()
+
+
+def _host_tier_settings(tmp_path) -> dict:
+    return {"backend": "file", "bloom_filter": False, "invalidation_channel": "sqlite",
+            "invalidation_poll_interval": 0.01, "host_cache": True, "host_cache_path": str(tmp_path / "host-cache"),
+            "host_cache_bytes": 1024 * 1024, "host_cache_slots": 1024}
+
+
+def _set_in_another_process(tmp_path, key, value):
+    Configuration().override(home=str(tmp_path), cache=_host_tier_settings(tmp_path))
+    manager = CacheManager()
+    manager.set(key, value, version="1")
+    time.sleep(0.5)  # let the invalidation go out before closing the channel
+    manager.close()
+
+
+def test_invalidations_from_the_same_host_keep_the_host_tier(tmp_path):
+    Configuration().override(home=str(tmp_path), cache=_host_tier_settings(tmp_path))
+    manager = CacheManager()
+    manager.set("workflow:w", "v1", version="1")
+
+    writer = multiprocessing.get_context("spawn").Process(target=_set_in_another_process,
+                                                          args=(tmp_path, "workflow:w", "v2"))
+    writer.start()
+    deadline = time.time() + 30
+    while "workflow:w" in manager.memory_cache and time.time() < deadline:
+        time.sleep(0.01)
+    writer.join()
+    assert writer.exitcode == 0
+    assert "workflow:w" not in manager.memory_cache
+    assert manager.host_cache.get("workflow:w", version="1").value == "v2"
+    manager.close()
+    Configuration().reset()
+
+
+def test_hot_keys_rank_recent_accesses():
+    hot_keys = HotKeys(limit=2)
+    for key in ["a", "b", "b", "c", "c", "c"]:
+        hot_keys.touch(key)
+    assert list(hot_keys.decay()) == ["c", "b"]
+    assert hot_keys.decay() == {"c": 1.5, "b": 1}
+
+
+def test_cache_manager_warms_up_hot_keys_in_batches(tmp_path):
+    Configuration().override(home=str(tmp_path), cache={"backend": "file", "warm_up_batch_size": 2})
+    manager = CacheManager()
+    manager.set_many({"a": 1, "b": 2, "c": 3, "workflow:w": "meta"})
+    for key in ["a", "b", "b", "c"]:
+        manager.get(key)
+    manager.save_hot_keys()
+    assert manager.load_hot_keys() == ["b", "a", "c"]
+
+    restarted = CacheManager()
+    assert restarted.warm_up(["workflow:w", "missing"]) == 4
+    assert all(key in restarted.memory_cache for key in ["workflow:w", "a", "b", "c"])
+    manager.close()
+    restarted.close()
+    Configuration().reset()
+
+
+@pytest.mark.asyncio
+async def test_cache_manager_computes_missing_key_once(tmp_path):
+    Configuration().override(home=str(tmp_path), cache={"backend": "file"})
+    CacheManager.reset()
+    manager = CacheManager.default()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        value, flight = await manager.claim("key", version="1")
+        if flight is None:
+            return value
+        calls += 1
+        await asyncio.sleep(0.05)
+        manager.set("key", "value", version="1")
+        flight.complete("value")
+        flight.release()
+        return "value"
+
+    assert await asyncio.gather(*(compute() for _ in range(5))) == ["value"] * 5
+    assert calls == 1
+    CacheManager.reset()
+    Configuration().reset()
+
+
+
+@pytest.mark.asyncio
+async def test_cache_manager_computes_missing_none_once(tmp_path):
+    Configuration().override(home=str(tmp_path), cache={"backend": "file"})
+    manager = CacheManager()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        value, flight = await manager.claim("key", version="1")
+        if flight is None:
+            return value
+        calls += 1
+        await asyncio.sleep(0.05)
+        manager.set("key", CACHED_NONE, version="1")
+        flight.complete(CACHED_NONE)
+        await flight.arelease()
+        return CACHED_NONE
+
+    assert await asyncio.gather(*(compute() for _ in range(5))) == [CACHED_NONE] * 5
+    assert calls == 1
+    manager.memory_cache.clear()
+    assert manager.get("key", version="1") is CACHED_NONE  # the same instance once read back
+    manager.close()
+    Configuration().reset()
+
+
+@pytest.mark.asyncio
+async def test_cache_manager_claim_rereads_the_backend_after_taking_the_lease(tmp_path):
+    Configuration().override(home=str(tmp_path), cache={"backend": "file", "bloom_filter": False})
+    manager, other = CacheManager(), CacheManager()  # stand-ins for two processes
+    assert await manager.aget("key", version="1") is None
+    other.set("key", "value", version="1")  # computed and released before our claim
+
+    assert await manager.claim("key", version="1") == ("value", None)
+    manager.close()
+    other.close()
+    Configuration().reset()
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    digests = [key_digest(f"key-{i}") for i in range(1000)]
+    for digest in digests[:500]:
+        bloom.add(digest)
+    assert all(digest in bloom for digest in digests[:500])
+    assert sum(digest in bloom for digest in digests[500:]) < 25
+
+    other = BloomFilter(capacity=1000, error_rate=0.01)
+    assert other.merge(bloom.to_bytes())
+    assert all(digest in other for digest in digests[:500])
+
+
+def test_cache_manager_answers_definite_misses_from_bloom_filter(tmp_path):
+    Configuration().override(home=str(tmp_path), cache={"backend": "file"})
+    CacheManager().set("existing", 1)
+    Configuration().override(home=str(tmp_path), cache={"backend": "file", "bloom_filter": True})
+    manager = CacheManager()
+    deadline = time.time() + 5
+    while not manager._bloom_filter_ready and time.time() < deadline:
+        time.sleep(0.01)
+    manager.memory_cache.clear()
+    assert manager.get("existing") == 1  # rebuilt from the backend
+
+    manager.persistent_backend = None  # any backend access would fail
+    assert manager.get("missing") is None
+    assert manager.get_many(["missing"]) == {}
+    Configuration().reset()
+
+
+def test_bloom_filter_learns_keys_written_by_other_processes(tmp_path):
+    Configuration().override(home=str(tmp_path), cache={"backend": "file", "bloom_filter": True,
+                                                        "bloom_share_interval": None,
+                                                        "invalidation_channel": "sqlite",
+                                                        "invalidation_poll_interval": 0.01})
+    writer, reader = CacheManager(), CacheManager()  # stand-ins for two processes
+    deadline = time.time() + 5
+    while not reader._bloom_filter_ready and time.time() < deadline:
+        time.sleep(0.01)
+    writer.set("context_1", "v1")
+    deadline = time.time() + 5
+    while key_digest("context_1") not in reader.bloom_filter and time.time() < deadline:
+        time.sleep(0.01)
+    assert reader.get("context_1") == "v1"
+    writer.close()
+    reader.close()
+    Configuration().reset()
+
+
+def test_bloom_filter_is_not_consulted_without_a_way_to_learn_other_keys(tmp_path):
+    Configuration().override(home=str(tmp_path), cache={"backend": "file", "bloom_filter": True,
+                                                        "bloom_share_interval": None,
+                                                        "invalidation_channel": "none"})
+    writer, reader = CacheManager(), CacheManager()
+    assert not reader.rebuild_bloom_filter()
+    writer.set("context_1", "v1")
+    assert reader.get("context_1") == "v1"
+    Configuration().reset()
+
+
+def test_cache_manager_counts_operations_per_tier(tmp_path):
+    Configuration().override(home=str(tmp_path), cache={"backend": "file", "bloom_filter": False})
+    manager = CacheManager()
+    manager.set("context_1", "ctx")
+    manager.get("context_1")
+    manager.memory_cache.clear()
+    manager.get("context_1")
+    manager.get("task_1")
+
+    summary = {(row["tier"], row["namespace"]): row for row in CacheStats.summarize(manager.stats.snapshot())}
+    assert summary[("memory", "context")]["hits"] == 1
+    assert summary[("memory", "context")]["misses"] == 1
+    assert summary[("persistent", "context")]["hits"] == 1
+    assert summary[("persistent", "context")]["sets"] == 1
+    assert summary[("persistent", "context")]["backend"] == "file"
+    assert summary[("persistent", "task")]["misses"] == 1
+    assert summary[("persistent", "task")]["hit_rate"] == 0
+    assert summary[("persistent", "context")]["read_latency_ms"] is not None
+    Configuration().reset()
+
+
+def test_writes_and_tag_invalidations_reach_other_memory_tiers(tmp_path):
+    Configuration().override(home=str(tmp_path), cache={"backend": "file", "bloom_filter": False,
+                                                        "invalidation_channel": "sqlite",
+                                                        "invalidation_poll_interval": 0.01})
+    writer, reader = CacheManager(), CacheManager()  # stand-ins for two processes
+
+    def wait_until_evicted(manager, key):
+        deadline = time.time() + 5
+        while key in manager.memory_cache and time.time() < deadline:
+            time.sleep(0.01)
+
+    writer.set("context_1", "v1", tags={"workflow:w"})
+    assert reader.get("context_1") == "v1"
+    writer.set("context_1", "v2", tags={"workflow:w"})
+    wait_until_evicted(reader, "context_1")
+    assert reader.get("context_1") == "v2"
+
+    CacheManager().invalidator.invalidate_by_tag("workflow:w")  # tags are read from the backend
+    wait_until_evicted(reader, "context_1")
+    assert reader.get("context_1") is None
+    writer.close()
+    reader.close()
+    Configuration().reset()
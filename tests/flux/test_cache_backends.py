@@ -0,0 +1,384 @@
+from __future__ import annotations
+
+import asyncio
+import shutil
+import socket
+import subprocess
+import time
+
+import pytest
+import redis
+
+from flux.cache import CacheManager
+from flux.cache_backends import CacheEntry
+from flux.cache_backends import Compressor
+from flux.cache_backends import decode_entry
+from flux.cache_backends import encode_entry
+from flux.cache_backends import FileCacheBackend
+from flux.cache_backends import hash_tag
+from flux.cache_backends import HashRing
+from flux.cache_backends import MemcachedCacheBackend
+from flux.cache_backends import read_header
+from flux.cache_backends import RedisCacheBackend
+from flux.cache_backends import SharedMemoryCache
+from flux.cache_backends import SQLiteCacheBackend
+from flux.config import Configuration
+
+
+@pytest.fixture
+def file_backend(tmp_path):
+    Configuration().override(home=str(tmp_path), cache={"backend": "file", "file_use_mmap": True})
+    yield FileCacheBackend()
+    Configuration().reset()
+
+
+@pytest.fixture
+def redis_nodes():
+    if shutil.which("redis-server") is None:
+        pytest.skip("redis-server is not installed")
+    processes, ports = [], []
+    for _ in range(3):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            ports.append(s.getsockname()[1])
+        processes.append(subprocess.Popen(["redis-server", "--port", str(ports[-1]), "--save", "", "--appendonly", "no"],
+                                          stdout=subprocess.DEVNULL))
+    for port in ports:
+        deadline = time.time() + 5
+        while time.time() < deadline:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+                break
+            except OSError:
+                time.sleep(0.05)
+    yield [f"127.0.0.1:{port}" for port in ports]
+    for process in processes:
+        process.terminate()
+        process.wait()
+
+
+@pytest.fixture
+def memcached_server():
+    if shutil.which("memcached") is None:
+        pytest.skip("memcached is not installed")
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    process = subprocess.Popen(["memcached", "-l", "127.0.0.1", "-p", str(port)], stdout=subprocess.DEVNULL)
+    deadline = time.time() + 5
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    yield f"127.0.0.1:{port}"
+    process.terminate()
+    process.wait()
+
+
+def test_entry_header_is_readable_without_payload():
+    data = encode_entry(CacheEntry({"a": 1}, version="v1", ttl=60))
+    header, offset = read_header(data)
+    assert header.version == "v1"
+    assert not header.is_expired()
+    assert decode_entry(data).value == {"a": 1}
+    assert decode_entry(data, header, offset).ttl == pytest.approx(60)
+
+
+def test_entry_compresses_large_values():
+    value = "x" * 10_000
+    data = encode_entry(CacheEntry(value), Compressor("zlib", min_bytes=1024))
+    header, _ = read_header(data)
+    assert header.flags and header.size > 10_000 > len(data)
+    entry = decode_entry(data)
+    assert entry.value == value and entry.size == header.size
+
+    header, _ = read_header(encode_entry(CacheEntry("small"), Compressor("zlib", min_bytes=1024)))
+    assert not header.flags
+
+
+def test_file_backend_round_trip(file_backend):
+    file_backend.set("workflow:with/slashes", [1, 2, 3], ttl=60, version="1")
+    assert file_backend.get("workflow:with/slashes") == [1, 2, 3]
+    assert file_backend.validate("workflow:with/slashes", "1")
+    assert not file_backend.validate("workflow:with/slashes", "2")
+    assert file_backend.get_entry("workflow:with/slashes", "2") is None
+
+    file_backend.delete("workflow:with/slashes")
+    assert file_backend.get("workflow:with/slashes") is None
+
+
+def test_file_backend_shards_keys(file_backend):
+    file_backend.set("key", "value")
+    path = file_backend._get_file_name("key")
+    assert path.exists()
+    assert path.parent.parent.parent == file_backend.cache_path
+    assert not list(path.parent.glob("*.tmp"))
+
+
+def test_file_backend_drops_expired_entries(file_backend):
+    file_backend.set("key", "value", ttl=1)
+    time.sleep(1.1)
+    assert file_backend.get("key") is None
+    assert not file_backend._get_file_name("key").exists()
+
+
+def test_file_backend_evicts_least_recently_used(file_backend):
+    file_backend.max_bytes = 1000
+    for i in range(10):
+        file_backend.set(f"key_{i}", "x" * 200)
+        path = file_backend._get_file_name(f"key_{i}")
+        path.touch()
+        time.sleep(0.01)
+    file_backend.evict()
+    assert file_backend.get("key_0") is None
+    assert file_backend.get("key_9") == "x" * 200
+
+
+def test_file_backend_drops_deleted_and_evicted_keys_from_tags(file_backend):
+    file_backend.max_bytes = 1000
+    for i in range(10):
+        file_backend.set(f"key_{i}", "x" * 200, tags={"workflow:w", f"key:{i}"})
+        file_backend._get_file_name(f"key_{i}").touch()
+        time.sleep(0.01)
+    file_backend.delete("key_9")
+    file_backend.evict()
+
+    kept = {f"key_{i}" for i in range(9) if file_backend.get(f"key_{i}") is not None}
+    assert kept and "key_0" not in kept
+    assert file_backend.get_keys_by_tag("workflow:w") == kept
+    assert file_backend.get_keys_by_tag("key:0") == set() and file_backend.get_keys_by_tag("key:9") == set()
+    file_backend.delete_by_tag("workflow:w")
+    assert not file_backend._get_tag_dir("workflow:w").exists()
+    assert not list(file_backend.cache_path.glob("*/*/*.tags"))
+
+
+def test_file_backend_lease_excludes_other_holders(file_backend):
+    token = file_backend.acquire_lease("key", ttl=60)
+    assert token is not None
+    assert file_backend.acquire_lease("key", ttl=60) is None
+    file_backend.release_lease("key", token)
+    assert file_backend.acquire_lease("key", ttl=60) is not None
+
+
+@pytest.fixture
+def sqlite_backend(tmp_path):
+    Configuration().override(home=str(tmp_path), cache={"backend": "sqlite"})
+    yield SQLiteCacheBackend()
+    Configuration().reset()
+
+
+def test_sqlite_backend_round_trip(sqlite_backend):
+    sqlite_backend.set("key", {"a": 1}, ttl=60, version="1")
+    assert sqlite_backend.get("key") == {"a": 1}
+    assert sqlite_backend.validate("key", "1")
+    assert sqlite_backend.get_entry("key", "2") is None
+
+    sqlite_backend.set_many({"k1": 1, "k2": 2})
+    entries = sqlite_backend.get_many(["k1", "k2", "missing"])
+    assert {key: entry.value for key, entry in entries.items()} == {"k1": 1, "k2": 2}
+
+    sqlite_backend.delete("key")
+    assert sqlite_backend.get("key") is None
+
+
+def test_sqlite_backend_invalidates_by_tag(sqlite_backend):
+    sqlite_backend.set("a", 1, tags={"workflow:hello"})
+    sqlite_backend.set("b", 2, tags={"workflow:hello", "other"})
+    sqlite_backend.set("c", 3, tags={"other"})
+
+    sqlite_backend.delete_by_tag("workflow:hello")
+    assert sqlite_backend.get("a") is None and sqlite_backend.get("b") is None
+    assert sqlite_backend.get("c") == 3
+    assert sqlite_backend.get_keys_by_tag("other") == {"c"}
+
+
+def test_sqlite_backend_purges_expired_entries(sqlite_backend):
+    sqlite_backend.set("key", "value", ttl=1)
+    time.sleep(1.1)
+    assert sqlite_backend.get("key") is None
+    assert sqlite_backend.purge_expired() == 1
+
+
+def test_sqlite_backend_batches(sqlite_backend):
+    sqlite_backend.set_many({"a": 1, "b": 2, "c": 3}, ttl=60, version="1")
+    assert {k: e.value for k, e in sqlite_backend.get_many(["a", "b", "x"], "1").items()} == {"a": 1, "b": 2}
+    sqlite_backend.delete_many(["a", "b"])
+    assert list(sqlite_backend.get_many(["a", "b", "c"])) == ["c"]
+
+
+def test_sqlite_backend_lease_expires(sqlite_backend):
+    token = sqlite_backend.acquire_lease("key", ttl=0.05)
+    assert token is not None
+    assert sqlite_backend.acquire_lease("key", ttl=60) is None
+    time.sleep(0.1)
+    assert sqlite_backend.acquire_lease("key", ttl=60) is not None
+    sqlite_backend.release_lease("key", token)  # expired and taken over: left alone
+    assert sqlite_backend.acquire_lease("key", ttl=60) is None
+
+
+def test_sqlite_backend_compresses_large_values(tmp_path):
+    Configuration().override(home=str(tmp_path), cache={"backend": "sqlite", "compress_min_bytes": 1024})
+    backend = SQLiteCacheBackend()
+    backend.set("key", "x" * 10_000)
+    stored, size = (
+        backend._connection()
+        .execute("SELECT length(value), size FROM cache_entries WHERE key = ?", ("key",))
+        .fetchone()
+    )
+    assert stored < 10_000 < size
+    assert backend.get("key") == "x" * 10_000
+    Configuration().reset()
+
+
+def test_memcached_keys_are_hashed_only_when_unstorable():
+    assert MemcachedCacheBackend._key("flux:task:abc") == "flux:task:abc"
+    long_key = MemcachedCacheBackend._key("x" * 300)
+    spaced_key = MemcachedCacheBackend._key("task with spaces")
+    assert long_key.startswith("flux:") and len(long_key) <= MemcachedCacheBackend.MAX_KEY_LENGTH
+    assert spaced_key.startswith("flux:") and " " not in spaced_key
+    assert MemcachedCacheBackend._key("tâche_1").startswith("flux:")  # printable, but not ASCII
+    assert MemcachedCacheBackend._key("é" * 200).startswith("flux:")  # 200 characters, 400 bytes
+    assert MemcachedCacheBackend._parse_server("cache-1:11212") == ("cache-1", 11212)
+
+
+def test_memcached_lease_is_released_only_by_its_holder(memcached_server):
+    Configuration().override(cache={"backend": "memcached", "memcached_servers": [memcached_server]})
+    backend = MemcachedCacheBackend()
+    token = backend.acquire_lease("key", ttl=60)
+    assert token is not None
+    assert backend.acquire_lease("key", ttl=60) is None
+    backend.release_lease("key", "another holder's token")
+    assert backend.acquire_lease("key", ttl=60) is None
+
+    backend.release_lease("key", token)
+    taken = backend.acquire_lease("key", ttl=60)
+    assert taken is not None
+    assert backend.acquire_lease("key", ttl=60) is None
+    backend.release_lease("key", token)  # released already: the new holder keeps it
+    assert backend.acquire_lease("key", ttl=60) is None
+    Configuration().reset()
+
+
+def test_hash_ring_moves_few_keys_when_a_node_is_added():
+    keys = [f"task_{i}" for i in range(10_000)]
+    ring = HashRing(["a:6379", "b:6379", "c:6379"])
+    grown = HashRing(["a:6379", "b:6379", "c:6379", "d:6379"])
+    moved = [key for key in keys if ring.node(key) != grown.node(key)]
+    assert 0.15 < len(moved) / len(keys) < 0.35
+    assert all(grown.node(key) == "d:6379" for key in moved)
+    assert ring.node("x{user:1}") == ring.node("y{user:1}")
+    assert hash_tag("tags:{user:1}:x") == "user:1" and hash_tag("plain") == "plain"
+
+
+def test_redis_backend_shards_keys_and_tags(redis_nodes):
+    Configuration().override(cache={"backend": "redis", "redis_nodes": redis_nodes})
+    backend = RedisCacheBackend()
+    items = {f"task_{i}": i for i in range(60)}
+    backend.set_many(items, version="1", tags={"workflow:w"})
+
+    assert {key: entry.value for key, entry in backend.get_many(list(items), version="1").items()} == items
+    assert all(sum(client.exists(key) for client in backend.clients.values()) == 1 for key in items)
+    assert all(client.dbsize() > 0 for client in backend.clients.values())
+    assert backend.get_keys_by_tag("workflow:w") == set(items)
+
+    backend.delete_by_tag("workflow:w")
+    assert backend.get_many(list(items)) == {}
+    assert all(client.dbsize() == 0 for client in backend.clients.values())
+    Configuration().reset()
+
+
+def test_redis_tag_index_drops_expired_keys(redis_nodes):
+    Configuration().override(cache={"backend": "redis", "redis_nodes": redis_nodes[:1]})
+    backend = RedisCacheBackend()
+    backend.set("task_1", 1, ttl=1, tags={"workflow:w"})
+    time.sleep(1.1)
+    assert backend.get_keys_by_tag("workflow:w") == set()
+    backend.set("task_2", 2, tags={"workflow:w"})
+    assert backend.client.zrange("tag-index:workflow:w", 0, -1) == [b"task_2"]
+    Configuration().reset()
+
+
+def test_redis_backend_gets_and_sets_in_one_round_trip(redis_nodes, monkeypatch):
+    Configuration().override(cache={"backend": "redis", "redis_nodes": redis_nodes})
+    backend = RedisCacheBackend()
+    backend.client_for("task_1").ping()  # connect, so the handshake is not counted
+    sent = []
+    send_packed_command = redis.connection.Connection.send_packed_command
+
+    def record(connection, command, *args, **kwargs):
+        sent.append(command)
+        return send_packed_command(connection, command, *args, **kwargs)
+
+    monkeypatch.setattr(redis.connection.Connection, "send_packed_command", record)
+    backend.set("task_1", 1, ttl=60, version="1", tags={"workflow:w", "workflow:v"})
+    assert len(sent) == 1
+    sent.clear()
+    assert backend.get_entry("task_1", version="1").value == 1
+    assert len(sent) == 1
+    Configuration().reset()
+
+
+def test_redis_tag_invalidation_removes_keys_and_index(redis_nodes):
+    Configuration().override(cache={"backend": "redis", "redis_nodes": redis_nodes, "bloom_filter": False,
+                                    "hot_keys": None, "invalidation_channel": "none"})
+    manager = CacheManager()
+    manager.set_many({f"task_w{i}": i for i in range(20)}, tags={"workflow:w"})
+    manager.set("task_v", "v", tags={"workflow:v"})
+
+    manager.invalidator.invalidate_by_tag("workflow:w")
+    remaining = set().union(*(client.keys() for client in manager.persistent_backend.clients.values()))
+    assert remaining == {b"task_v", b"tag-index:workflow:v", b"tags:{task_v}:task_v"}
+    assert manager.get("task_w0") is None and manager.get("task_v") == "v"
+    manager.close()
+    Configuration().reset()
+
+
+def test_redis_async_clients_are_closed_per_loop(redis_nodes):
+    Configuration().override(cache={"backend": "redis", "redis_nodes": redis_nodes})
+    backend = RedisCacheBackend()
+
+    async def use_and_close():
+        await backend.aset("task_1", 1)
+        assert (await backend.aget_entry("task_1")).value == 1
+        assert asyncio.get_running_loop() in backend._async_clients
+        await backend.aclose()
+        assert backend._async_clients == {}
+
+    asyncio.run(use_and_close())
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(backend.aset("task_2", 2))
+        backend.close()  # closes the clients of loops that are still open
+        assert backend._async_clients == {}
+    finally:
+        loop.close()
+    Configuration().reset()
+
+
+def test_shared_memory_cache_is_shared_between_mappings(tmp_path):
+    writer = SharedMemoryCache(tmp_path / "host-cache", 1024 * 1024, slots=1024)
+    reader = SharedMemoryCache(tmp_path / "host-cache", 1024 * 1024, slots=1024)
+    assert writer.set("a", CacheEntry({"x": 1}, version="1"))
+    assert reader.get("a", version="1").value == {"x": 1}
+    assert reader.get("a", version="2") is None
+
+    reader.pop("a")
+    assert writer.get("a") is None
+    with pytest.raises(ValueError):
+        SharedMemoryCache(tmp_path / "host-cache", 2 * 1024 * 1024, slots=1024)
+    writer.close()
+    reader.close()
+
+
+def test_shared_memory_cache_misses_entries_the_log_wrapped_over(tmp_path):
+    cache = SharedMemoryCache(tmp_path / "host-cache", 256 * 1024, slots=1024)
+    value = "x" * (cache.max_entry_bytes - 200)
+    for i in range(40):
+        assert cache.set(f"key_{i}", CacheEntry(value))
+    assert cache.get("key_0") is None
+    assert cache.get("key_39").value == value
+    assert not cache.set("large", CacheEntry("y" * cache.max_entry_bytes))
+    cache.close()
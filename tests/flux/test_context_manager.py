@@ -1,11 +1,17 @@
 from __future__ import annotations
 
+import threading
+
 import pytest
 
 from examples.complex_pipeline import complex_pipeline
 from examples.hello_world import hello_world
+from flux.config import Configuration
+from flux.context import WorkflowExecutionContext
 from flux.context_managers import ContextManager
 from flux.errors import ExecutionContextNotFoundError
+from flux.events import ExecutionEvent
+from flux.events import ExecutionEventType
 
 
 def test_should_get_existing_context():
@@ -27,6 +33,94 @@ def test_should_raise_exception_when_not_found():
         ContextManager.default().get(execution_id)
 
 
+def test_should_share_one_context_manager_per_database(tmp_path):
+    ContextManager.reset()
+    manager = ContextManager.default()
+    assert ContextManager.default() is manager
+
+    Configuration().override(database_url=f"sqlite:///{tmp_path}/flux.db")
+    other = ContextManager.default()
+    assert other is not manager
+    assert ContextManager.default() is other
+    ContextManager.reset()
+    Configuration().reset()
+
+
 def test_should_save_events_with_exception():
     ctx = complex_pipeline.run({"input_file": "invalid_file.csv"})
     assert ctx.finished and ctx.failed, "The workflow should have failed."
+
+
+class CountingContextManager(ContextManager):
+    def __init__(self):
+        self.saves = 0
+
+    def save(self, ctx: WorkflowExecutionContext):
+        self.saves += 1
+        ctx.mark_flushed()
+
+    def get(self, execution_id: str | None) -> WorkflowExecutionContext:
+        raise ExecutionContextNotFoundError(execution_id)
+
+
+def _append_events(ctx: WorkflowExecutionContext, count: int):
+    for i in range(count):
+        ctx.events.append(ExecutionEvent(ExecutionEventType.TASK_COMPLETED, f"task_{i}", "task", i))
+
+
+def test_should_save_every_n_events():
+    Configuration().override(persistence={"durability": "every_n_events", "flush_events": 3})
+    manager = CountingContextManager()
+    ctx = WorkflowExecutionContext("workflow")
+
+    _append_events(ctx, 2)
+    assert not manager.checkpoint(ctx)
+    _append_events(ctx, 1)
+    assert manager.checkpoint(ctx)
+    assert manager.saves == 1 and ctx.pending_events == 0
+    Configuration().reset()
+
+
+def test_should_defer_saves_until_pause_or_completion():
+    manager = CountingContextManager()
+    ctx = WorkflowExecutionContext("workflow")
+    ctx.durability = "on_pause_or_completion"
+
+    _append_events(ctx, 10)
+    assert not manager.checkpoint(ctx)
+    assert manager.saves == 0 and ctx.pending_events == 10
+
+
+def test_should_not_get_a_context_manager_for_deferred_checkpoints(monkeypatch):
+    Configuration().override(persistence={"durability": "on_pause_or_completion"})
+    calls = []
+    default = ContextManager.default
+
+    def counting_default():
+        calls.append(1)
+        return default()
+
+    monkeypatch.setattr(ContextManager, "default", staticmethod(counting_default))
+    ctx = hello_world.run("Joe")
+    assert ctx.succeeded, ctx.output
+    assert len(calls) == 1  # the final save
+    Configuration().reset()
+
+
+def test_should_save_off_the_event_loop(monkeypatch):
+    Configuration().override(persistence={"durability": "every_task"})
+    manager = CountingContextManager()
+    threads = []
+    save = manager.save
+
+    def recording_save(ctx: WorkflowExecutionContext):
+        threads.append(threading.get_ident())
+        save(ctx)
+
+    manager.save = recording_save
+    monkeypatch.setattr(ContextManager, "default", staticmethod(lambda: manager))
+    ctx = hello_world.run("Joe")
+    assert ctx.succeeded, ctx.output
+    assert len(threads) == 2  # the task checkpoint and the final save
+    assert threading.get_ident() not in threads
+    Configuration().reset()
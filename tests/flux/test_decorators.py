@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import asyncio
+
+from flux import task
+from flux import workflow
+from flux.cache import CacheManager
+from flux.config import Configuration
+from flux.context import WorkflowExecutionContext
+from flux.runtime import ExecutionRuntime
+from flux.tasks import parallel
+
+
+@task.with_options(cache=True)
+async def square(x: int) -> int:
+    return x * x
+
+
+@workflow
+async def map_squares(ctx: WorkflowExecutionContext[list]):
+    return await square.map(ctx.input, concurrency=2)
+
+
+def test_map_writes_cached_outputs_in_one_batch(tmp_path, monkeypatch):
+    Configuration().override(home=str(tmp_path), executor={"execution_mode": "local"}, cache={"backend": "file"})
+    ExecutionRuntime.reset()
+    CacheManager.reset()
+    writes = []
+    aset, aset_many = CacheManager.aset, CacheManager.aset_many
+
+    async def record_aset(self, key, value, *args, **kwargs):
+        writes.append({key: value})
+        return await aset(self, key, value, *args, **kwargs)
+
+    async def record_aset_many(self, items, *args, **kwargs):
+        writes.append(dict(items))
+        return await aset_many(self, items, *args, **kwargs)
+
+    monkeypatch.setattr(CacheManager, "aset", record_aset)
+    monkeypatch.setattr(CacheManager, "aset_many", record_aset_many)
+
+    ctx = map_squares.run([1, 2, 3, 4])
+    assert ctx.succeeded, ctx.output
+    assert ctx.output == [1, 4, 9, 16]
+    assert len(writes) == 1
+    assert sorted(writes[0].values()) == [1, 4, 9, 16]
+    ExecutionRuntime.reset()
+    CacheManager.reset()
+    Configuration().reset()
+
+
+calls = 0
+
+
+@task.with_options(cache=True)
+async def returns_none(x: int) -> None:
+    global calls
+    calls += 1
+    await asyncio.sleep(0.05)
+
+
+@workflow
+async def none_twice(ctx: WorkflowExecutionContext[int]):
+    await parallel(returns_none(ctx.input), returns_none(ctx.input), returns_none(ctx.input))
+    return await returns_none(ctx.input)
+
+
+def test_cached_none_is_not_computed_again(tmp_path):
+    global calls
+    Configuration().override(home=str(tmp_path), executor={"execution_mode": "local"}, cache={"backend": "file"})
+    ExecutionRuntime.reset()
+    CacheManager.reset()
+    calls = 0
+
+    ctx = none_twice.run(1)
+    assert ctx.succeeded, ctx.output
+    assert ctx.output is None
+    assert calls == 1
+    ExecutionRuntime.reset()
+    CacheManager.reset()
+    Configuration().reset()
+
+
+progress = {"running": 0, "peak": 0, "started": [], "finished": []}
+
+
+@task
+async def tracked(x: int) -> int:
+    progress["started"].append(x)
+    progress["running"] += 1
+    progress["peak"] = max(progress["peak"], progress["running"])
+    try:
+        if x < 0:
+            raise ValueError(f"Invalid item {x}")
+        await asyncio.sleep(0.02 * (x % 3) if x < 100 else 5)  # items finish out of order
+    finally:
+        progress["running"] -= 1
+    progress["finished"].append(x)
+    return x * 10
+
+
+@workflow
+async def map_tracked(ctx: WorkflowExecutionContext[dict]):
+    return await tracked.map(ctx.input["items"], concurrency=ctx.input.get("concurrency"))
+
+
+@workflow
+async def map_tracked_failure(ctx: WorkflowExecutionContext[list]):
+    try:
+        await tracked.map(ctx.input)
+    except ValueError as ex:
+        return str(ex)
+
+
+def _run_map(tmp_path, workflow_, payload, executor=None):
+    Configuration().override(home=str(tmp_path), executor={"execution_mode": "local", "retry_attempts": 1,
+                                                           **(executor or {})})
+    ExecutionRuntime.reset()
+    progress.update(running=0, peak=0, started=[], finished=[])
+    try:
+        ctx = workflow_.run(payload)
+        assert ctx.succeeded, ctx.output
+        return ctx.output
+    finally:
+        ExecutionRuntime.reset()
+        Configuration().reset()
+
+
+def test_map_returns_outputs_in_item_order(tmp_path):
+    assert _run_map(tmp_path, map_tracked, {"items": [2, 0, 1, 5, 3]}) == [20, 0, 10, 50, 30]
+    assert progress["finished"] != progress["started"]  # completed out of order
+
+
+def test_map_runs_equal_items_once(tmp_path):
+    assert _run_map(tmp_path, map_tracked, {"items": [1, 2, 1, 1, 2]}) == [10, 20, 10, 10, 20]
+    assert sorted(progress["started"]) == [1, 2]
+
+
+def test_map_bounds_concurrency(tmp_path):
+    assert _run_map(tmp_path, map_tracked, {"items": list(range(10)), "concurrency": 3}) == \
+           [x * 10 for x in range(10)]
+    assert progress["peak"] == 3
+
+
+def test_map_defaults_to_the_executor_max_concurrency(tmp_path):
+    _run_map(tmp_path, map_tracked, {"items": list(range(10))}, executor={"max_concurrency": 2})
+    assert progress["peak"] == 2
+
+
+def test_map_cancels_remaining_items_when_one_fails(tmp_path):
+    assert _run_map(tmp_path, map_tracked_failure, [100, 101, -1, 102]) == "Invalid item -1"
+    assert progress["running"] == 0
+    assert progress["finished"] == []
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import dill
+
+from flux.context import WorkflowExecutionContext
+from flux.events import ExecutionEvent
+from flux.events import ExecutionEventList
+from flux.events import ExecutionEventType
+
+
+def test_should_index_terminal_events_by_source():
+    events = ExecutionEventList()
+    events.append(ExecutionEvent(ExecutionEventType.TASK_STARTED, "task_1", "task"))
+    assert events.terminal("task_1") is None
+
+    completed = ExecutionEvent(ExecutionEventType.TASK_COMPLETED, "task_1", "task", 42)
+    events.append(completed)
+    events.append(ExecutionEvent(ExecutionEventType.TASK_FAILED, "task_1", "task", "boom"))
+
+    assert events.terminal("task_1") is completed
+    assert events.latest("task_1").type == ExecutionEventType.TASK_FAILED
+    assert events.terminal("task_2") is None
+
+
+def test_should_reindex_on_removal():
+    completed = ExecutionEvent(ExecutionEventType.TASK_COMPLETED, "task_1", "task", 42)
+    events = ExecutionEventList([completed])
+    events.remove(completed)
+    assert events.terminal("task_1") is None
+    assert events.latest("task_1") is None
+
+
+def test_should_rebuild_index_when_context_is_loaded():
+    ctx = WorkflowExecutionContext(
+        "workflow",
+        events=[ExecutionEvent(ExecutionEventType.TASK_COMPLETED, "task_1", "task", 42)],
+    )
+    assert ctx.terminal_event("task_1").value == 42
+
+    restored = dill.loads(dill.dumps(ctx))
+    assert restored.terminal_event("task_1").value == 42
+    restored.events.append(ExecutionEvent(ExecutionEventType.TASK_COMPLETED, "task_2", "task", 7))
+    assert restored.latest_event("task_2").value == 7
@@ -1,7 +1,7 @@
 from __future__ import annotations
 import pytest
 import asyncio
-from flux.executors import LocalExecutor, DistributedExecutor, get_executor
+from flux.executors import LocalExecutor, DistributedExecutor, ProcessExecutor, get_executor
 from flux.config import Configuration
 
 @pytest.mark.asyncio
@@ -54,4 +54,44 @@ async def test_executor_config_distributed():
         return x * 2
     result = await executor.execute(sample_task, 5)
     assert result == 10
-    executor.shutdown()
\ No newline at end of file
+    executor.shutdown()
+
+@pytest.mark.asyncio
+async def test_local_executor_awaits_async_tasks_on_loop():
+    executor = LocalExecutor(max_workers=1, max_concurrency=2)
+    loop = asyncio.get_running_loop()
+    running = 0
+    peak = 0
+
+    async def sample_task(x: int) -> int:
+        nonlocal running, peak
+        assert asyncio.get_running_loop() is loop
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return x * 2
+
+    results = await asyncio.gather(*[executor.execute(sample_task, i) for i in range(6)])
+    assert results == [0, 2, 4, 6, 8, 10]
+    assert peak == 2
+
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_process_executor():
+    executor = ProcessExecutor(max_workers=2, max_tasks_per_child=1)
+    factor = 3
+
+    def sample_task(x: int) -> int:
+        return x * factor
+
+    async def async_sample_task(x: int) -> int:
+        return x * 2
+
+    results = await asyncio.gather(*[executor.execute(sample_task, i) for i in range(4)])
+    assert results == [0, 3, 6, 9]
+    assert await executor.execute(async_sample_task, 5) == 10
+
+    executor.shutdown()
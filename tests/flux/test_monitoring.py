@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import socket
+
+from flux.config import Configuration
+from flux.monitoring import Monitoring
+
+
+def test_should_keep_monitoring_when_the_metrics_port_is_taken(caplog):
+    with socket.socket() as taken:
+        taken.bind(("", 0))
+        taken.listen()
+        Configuration().override(monitoring={"prometheus_port": taken.getsockname()[1]})
+        try:
+            first = Monitoring()
+            second = Monitoring()
+        finally:
+            Configuration().reset()
+
+    assert "Failed to start the Prometheus metrics server" in caplog.text
+    assert first.task_executions is second.task_executions
+    first.update_resource_usage("cpu", 1)
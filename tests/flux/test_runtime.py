@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from flux import task
+from flux import workflow
+from flux.config import Configuration
+from flux.context import WorkflowExecutionContext
+from flux.executors import LocalExecutor
+from flux.runtime import ExecutionRuntime
+from flux.scheduler import TaskInfo
+from flux.tasks import parallel
+
+
+@pytest.mark.asyncio
+async def test_should_reuse_runtime_and_executor():
+    Configuration().override(executor={"execution_mode": "local", "max_workers": 2})
+    ExecutionRuntime.reset()
+
+    runtime = ExecutionRuntime.default()
+    assert ExecutionRuntime.default() is runtime
+
+    executor = runtime.executor()
+    assert isinstance(executor, LocalExecutor)
+    assert executor is runtime.executor()
+    assert executor.scheduler is runtime.scheduler
+
+    def sample_task(x: int) -> int:
+        return x * 2
+
+    assert await executor.execute(sample_task, 5) == 10
+    ExecutionRuntime.reset()
+    assert ExecutionRuntime.default() is not runtime
+    ExecutionRuntime.reset()
+
+
+@task
+async def leaf(x: int) -> int:
+    await asyncio.sleep(0.01)
+    return x + 1
+
+
+@task
+async def branch(x: int) -> int:
+    return await leaf(x) + await leaf(x * 10)
+
+
+@workflow
+async def nested_and_concurrent(ctx: WorkflowExecutionContext[int]):
+    return await parallel(*(branch(i) for i in range(ctx.input)))
+
+
+def test_should_run_nested_and_concurrent_tasks_on_shared_runtime():
+    Configuration().override(executor={"execution_mode": "local", "max_workers": 2})
+    ExecutionRuntime.reset()
+    scheduler = ExecutionRuntime.default().scheduler
+
+    async def noop():
+        pass
+
+    # A triggered task waiting in the scheduler's queue must not hold back admissions
+    scheduler.task_queue.append(TaskInfo(task_id="triggered", task=noop, args=(), kwargs={}, priority=0))
+    for _ in range(2):  # each run has its own event loop
+        ctx = nested_and_concurrent.run(5)
+        assert ctx.succeeded, ctx.output
+        assert ctx.output == [2, 13, 24, 35, 46]
+    assert scheduler._waiters == []
+    assert scheduler.resource_manager.allocated == {"cpu": 0, "memory": 0, "gpu": 0}
+    ExecutionRuntime.reset()
+    Configuration().reset()
+
+
+@task
+async def fan_out(x: int) -> list[int]:
+    return await parallel(leaf(x), leaf(x * 10))
+
+
+@workflow
+async def nested_fan_out(ctx: WorkflowExecutionContext[int]):
+    # Bounded by a timeout so that a deadlock fails the test instead of hanging it
+    return await asyncio.wait_for(parallel(*(fan_out(i) for i in range(ctx.input))), timeout=5)
+
+
+def test_should_not_deadlock_nested_fan_out_with_max_concurrency():
+    Configuration().override(executor={"execution_mode": "local", "max_concurrency": 1, "retry_attempts": 1})
+    ExecutionRuntime.reset()
+    ctx = nested_fan_out.run(3)
+    assert ctx.succeeded, ctx.output
+    assert ctx.output == [[1, 1], [2, 11], [3, 21]]
+    ExecutionRuntime.reset()
+    Configuration().reset()
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import asyncio
+
+from flux import task
+from flux import workflow
+from flux.cache import CacheManager
+from flux.config import Configuration
+from flux.context import WorkflowExecutionContext
+from flux.runtime import ExecutionRuntime
+from flux.tasks import parallel
+
+progress = {"running": 0, "peak": 0, "attempts": 0, "cancelled": []}
+
+
+@task
+async def branch(x: int) -> int:
+    progress["running"] += 1
+    progress["peak"] = max(progress["peak"], progress["running"])
+    try:
+        await asyncio.sleep(0.01)
+    finally:
+        progress["running"] -= 1
+    return x
+
+
+@task
+async def slow(name: str) -> str:
+    try:
+        await asyncio.sleep(5)
+    except asyncio.CancelledError:
+        progress["cancelled"].append(name)
+        raise
+    return name
+
+
+@task
+async def fail(name: str):
+    progress["attempts"] += 1
+    await asyncio.sleep(0.01)
+    raise ValueError(f"{name} failed")
+
+
+@workflow
+async def bounded(ctx: WorkflowExecutionContext[int]):
+    return await parallel(*(branch(x) for x in range(ctx.input)), max_concurrency=3)
+
+
+@workflow
+async def with_exceptions(ctx: WorkflowExecutionContext):
+    results = await parallel(branch(1), fail("second"), branch(3), return_exceptions=True)
+    return [repr(result) if isinstance(result, Exception) else result for result in results]
+
+
+@workflow
+async def failing(ctx: WorkflowExecutionContext):
+    return await parallel(slow("a"), fail("second"), slow("b"))
+
+
+def _run(tmp_path, workflow_, payload=None, executor=None):
+    Configuration().override(home=str(tmp_path), cache={"backend": "file"},
+                             executor={"execution_mode": "local", "retry_attempts": 1, **(executor or {})})
+    ExecutionRuntime.reset()
+    CacheManager.reset()
+    progress.update(running=0, peak=0, attempts=0, cancelled=[])
+    try:
+        return workflow_.run(payload)
+    finally:
+        ExecutionRuntime.reset()
+        CacheManager.reset()
+        Configuration().reset()
+
+
+def test_parallel_bounds_concurrency(tmp_path):
+    ctx = _run(tmp_path, bounded, 10)
+    assert ctx.succeeded, ctx.output
+    assert ctx.output == list(range(10))
+    assert progress["peak"] == 3
+
+
+def test_parallel_returns_exceptions_in_place_of_results(tmp_path):
+    ctx = _run(tmp_path, with_exceptions)
+    assert ctx.succeeded, ctx.output
+    assert ctx.output == [1, "ValueError('second failed')", 3]
+
+
+def test_parallel_cancels_siblings_on_first_failure(tmp_path):
+    ctx = _run(tmp_path, failing)
+    assert ctx.failed
+    assert sorted(progress["cancelled"]) == ["a", "b"]
+
+
+def test_parallel_raises_the_original_exception_after_retries(tmp_path):
+    ctx = _run(tmp_path, failing, executor={"retry_attempts": 2, "retry_delay": 0})
+    assert ctx.failed
+    assert isinstance(ctx.output, ValueError), repr(ctx.output)
+    assert str(ctx.output) == "second failed"
+    assert progress["attempts"] == 2
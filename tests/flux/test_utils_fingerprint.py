@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+import threading
+from datetime import datetime
+
+import pytest
+
+from flux.utils import code_fingerprint
+from flux.utils import fingerprint
+
+
+def test_dict_and_set_order_does_not_matter():
+    """Test that equal mappings and sets produce the same fingerprint"""
+    assert fingerprint({"a": 1, "b": {1, 2}}) == fingerprint({"b": {2, 1}, "a": 1})
+
+
+def test_distinguishes_types():
+    """Test that values that compare equal across types get different fingerprints"""
+    assert fingerprint(1) != fingerprint(True)
+    assert fingerprint(1) != fingerprint(1.0)
+    assert fingerprint("1") != fingerprint(1)
+    assert fingerprint(None) != fingerprint("")
+
+
+def test_value_boundaries_are_unambiguous():
+    """Test that splitting values differently produces different fingerprints"""
+    assert fingerprint("ab", "c") != fingerprint("a", "bc")
+    assert fingerprint(("a", "b")) != fingerprint("a", "b")
+
+
+def test_values_without_a_stable_representation_are_rejected():
+    """Test that unpicklable values raise instead of being hashed by their repr"""
+    with pytest.raises(TypeError, match="Cannot fingerprint a value of type _thread.lock"):
+        fingerprint("task", {"lock": threading.Lock()})
+
+
+def test_memoized_fingerprint_matches_plain_fingerprint():
+    """Test that memoization does not change the result"""
+    value = tuple(range(5000))
+    memo: dict = {}
+    assert fingerprint("task", value, memo=memo) == fingerprint("task", value)
+    assert id(value) in memo
+    assert fingerprint("task", value, memo=memo) == fingerprint("task", value)
+
+
+def test_mutable_values_are_not_memoized():
+    """Test that mutable arguments are always re-hashed"""
+    value = list(range(5000))
+    memo: dict = {}
+    before = fingerprint(value, memo=memo)
+    value.append(1)
+    assert fingerprint(value, memo=memo) != before
+    assert not memo
+
+
+def test_stable_across_processes():
+    """Test that the fingerprint does not depend on the process hash seed"""
+    value = {"name": "task", "args": ("a", 1, 2.5, None), "when": datetime(2024, 1, 1)}
+    code = (
+        "from datetime import datetime; from flux.utils import fingerprint; "
+        "print(fingerprint({'name': 'task', 'args': ('a', 1, 2.5, None), 'when': datetime(2024, 1, 1)}))"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == fingerprint(value)
+
+
+def _helper(x):
+    return x + 1
+
+
+def test_code_fingerprint_tracks_code_changes():
+    """Test that the code fingerprint changes with the body, closures and same-module helpers"""
+
+    def make(offset):
+        def f(x):
+            return _helper(x) * offset
+
+        return f
+
+    def g(x):
+        return _helper(x) * 3
+
+    assert code_fingerprint(make(2)) == code_fingerprint(make(2))
+    assert code_fingerprint(make(2)) != code_fingerprint(make(3))
+    assert code_fingerprint(make(2)) != code_fingerprint(g)
+
+    before = code_fingerprint(g)
+    globals()["_helper"], original = (lambda x: x + 2), _helper
+    try:
+        assert code_fingerprint(g) != before
+    finally:
+        globals()["_helper"] = original
+    assert code_fingerprint(g) == before